@@ -0,0 +1,82 @@
+"""
+    bench_fairmodel.py
+    October 16 2026
+
+    Timing and peak memory of FairModel runs.
+"""
+import scmcoat as sc
+
+from . import fixtures
+
+
+class Run:
+    """FairModel.run of a single parameter set"""
+    params = (["default", "median", "indexed"], ["fair", "vectorized"])
+    param_names = ["mode", "engine"]
+
+    def setup(self, mode, engine):
+        if mode == "default":
+            if engine == "vectorized":
+                raise NotImplementedError("the vectorized engine only runs with ClimateParams")
+            self.model = sc.FairModel()
+            self.emissions = fixtures.rcp45_emissions()
+            self.simid = None
+        else:
+            cp = fixtures.climateparams()
+            self.model = sc.FairModel(cp, engine=engine)
+            self.emissions = fixtures.calibrated_emissions(cp)
+            self.simid = "median" if mode == "median" else 42
+        # compile the ClimateParams outside of the timings
+        self.model.run(self.emissions, simid=self.simid)
+
+    def time_run(self, mode, engine):
+        self.model.run(self.emissions, simid=self.simid)
+
+    def time_run_temperature_raw(self, mode, engine):
+        self.model.run(self.emissions, simid=self.simid, outputs=["temperature"], return_xr=False)
+
+    def peakmem_run(self, mode, engine):
+        self.model.run(self.emissions, simid=self.simid)
+
+
+class RunEnsemble:
+    """FairModel.run_ensemble in this process"""
+    params = ["fair", "vectorized"]
+    param_names = ["engine"]
+    timeout = 600
+
+    def setup(self, engine):
+        cp = fixtures.climateparams(16 if engine == "fair" else 512)
+        self.model = sc.FairModel(cp, engine=engine)
+        self.emissions = fixtures.calibrated_emissions(cp)
+        cp.compile(self.emissions["year"].values)
+
+    def time_run_ensemble(self, engine):
+        self.model.run_ensemble(self.emissions, workers=1)
+
+    def time_run_ensemble_temperature_raw(self, engine):
+        self.model.run_ensemble(self.emissions, workers=1, outputs=["temperature"], return_xr=False)
+
+    def peakmem_run_ensemble(self, engine):
+        self.model.run_ensemble(self.emissions, workers=1)
+
+    def peakmem_run_ensemble_temperature_raw(self, engine):
+        self.model.run_ensemble(self.emissions, workers=1, outputs=["temperature"], return_xr=False)
+
+
+class RunScenarios:
+    """shared-history branching and pulse experiments with the vectorized engine"""
+    timeout = 600
+
+    def setup(self):
+        cp = fixtures.climateparams(256)
+        self.model = sc.FairModel(cp, engine="vectorized")
+        self.emissions = fixtures.scenario_emissions(cp, 8)
+        self.baseline = fixtures.calibrated_emissions(cp)
+        cp.compile(self.baseline["year"].values)
+
+    def time_run_scenarios(self):
+        self.model.run_scenarios(self.emissions, outputs=["temperature"])
+
+    def time_run_pulse(self):
+        self.model.run_pulse(self.baseline, gases=["CO2", "CH4", "N2O"], pulse_years=[2020, 2050])
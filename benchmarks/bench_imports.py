@@ -0,0 +1,26 @@
+"""
+    bench_imports.py
+    October 16 2026
+
+    Import time of scmcoat in a fresh interpreter, which command line tools and
+    process-pool workers pay on every start.
+"""
+
+
+class Import:
+    """`import scmcoat`, which defers its dependencies, and first use of FairModel, which loads them"""
+
+    def timeraw_import_scmcoat(self):
+        return "import scmcoat"
+
+    def timeraw_import_fairmodel(self):
+        return "import scmcoat\nscmcoat.FairModel"
+
+    def timeraw_cli_help(self):
+        return """
+from scmcoat.cli import main
+try:
+    main(["run", "--help"])
+except SystemExit:
+    pass
+"""
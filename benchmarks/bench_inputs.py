@@ -0,0 +1,84 @@
+"""
+    bench_inputs.py
+    October 16 2026
+
+    Timing and peak memory of loading climate parameters and preparing emissions.
+"""
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import scmcoat as sc
+
+from . import fixtures
+
+
+class ClimateParamsLoad:
+    """get_fairv1_climateparams, building from the bundled JSON or reading the binary cache"""
+    params = [False, True]
+    param_names = ["cache"]
+
+    def setup(self, cache):
+        self.tmpdir = tempfile.mkdtemp()
+        self.environ = os.environ.get("SCMCOAT_CACHE_DIR")
+        os.environ["SCMCOAT_CACHE_DIR"] = self.tmpdir
+        if cache:
+            sc.utils.get_fairv1_climateparams()
+
+    def teardown(self, cache):
+        if self.environ is None:
+            os.environ.pop("SCMCOAT_CACHE_DIR")
+        else:
+            os.environ["SCMCOAT_CACHE_DIR"] = self.environ
+        shutil.rmtree(self.tmpdir)
+
+    def time_get_fairv1_climateparams(self, cache):
+        sc.utils.get_fairv1_climateparams(cache=cache)
+
+    def peakmem_get_fairv1_climateparams(self, cache):
+        sc.utils.get_fairv1_climateparams(cache=cache)
+
+
+class ClimateParamsCompile:
+    """ClimateParams.compile of the full WG3 ensemble"""
+
+    def setup(self):
+        self.params = fixtures.climateparams().params
+
+    def time_compile(self):
+        sc.ClimateParams(params=self.params).compile(np.arange(1765, 2501))
+
+    def time_median_params(self):
+        sc.ClimateParams(params=self.params).median_params
+
+
+class RcmipEmissions:
+    """building the RCMIP emissions store from the CSV and extracting scenarios from it"""
+    timeout = 300
+
+    def setup(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.csv = os.path.join(self.tmpdir, "rcmip.csv")
+        self.store = os.path.join(self.tmpdir, "rcmip.npz")
+        fixtures.write_rcmip_csv(self.csv, 8)
+        sc.utils.build_rcmip_emissions_store(self.csv, self.store)
+        self.scenarios = [f"scenario{i}" for i in range(8)]
+
+    def teardown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def time_build_rcmip_emissions_store(self):
+        # parse the CSV again, not the copy download_emissions_csv keeps
+        sc.utils.download_emissions_csv.cache_clear()
+        sc.utils.build_rcmip_emissions_store(self.csv, os.path.join(self.tmpdir, "rebuilt.npz"))
+
+    def time_rcmip_emissions(self):
+        sc.utils.rcmip_emissions("scenario0", store=self.store)
+
+    def time_rcmip_emissions_all_scenarios(self):
+        sc.utils.rcmip_emissions(self.scenarios, store=self.store)
+
+    def peakmem_rcmip_emissions_all_scenarios(self):
+        sc.utils.rcmip_emissions(self.scenarios, store=self.store)
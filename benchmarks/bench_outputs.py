@@ -0,0 +1,30 @@
+"""
+    bench_outputs.py
+    October 16 2026
+
+    Timing and peak memory of assembling FairModel outputs into xarray objects.
+"""
+import scmcoat as sc
+
+from . import fixtures
+
+
+class ResultAssembly:
+    """FairResult.to_dataset of a single run and of an ensemble"""
+    params = [1, 256]
+    param_names = ["members"]
+
+    def setup(self, members):
+        cp = fixtures.climateparams(members)
+        model = sc.FairModel(cp, engine="vectorized")
+        emissions = fixtures.calibrated_emissions(cp)
+        if members == 1:
+            self.result = model.run(emissions, simid=0, return_xr=False)
+        else:
+            self.result = model.run_ensemble(emissions, workers=1, return_xr=False)
+
+    def time_to_dataset(self, members):
+        self.result.to_dataset()
+
+    def peakmem_to_dataset(self, members):
+        self.result.to_dataset()
@@ -0,0 +1,68 @@
+"""
+    fixtures.py
+    October 16 2026
+
+    Offline inputs for the benchmarks, built from the data bundled with scmcoat.
+"""
+from importlib.resources import files
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+import scmcoat as sc
+from scmcoat.utils import _RCMIP_SPECIES
+
+
+def rcp45_emissions():
+    """bundled RCP4.5 emissions as a [year x gas] DataArray"""
+    with (files("scmcoat") / "testdata" / "rcp45emissions.csv").open() as fl:
+        df = pd.read_csv(fl)
+    return xr.DataArray(
+        df.values, dims=["year", "gas"], coords={"year": df["year"].values, "gas": list(df.columns)}
+    )
+
+
+def climateparams(nmembers=None):
+    """the bundled WG3 ClimateParams, or its first `nmembers` members"""
+    cp = sc.utils.get_fairv1_climateparams(cache=False)
+    if nmembers is None:
+        return cp
+    return sc.ClimateParams(params=cp.params.isel(simulation=slice(0, nmembers)))
+
+
+def calibrated_emissions(cp):
+    """RCP4.5 emissions with the pre-industrial precursors of the ClimateParams in the first year"""
+    emissions = rcp45_emissions()
+    emissions[0, 5:12] = cp.params["E_pi"][5:12].values
+    return emissions
+
+
+def scenario_emissions(cp, nscenarios):
+    """[scenario x year x gas] emissions that share their history up to 2015"""
+    emissions = calibrated_emissions(cp)
+    scenarios = []
+    for factor in np.linspace(0.5, 1.5, nscenarios):
+        scenario = emissions.copy()
+        scenario.loc[{"year": slice(2016, None)}] *= factor
+        scenarios.append(scenario)
+    return xr.concat(scenarios, dim="scenario").assign_coords(scenario=[f"s{i}" for i in range(nscenarios)])
+
+
+def write_rcmip_csv(path, nscenarios):
+    """
+        write a CSV in the format of the RCMIP emissions with `nscenarios` scenarios
+        and 5 regions, made from the bundled RCP4.5 emissions
+    """
+    values = rcp45_emissions().values[:, 1:]
+    # the RCMIP years start in 1750
+    values = np.concatenate([np.repeat(values[:1], 15, axis=0), values])
+    years = [str(year) for year in range(1750, 2501)]
+    variables = [f"Emissions|{specie.lstrip('|')}" for specie in _RCMIP_SPECIES]
+
+    rows = []
+    for i in range(nscenarios):
+        for region in ["World", "R5ASIA", "R5LAM", "R5MAF", "R5OECD"]:
+            for variable, column in zip(variables, values.T):
+                rows.append([f"scenario{i}", region, variable] + list(column * (1 + 0.01 * i)))
+    pd.DataFrame(rows, columns=["Scenario", "Region", "Variable"] + years).to_csv(path, index=False)
@@ -1,2 +1,52 @@
-from scmcoat.core import ClimateParams, FairModel
-from scmcoat import utils
\ No newline at end of file
+"""
+    scmcoat
+    October 16 2026
+
+    The public classes and submodules are imported on first use, through the
+    module `__getattr__`, so that `import scmcoat` does not pull in numpy,
+    pandas, xarray and fair until they are needed, e.g. by command line tools
+    and process-pool workers.
+"""
+import importlib
+# private, so that it is not listed next to the public names
+from typing import TYPE_CHECKING as _TYPE_CHECKING
+
+# public names and the modules that define them
+_LAZY_ATTRIBUTES = {
+    "ClimateParams": "scmcoat.core",
+    "FairModel": "scmcoat.core",
+    "EnsembleWriter": "scmcoat.writers",
+    "EnsembleSummary": "scmcoat.summary",
+    "LinearEmulator": "scmcoat.emulator",
+    "BatchServer": "scmcoat.server",
+    "BatchClient": "scmcoat.server",
+}
+
+_SUBMODULES = {"cache", "cli", "core", "emulator", "profiling", "selection", "server", "summary", "types", "utils",
+               "vectorized", "writers"}
+
+__all__ = sorted(_LAZY_ATTRIBUTES) + ["utils"]
+
+if _TYPE_CHECKING:
+    from scmcoat.core import ClimateParams, FairModel
+    from scmcoat.writers import EnsembleWriter
+    from scmcoat.summary import EnsembleSummary
+    from scmcoat.emulator import LinearEmulator
+    from scmcoat.server import BatchServer, BatchClient
+    from scmcoat import utils
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f"{__name__}.{name}")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # later lookups find it without calling __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | _SUBMODULES)
@@ -0,0 +1,5 @@
+import sys
+
+from scmcoat.cli import main
+
+sys.exit(main())
@@ -0,0 +1,183 @@
+"""
+    cache.py
+    October 16 2026
+
+    Content-addressed cache of FairModel run outputs.
+
+    Results are keyed on a hash of everything that determines them (emissions,
+    the resolved fair_scm arguments, the FaIR version and the engine), so the
+    same run requested from different places is only computed once.
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "disk_hits", "misses", "currsize", "nbytes"])
+
+# bump to invalidate disk caches when the outputs of the engines change
+_CACHE_FORMAT = 1
+
+
+class ResultCache:
+    """
+        Two-tier cache of FairModel run outputs: a least-recently-used memory tier
+        bounded in bytes, and an optional directory of .npz files shared between
+        processes.
+
+        Disk entries are written to a temporary file and renamed into place, so
+        concurrent processes only ever see complete entries; two processes computing
+        the same run both write the same result. Process-pool workers of
+        `FairModel.run_ensemble` get an empty memory tier and their own counters.
+
+        Parameters
+        ----------
+        max_bytes : int, optional
+            size limit of the memory tier. Entries larger than this are only kept on disk.
+        path : str, optional
+            directory of the disk tier. If `None`, only cache in memory.
+
+        Examples
+        --------
+        >>> fm = FairModel(cp, cache=ResultCache(path="~/.cache/scmcoat/results"))
+        >>> fm.run(emissions); fm.run(emissions)
+        >>> fm.cache.cache_info()
+        CacheInfo(hits=1, disk_hits=0, misses=1, currsize=1, nbytes=...)
+    """
+
+    def __init__(self, max_bytes=512 * 2**20, path=None):
+        self.max_bytes = max_bytes
+        self.path = None if path is None else os.path.expanduser(os.fspath(path))
+        self._memory = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"{type(self).__name__}(max_bytes={self.max_bytes}, path={self.path!r})"
+
+    def __getstate__(self):
+        # ship the configuration only, not the cached arrays
+        return {"max_bytes": self.max_bytes, "path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @staticmethod
+    def key(*parts):
+        """hex digest of `parts`: arrays, dicts and sequences of them, strings and numbers"""
+        digest = hashlib.sha256(str(_CACHE_FORMAT).encode())
+        _update_digest(digest, parts)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """cached outputs for `key`, or `None`. Counts a hit or a miss."""
+        with self._lock:
+            ret = self._memory.get(key)
+            if ret is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return _copy(ret)
+
+        ret = self._read(key)
+        with self._lock:
+            if ret is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+        self._remember(key, ret)
+        return _copy(ret)
+
+    def put(self, key, ret):
+        """cache the tuple of output arrays `ret` (entries may be `None`) under `key`"""
+        ret = _copy(ret)
+        self._remember(key, ret)
+        self._write(key, ret)
+
+    def cache_info(self):
+        """hits, disk hits, misses, number of entries and bytes of the memory tier"""
+        with self._lock:
+            return CacheInfo(self.hits, self.disk_hits, self.misses, len(self._memory), self._nbytes)
+
+    def clear(self, disk=False):
+        """empty the memory tier and reset the counters; also delete the disk tier if `disk`"""
+        with self._lock:
+            self._memory.clear()
+            self._nbytes = 0
+            self.hits = self.disk_hits = self.misses = 0
+        if disk and self.path is not None and os.path.isdir(self.path):
+            for fname in os.listdir(self.path):
+                if fname.endswith(".npz"):
+                    os.remove(os.path.join(self.path, fname))
+
+    def _remember(self, key, ret):
+        nbytes = _nbytes(ret)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = ret
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._nbytes -= _nbytes(evicted)
+
+    def _filename(self, key):
+        return os.path.join(self.path, f"{key}.npz")
+
+    def _read(self, key):
+        if self.path is None or not os.path.exists(self._filename(key)):
+            return None
+        try:
+            with np.load(self._filename(key), allow_pickle=False) as npz:
+                return tuple(npz[str(i)] if str(i) in npz.files else None for i in range(int(npz["length"])))
+        except (OSError, ValueError, KeyError):
+            return None  # unreadable entry: recompute it
+
+    def _write(self, key, ret):
+        if self.path is None:
+            return
+        arrays = {str(i): x for i, x in enumerate(ret) if x is not None}
+        tmp = f"{self._filename(key)}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            np.savez(tmp, length=len(ret), **arrays)
+            os.replace(tmp, self._filename(key))
+        except OSError:
+            pass  # read-only or full disk: keep the memory tier only
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def _update_digest(digest, part):
+    if isinstance(part, np.ndarray):
+        digest.update(f"ndarray{part.dtype.str}{part.shape}".encode())
+        digest.update(np.ascontiguousarray(part).tobytes())
+    elif isinstance(part, dict):
+        digest.update(f"dict{len(part)}".encode())
+        for name in sorted(part):
+            _update_digest(digest, name)
+            _update_digest(digest, part[name])
+    elif isinstance(part, (list, tuple)):
+        digest.update(f"seq{len(part)}".encode())
+        for item in part:
+            _update_digest(digest, item)
+    elif isinstance(part, np.generic):
+        _update_digest(digest, np.asarray(part))
+    else:
+        digest.update(f"{type(part).__name__}:{part!r};".encode())
+
+
+def _copy(ret):
+    return tuple(None if x is None else np.array(x) for x in ret)
+
+
+def _nbytes(ret):
+    return sum(x.nbytes for x in ret if x is not None)
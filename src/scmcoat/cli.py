@@ -0,0 +1,198 @@
+"""
+    cli.py
+    October 16 2026
+
+    The `scmcoat` command line.
+
+    `scmcoat run` sweeps scenarios x ClimateParams members through FairModel
+    with the vectorized engine and a process pool, appends every batch to a
+    chunked EnsembleWriter store, and prints the throughput and the time spent
+    in every stage. An interrupted sweep is resumed with `--resume`, which
+    skips the members already written.
+"""
+import argparse
+import importlib.util
+import os
+import shutil
+import sys
+from time import perf_counter
+
+
+def main(argv=None):
+    """entry point of the `scmcoat` console script"""
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+    return args.func(parser, args)
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog="scmcoat", description="FaIR ensembles with calibrated climate parameters")
+    commands = parser.add_subparsers(dest="command")
+
+    run = commands.add_parser(
+        "run", help="run scenarios x ensemble members to a chunked store",
+        description="Run every scenario with every selected ClimateParams member and append the results "
+                    "to a chunked store, printing the throughput when done.",
+    )
+    run.add_argument("scenarios", nargs="+",
+                     help="RCMIP scenario names (e.g. ssp245), or emissions files: CSV with a year column and a "
+                          "column per gas, or netCDF of a [year x gas] or [scenario x year x gas] DataArray")
+    run.add_argument("-o", "--output", required=True, help="store to write results to")
+    run.add_argument("--format", choices=["zarr", "netcdf"], default="zarr", help="store format (default: zarr)")
+    run.add_argument("--simids", default="all",
+                     help="members to run: 'all', or labels and inclusive ranges, e.g. '0-99,150,200-299'")
+    run.add_argument("--params", help="netCDF file of ClimateParams (default: the bundled FaIR v1.6.2 WG3 set)")
+    run.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1,
+                     help="number of worker processes (default: all CPUs)")
+    run.add_argument("--batch-size", type=int, default=256, help="members run at once by a worker (default: 256)")
+    run.add_argument("--engine", choices=["vectorized", "fair"], default="vectorized",
+                     help="FairModel engine (default: vectorized)")
+    run.add_argument("--outputs", nargs="+", default=["temperature"], help="output variables (default: temperature)")
+    run.add_argument("--end-year", type=int, help="last year to run (default: the last year of the emissions)")
+    run.add_argument("--dtype", help="floating point dtype to store, e.g. float32")
+    existing = run.add_mutually_exclusive_group()
+    existing.add_argument("--resume", action="store_true",
+                          help="continue an interrupted sweep, skipping members already in the store")
+    existing.add_argument("--overwrite", action="store_true", help="delete the store first, if it exists")
+    run.set_defaults(func=_run)
+    return parser
+
+
+def _run(parser, args):
+    """`scmcoat run`"""
+    import pandas as pd
+    import xarray as xr
+
+    from scmcoat.core import ClimateParams, FairModel, OUTPUT_VARIABLES
+    from scmcoat.profiling import RunStats
+    from scmcoat.utils import get_fairv1_climateparams
+    from scmcoat.writers import EnsembleWriter
+
+    for name in args.outputs:
+        if name not in OUTPUT_VARIABLES:
+            parser.error(f"unknown output variable {name!r}, expected some of {OUTPUT_VARIABLES}")
+    if args.format == "zarr" and importlib.util.find_spec("zarr") is None:
+        parser.error("zarr is not installed: install scmcoat[zarr], or pass --format netcdf")
+    writer = EnsembleWriter(args.output, format=args.format, dtype=args.dtype)
+    if writer.scenarios():
+        if args.overwrite:
+            shutil.rmtree(args.output)
+        elif not args.resume:
+            parser.error(f"{args.output} already holds results, pass --resume to continue or --overwrite")
+
+    params = (ClimateParams(params=xr.open_dataset(args.params)) if args.params
+              else get_fairv1_climateparams())
+    try:
+        simids = _parse_simids(args.simids, params.params["simulation"].values)
+        scenarios = _load_scenarios(args.scenarios, args.end_year)
+    except (KeyError, ValueError) as exc:
+        parser.error(str(exc))
+
+    stats = RunStats()
+    model = FairModel(params, engine=args.engine, stats=stats)
+    total_runs, total_seconds = 0, 0.0
+    for emissions in _stack_by_years(scenarios):
+        labels = [str(label) for label in emissions["scenario"].values]
+        done = set.intersection(*[writer.written(label) for label in labels])
+        todo = [simid for simid in simids if simid not in done]
+
+        start = perf_counter()
+        if todo:
+            model.run_ensemble(emissions, simids=todo, workers=args.workers, batch_size=args.batch_size,
+                               outputs=args.outputs, writer=writer)
+        seconds = perf_counter() - start
+        runs = len(todo) * len(labels)
+        total_runs += runs
+        total_seconds += seconds
+        print(f"{', '.join(labels)}: {len(simids)} members, {len(simids) - len(todo)} already written, "
+              f"{_throughput(runs, seconds)}")
+
+    print(f"total: {_throughput(total_runs, total_seconds)} to {args.output}")
+    if stats.stages:
+        print("time per stage:")
+        with pd.option_context("display.width", 120):
+            print(stats.summary()[["calls", "total_s", "mean_s", "max_s"]].to_string(float_format="{:.4g}".format))
+    return 0
+
+
+def _throughput(runs, seconds):
+    rate = runs / seconds if seconds > 0 else float("nan")
+    return f"{runs} runs in {seconds:.2f} s ({rate:.1f} runs/s)"
+
+
+def _parse_simids(selection, labels):
+    """the `labels` picked by a selection such as "all" or "0-99,150" (inclusive ranges), in order"""
+    if selection.strip().lower() == "all":
+        return list(labels)
+    picked = set()
+    for part in selection.split(","):
+        part = part.strip()
+        first, sep, last = part.partition("-")
+        try:
+            if sep:
+                first, last = int(first), int(last)
+                picked.update(label for label in labels if first <= label <= last)
+            else:
+                label = int(part)
+                if label not in labels:
+                    raise KeyError(f"no member {label} in the ClimateParams")
+                picked.add(label)
+        except ValueError:
+            raise ValueError(f"can't read the member selection {part!r}") from None
+    if not picked:
+        raise ValueError(f"no members selected by {selection!r}")
+    return [label for label in labels if label in picked]
+
+
+def _load_scenarios(names, end_year=None):
+    """{label: emissions [year x gas]} of RCMIP scenario names and emissions files, labelled by file name"""
+    import pandas as pd
+    import xarray as xr
+
+    from scmcoat.core import EMISSIONS_COLUMNS, _prepare_emissions
+    from scmcoat.utils import rcmip_emissions
+
+    scenarios = {}
+    rcmip = []
+    for name in names:
+        if not os.path.exists(name):
+            rcmip.append(name)
+            continue
+        label = os.path.splitext(os.path.basename(name))[0]
+        if name.endswith(".csv"):
+            emissions = _prepare_emissions(pd.read_csv(name))
+        else:
+            with xr.open_dataarray(name) as da:
+                emissions = _prepare_emissions(da.load())
+        if emissions.scenario is None:
+            scenarios[label] = (emissions.years, emissions.values)
+        else:
+            for scenario, values in zip(emissions.scenario, emissions.values):
+                scenarios[f"{label}-{scenario}"] = (emissions.years, values)
+    if rcmip:
+        emissions = _prepare_emissions(rcmip_emissions(rcmip))
+        for scenario, values in zip(rcmip, emissions.values):
+            scenarios[scenario] = (emissions.years, values)
+
+    ret = {}
+    for label, (years, values) in scenarios.items():
+        da = xr.DataArray(values, dims=["year", "gas"], coords={"year": years, "gas": EMISSIONS_COLUMNS})
+        ret[label] = da if end_year is None else da.sel(year=slice(None, end_year))
+    return ret
+
+
+def _stack_by_years(scenarios):
+    """[scenario x year x gas] emissions of the scenarios that share their years, one per set of years"""
+    import xarray as xr
+
+    groups = {}
+    for label, da in scenarios.items():
+        groups.setdefault(tuple(da["year"].values.tolist()), []).append(da.expand_dims(scenario=[label]))
+    return [xr.concat(group, dim="scenario") for group in groups.values()]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
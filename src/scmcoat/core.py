@@ -5,10 +5,23 @@
     functions to run FaIR simple climate model given emissions
 """
 
+import os
+import copy
+import inspect
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import cached_property, wraps
+
 import numpy as np
+import pandas as pd
 import xarray as xr
 import fair
-from dataclasses import dataclass
+from fair.constants import molwt
+
+# debug messages of FairModel(debug=True)
+logger = logging.getLogger(__name__)
 
 
 FAIR_EMISSIONS_GASES = ['CO2_Fossil',
@@ -52,6 +65,190 @@ FAIR_EMISSIONS_GASES = ['CO2_Fossil',
                 'CH3Cl' ]
 
 
+# columns of FaIR emissions arrays: the year, then the FAIR_EMISSIONS_GASES
+EMISSIONS_COLUMNS = ["year"] + FAIR_EMISSIONS_GASES
+
+# gases in the `concentration` response of FairModel
+FAIR_CONCENTRATION_GASES = [
+    "co2",
+    "ch4",
+    "n2o",
+    "cf4",
+    "c2f6",
+    "c6f14",
+    "hfc23",
+    "hfc32",
+    "hfc43_10",
+    "hfc125",
+    "hfc134a",
+    "hfc143a",
+    "hfc227ea",
+    "hfc245fa",
+    "sf6",
+    "cfc11",
+    "cfc12",
+    "cfc113",
+    "cfc114",
+    "cfc115",
+    "carb_tet",
+    "mcf",
+    "hcfc22",
+    "hcfc141b",
+    "hcfc142b",
+    "halon1211",
+    "halon1202",
+    "halon1301",
+    "halon2402",
+    "ch3br",
+    "ch3cl",
+]
+
+# `forcing_type` of the 13 forcing outputs of FaIR without AR6 diagnostics
+FAIR_FORCING_TYPES = [
+    "CO2", "CH4", "N2O",
+    "Minor GHGs (CFCs, HFCs etc)",
+    "Tropospheric ozone",
+    "Stratospheric ozone",
+    "Stratospheric water vapour from methane oxidation",
+    "Contrails",
+    "Aerosols",
+    "Black carbon on snow",
+    "Land use",
+    "Volcanic",
+    "Solar",
+]
+
+# emissions column and conversion from Gt of the gas to FaIR emissions units, for FairModel.run_pulse
+PULSE_GASES = {
+    "CO2": (1, molwt.C / molwt.CO2),  # GtC
+    "CH4": (3, 1000.0),  # Mt CH4
+    "N2O": (4, 1000.0 * molwt.N2 / molwt.N2O),  # Mt N2
+}
+
+# data variables of the FairModel.run response
+OUTPUT_VARIABLES = ("concentration", "forcing", "temperature", "ocean_heat_content")
+
+# quantiles reported by ensemble statistics
+DEFAULT_QUANTILES = (0.05, 0.17, 0.5, 0.83, 0.95)
+
+
+# ClimateParams data variables that FairModel passes on to fair_scm as arguments
+FAIR_PARAMS_ARGS = [
+    "C_pi",
+    "F2x",
+    "r0",
+    "rt",
+    "rc",
+    "scale",
+    "b_aero",
+    "ghan_params",
+    "ozone_feedback",
+    "b_tro3",
+    "aCO2land",
+    "stwv_from_ch4",
+    "F_ref_BC",
+    "E_ref_BC",
+    "lambda_global",
+    "deep_ocean_efficacy",
+    "ocean_heat_capacity",
+    "ocean_heat_exchange",
+]
+
+# fair_scm arguments of calibrated CO2-only runs
+CO2_ONLY_ARGS = [
+    "C_pi",
+    "F2x",
+    "r0",
+    "rt",
+    "rc",
+    "lambda_global",
+    "deep_ocean_efficacy",
+    "ocean_heat_capacity",
+    "ocean_heat_exchange",
+]
+
+
+@dataclass
+class CompiledParams:
+    """
+        ClimateParams as NumPy arguments for fair_scm, aligned to an emissions time
+        axis of `nt` years from `start_year`.
+
+        `members` holds struct-of-arrays with a leading member axis, in the order of
+        `simulation`; `shared` holds arguments common to all members; `median` holds
+        the arguments of the median parameters.
+    """
+    simulation: np.ndarray
+    start_year: int
+    nt: int
+    members: dict
+    shared: dict
+    median: dict
+
+    def __post_init__(self):
+        self._positions = {label: i for i, label in enumerate(self.simulation.tolist())}
+
+    def __len__(self):
+        return len(self.simulation)
+
+    @classmethod
+    def from_dataset(cls, params, years):
+        """compile a ClimateParams.params Dataset for emissions of the consecutive `years`"""
+        members, shared = {}, {}
+        for name in FAIR_PARAMS_ARGS:
+            da = params[name]
+            if "simulation" in da.dims:
+                members[name] = np.ascontiguousarray(da.transpose("simulation", ...).values, dtype=float)
+            else:
+                shared[name] = np.asarray(da.values, dtype=float)
+
+        def member_first(name):
+            da = params[name]
+            if "simulation" in da.dims:
+                da = da.transpose("simulation", ...)
+            return da.values
+
+        F_solar, F_volcanic, natural = _natural_forcing(
+            member_first("F_solar"), member_first("F_volcanic"), member_first("natural"), years)
+        for name, x in [("F_solar", F_solar), ("F_volcanic", F_volcanic), ("natural", natural)]:
+            if "simulation" in params[name].dims:
+                members[name] = x
+            else:
+                shared[name] = x
+
+        # median over members of every argument, as in ClimateParams.median_params
+        median = {name: np.median(x, axis=0) for name, x in members.items()}
+        median.update(shared)
+
+        return cls(simulation=params["simulation"].values, start_year=int(years[0]), nt=len(years), members=members,
+                   shared=shared, median=median)
+
+    def index(self, simid):
+        """integer position of the `simulation` label `simid`"""
+        try:
+            return self._positions[simid]
+        except KeyError:
+            raise KeyError(f"simulation {simid!r} is not in the ClimateParams") from None
+
+    def bundle(self, index):
+        """
+            fair_scm arguments of the member at integer position `index`, or of the
+            median parameters if `index` is "median"
+        """
+        if isinstance(index, str) and index == "median":
+            return dict(self.median)
+        args = {name: x[index] for name, x in self.members.items()}
+        args.update(self.shared)
+        return args
+
+    def batch(self, indices):
+        """fair_scm arguments of the members at integer positions `indices`, member axis first"""
+        indices = np.asarray(indices)
+        args = {name: x[indices] for name, x in self.members.items()}
+        args.update(self.shared)
+        return args
+
+
 #TODO: require specific climate param settings for FaIR?
 #  This current set up has a lot of specificity in that
 #  running FaIR expects very specific data variables in the 
@@ -62,17 +259,25 @@ class ClimateParams:
         Currently, the setup of FairModel expects that ClimateParams.params
         is from the xr.Dataset of the AR6 JSON
         file containing FaIR climate parameters used in the report. The
-        arguments with time dimensions are all of length 751 (reference year
-        1750).
-        TODO point to the param processing and creation of netcdf file.
+        arguments with time dimensions start in 1750.
+        `scmcoat.utils.get_fairv1_climateparams` builds this Dataset from the
+        WG3 parameter set bundled with the package.
+
+        `median_params` and `compile` are cached, so `params` should not be
+        modified in place after they are first used.
+
+        `weights`, if set, weight the members in ensemble statistics, e.g. of a
+        representative subset chosen by `select_representative`.
     """
     params: xr.Dataset
+    weights: xr.DataArray = None
+    _compiled: dict = field(default_factory=dict, init=False, repr=False, compare=False)
 
-    @property
+    @cached_property
     def median_params(self):
         
         # drop string arguments
-        pdropped = self.params.drop(["ghg_forcing","tropO3_forcing"])
+        pdropped = self.params.drop_vars(["ghg_forcing","tropO3_forcing"])
         # take the median of numerical args
         pmedian = pdropped.median(dim="simulation")
         # add string args back to dataset
@@ -81,17 +286,174 @@ class ClimateParams:
         
         return pmedian
 
+    def compile(self, years):
+        """
+            CompiledParams of these parameters for emissions of the consecutive
+            `years`, compiled once per time axis.
+        """
+        key = (int(years[0]), len(years))
+        if key not in self._compiled:
+            self._compiled[key] = CompiledParams.from_dataset(self.params, years)
+        return self._compiled[key]
+
+    def select_representative(self, n, reference=None, quantiles=DEFAULT_QUANTILES):
+        """
+            A weighted ClimateParams of `n` members that stands in for these, see
+            `scmcoat.selection.select_representative`.
+        """
+        from .selection import select_representative
+
+        return select_representative(self, n, reference=reference, quantiles=quantiles)
+
+    def member_weights(self, simids):
+        """`weights` of the members `simids`, or None if the members are unweighted"""
+        if self.weights is None:
+            return None
+        return self.weights.sel(simulation=list(simids)).values
+
+@dataclass
+class FairResult:
+    """
+        Raw NumPy outputs of a FairModel run, without any xarray construction.
+
+        Variables that were not requested, or that FaIR does not return in the
+        chosen mode, are `None`. If `simulation` is array-like, arrays have a
+        leading `simulation` axis, preceded by a `scenario` axis if `scenario` is
+        given.
+    """
+    year: np.ndarray
+    simulation: object
+    concentration: np.ndarray = None
+    forcing: np.ndarray = None
+    temperature: np.ndarray = None
+    ocean_heat_content: np.ndarray = None
+    scenario: np.ndarray = None
+
+    def to_dataset(self):
+        """the xr.Dataset response of FairModel.run"""
+        batched = np.ndim(self.simulation) > 0
+        sim_dims = ["simulation"] if batched else []
+        coords = {"year": self.year}
+        if batched:
+            coords["simulation"] = np.asarray(self.simulation)
+        if self.scenario is not None:
+            sim_dims = ["scenario"] + sim_dims
+            coords["scenario"] = np.asarray(self.scenario)
+
+        data_vars = {}
+        if self.concentration is not None:
+            if self.concentration.ndim > len(sim_dims) + 1:
+                data_vars["concentration"] = (sim_dims + ["year", "gas"], self.concentration)
+                coords["gas"] = FAIR_CONCENTRATION_GASES
+            else:
+                data_vars["concentration"] = (sim_dims + ["year"], self.concentration)
+        if self.forcing is not None:
+            if self.forcing.ndim > len(sim_dims) + 1:
+                data_vars["forcing"] = (sim_dims + ["year", "forcing_type"], self.forcing)
+                nforcing = self.forcing.shape[-1]
+                coords["forcing_type"] = FAIR_FORCING_TYPES if nforcing == 13 else np.arange(0, nforcing)
+            else:
+                data_vars["forcing"] = (sim_dims + ["year"], self.forcing)
+        for name in ["temperature", "ocean_heat_content"]:
+            if getattr(self, name) is not None:
+                data_vars[name] = (sim_dims + ["year"], getattr(self, name))
+
+        response_ds = xr.Dataset(data_vars, coords=coords)
+        if not batched:
+            response_ds["simulation"] = self.simulation
+        return response_ds
+
+    def _with_simulation_axis(self):
+        axis = 0 if self.scenario is None else 1
+        arrays = {name: None if getattr(self, name) is None else np.expand_dims(getattr(self, name), axis)
+                  for name in OUTPUT_VARIABLES}
+        return type(self)(year=self.year, simulation=np.atleast_1d(self.simulation), scenario=self.scenario,
+                          **arrays)
+
+    @classmethod
+    def concat(cls, results):
+        """join results of batches of members along the `simulation` axis"""
+        if not results:
+            raise ValueError("no results to concatenate")
+        # single runs have no simulation axis yet
+        results = [r if np.ndim(r.simulation) > 0 else r._with_simulation_axis() for r in results]
+        scenario = results[0].scenario
+        axis = 0 if scenario is None else 1
+        kwargs = {}
+        for name in OUTPUT_VARIABLES:
+            arrays = [getattr(r, name) for r in results]
+            kwargs[name] = None if arrays[0] is None else np.concatenate(arrays, axis=axis)
+        simulation = np.concatenate([np.atleast_1d(r.simulation) for r in results])
+        return cls(year=results[0].year, simulation=simulation, scenario=scenario, **kwargs)
+
+
+def _check_outputs(outputs):
+    """validated tuple of requested FairModel.run output variables"""
+    if outputs is None:
+        return OUTPUT_VARIABLES
+    if isinstance(outputs, str):
+        outputs = (outputs,)
+    unknown = set(outputs) - set(OUTPUT_VARIABLES)
+    if unknown:
+        raise ValueError(f"unknown outputs {sorted(unknown)}, expecting some of {OUTPUT_VARIABLES}")
+    return tuple(outputs)
+
+
+def _select_outputs(ret, outputs):
+    """requested outputs of a fair_scm-like return tuple, by variable name"""
+    # TODO generalize somehow?
+    if len(ret) == 3:
+        C, F, T = ret
+        ohc = None
+    elif len(ret) == 7:
+        C, F, T, ariaci, lambda_eff, ohc, heatflux = ret
+    else:
+        raise NotImplementedError(f"FaIR output unrecognized. Expecting length of 3 or 7, got {len(ret)}")
+    arrays = dict(concentration=C, forcing=F, temperature=T, ocean_heat_content=ohc)
+    return {name: arrays[name] for name in outputs}
+
+
+def _counts_run(method):
+    """
+        count calls of a FairModel method as runs of its RunStats, if any: one run
+        per member of the `simids` of batch methods
+    """
+    names = list(inspect.signature(method).parameters)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.stats is None:
+            return method(self, *args, **kwargs)
+        n = 1
+        if "simids" in names:
+            n = len(kwargs["simids"] if "simids" in kwargs else args[names.index("simids") - 1])
+        with self.stats.run(n):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class FairModel:
     """
         implementation of the ClimateModel Protocol
     """
     
-    def __init__(self, params=None, debug=False):
+    def __init__(self, params=None, debug=False, engine="fair", cache=None, stats=None):
+        if engine not in ("fair", "vectorized"):
+            raise ValueError(f"engine must be 'fair' or 'vectorized', got {engine!r}")
         self.params = params
         self.simid = "default"
         self.debug = debug
+        self.engine = engine
+        # opt-in scmcoat.cache.ResultCache of run outputs
+        if cache is True:
+            from .cache import ResultCache
+            cache = ResultCache()
+        self.cache = cache or None
+        # opt-in scmcoat.profiling.RunStats of the stages of runs
+        self.stats = stats
     def __repr__(self):
-        return f"{type(self).__name__}(params={self.params!r}, simid={self.simid})"
+        return (f"{type(self).__name__}(params={self.params!r}, simid={self.simid}, engine={self.engine!r}, "
+                f"cache={self.cache!r}, stats={self.stats!r})")
     
     def get_list_of_concentration_gases(self):
         """
@@ -100,269 +462,1024 @@ class FairModel:
             
             TODO remove getter. Access the attribute directly
         """
-        conc_gas_species_names = [
-            "co2",
-            "ch4",
-            "n2o",
-            "cf4",
-            "c2f6",
-            "c6f14",
-            "hfc23",
-            "hfc32",
-            "hfc43_10",
-            "hfc125",
-            "hfc134a",
-            "hfc143a",
-            "hfc227ea",
-            "hfc245fa",
-            "sf6",
-            "cfc11",
-            "cfc12",
-            "cfc113",
-            "cfc114",
-            "cfc115",
-            "carb_tet",
-            "mcf",
-            "hcfc22",
-            "hcfc141b",
-            "hcfc142b",
-            "halon1211",
-            "halon1202",
-            "halon1301",
-            "halon2402",
-            "ch3br",
-            "ch3cl",
-        ]
+        conc_gas_species_names = list(FAIR_CONCENTRATION_GASES)
         return conc_gas_species_names
 
 
-    def _run(self, emiss, useMultigas=True):
+    def _run(self, emiss, years, simid, useMultigas=True, outputs=None, conc=None, other_rf=None):
 
         # === move next block to utils?
         if self.params is None:
 
+            if self.engine == "vectorized":
+                raise NotImplementedError(
+                    "the vectorized engine only runs with ClimateParams. Use engine='fair' for default FaIR settings")
             if self.debug:
-                print(f"Running default FaIR, v{fair.__version__}")
+                logger.debug("Running default FaIR, v%s", fair.__version__)
+            if emiss.ndim == 3:
+                return _stack_outputs([self._run(e, years, simid, useMultigas, outputs, conc, other_rf)
+                                       for e in emiss])
             # ignore simid
-            ret = fair.forward.fair_scm(emissions=emiss, useMultigas=useMultigas)
-            return ret
+            if not useMultigas:
+                co2 = _co2_emissions(emiss)
+                return self._cached(
+                    lambda: fair.forward.fair_scm(emissions=co2, useMultigas=False, other_rf=other_rf),
+                    co2, other_rf, "default", useMultigas)
+            if conc is None:
+                return self._cached(lambda: fair.forward.fair_scm(emissions=emiss, useMultigas=useMultigas),
+                                    emiss, "default", useMultigas)
+            return self._cached(
+                lambda: fair.forward.fair_scm(emissions=emiss, emissions_driven=False, C=conc, useMultigas=useMultigas),
+                emiss, conc, "default", useMultigas)
         else:
-            if self.simid == "default":
-                if self.debug:
-                    print("ClimateParams are not None and simid='default'. Running with median_params.")
-                    
-                self.simid = "median"
-                
-            if self.simid == "median":
-                args = self.params.median_params
-            else:
-                args = self.params.params.sel(simulation=self.simid)
+            with self._stage("params"):
+                args = self.get_args(simid, years)
             if self.debug:
-                print(f"Running FaIR, v{fair.__version__}. simid: {self.simid}")
+                logger.debug("Running FaIR, v%s. simid: %s. engine: %s", fair.__version__, simid, self.engine)
         # ===
         
             if not useMultigas:
-                raise NotImplementedError("can't run in CO2-only mode with args @@@@for now")
-
-            # default time dimensions for different versions of FaIR v1.*
-            # TODO generalize time dim. 
-            # TODO test different length of emissions time series
-            if emiss.shape[0] == 736:
-                reference_year = 1765
-
-                nt = 736 
-                F_solar = np.zeros(nt)
-                F_volcanic = np.zeros(nt)
-                natural = np.zeros((nt, 2))
-                F_solar[:346] = args["F_solar"][15:]
-                F_volcanic[:346] = args["F_volcanic"][15:]
-                natural[:346, :] = args["natural"][15:, :]
-                natural[346:, :] = args["natural"][
-                    -1, :
-                ]  # hold the last element constant for the rest of the array
-            elif emiss.shape[0] == 751:
-                reference_year = 1750
-
-                nt = 751 
-                F_solar = np.zeros(nt)
-                F_volcanic = np.zeros(nt)
-                natural = np.zeros((nt, 2))
-                F_solar[:361] = args["F_solar"]
-                F_volcanic[:361] = args["F_volcanic"]
-                natural[:361, :] = args["natural"]
-                natural[361:, :] = args["natural"][
-                    -1, :
-                ]  # hold the last element constant for the rest of the array
-            else:
-                raise NotImplementedError("Unable to handle emissions other than lengths 736 or 751")
-
-            C, F, T, ariaci, lambda_eff, ohc, heatflux = fair.forward.fair_scm(
-                emissions=emiss,
-                emissions_driven=True,
-                C_pi=args["C_pi"].values,  
-                natural=natural,
-                F_volcanic=F_volcanic,  
-                F_solar=F_solar,
-                F2x=args["F2x"].values,
-                r0=args["r0"].values,
-                rt=args["rt"].values,
-                rc=args["rc"].values,
-                ariaci_out=True,
-                ghg_forcing="Meinshausen",
-                scale=np.asarray(args["scale"].values),
-                aerosol_forcing="aerocom+ghan2",
-                b_aero=np.asarray(args["b_aero"].values),
-                ghan_params=np.asarray(args["ghan_params"].values),
-                tropO3_forcing="thorhnill+skeie", 
-                ozone_feedback=args["ozone_feedback"].values,
-                b_tro3=np.array(args["b_tro3"].values),
-                E_pi=emiss[0, :],
-                scaleAerosolAR5=False,
-                scaleHistoricalAR5=False,
-                fixPre1850RCP=False,
-                aviNOx_frac=0,
-                aCO2land=args["aCO2land"].values,
-                stwv_from_ch4=args["stwv_from_ch4"].values,
-                F_ref_BC=args["F_ref_BC"].values,
-                E_ref_BC=args["E_ref_BC"].values,
-                efficacy=np.ones(45),
-                diagnostics="AR6",
-                temperature_function="Geoffroy",
-                lambda_global=args[
-                    "lambda_global"
-                ].values,  # this and the below only used in two-layer model
-                deep_ocean_efficacy=args["deep_ocean_efficacy"].values,
-                ocean_heat_capacity=np.asarray(args["ocean_heat_capacity"].values),
-                ocean_heat_exchange=args["ocean_heat_exchange"].values,
-            )
+                if conc is not None:
+                    raise NotImplementedError("concentration-driven runs are only implemented in multi-gas mode")
+                co2 = _co2_emissions(emiss)
+                args = _co2_only_args(args)
+                return self._cached(lambda: self._run_co2_only(co2, args, other_rf, outputs),
+                                    co2, args, other_rf, self.engine, outputs)
+
+            # concentrations only enter the key of concentration-driven runs
+            conc_key = () if conc is None else (conc,)
+            if self.engine == "vectorized":
+                return self._cached(lambda: self._run_with_args(emiss, args, outputs, conc),
+                                    emiss, args, self.engine, outputs, *conc_key)
+            # fair_scm always returns every output
+            return self._cached(lambda: self._run_with_args(emiss, args, conc=conc),
+                                emiss, args, self.engine, *conc_key)
 
-            return C, F, T, ariaci, lambda_eff, ohc, heatflux
+    def _run_with_args(self, emiss, args, outputs=None, conc=None):
+        """
+            Run the calibrated FaIR configuration with the fair_scm arguments `args`,
+            concentration-driven if concentrations `conc` are given. Emissions
+            [scenario x year x gas] give outputs with a leading scenario axis.
+        """
+        if self.engine == "vectorized":
+            # the vectorized engine steps all scenarios at once, as copies of the member
+            nscen = emiss.shape[0] if emiss.ndim == 3 else 1
+            ret = self._run_vectorized(emiss, _repeat_member(args, nscen), outputs=outputs, concentrations=conc)
+            # single member: drop the member axis
+            return ret if emiss.ndim == 3 else tuple(None if x is None else x[0] for x in ret)
+        if emiss.ndim == 3:
+            return _stack_outputs([self._run_with_args(e, args, conc=conc) for e in emiss])
+
+        C, F, T, ariaci, lambda_eff, ohc, heatflux = fair.forward.fair_scm(
+            emissions=emiss,
+            emissions_driven=conc is None,
+            C=conc,
+            ariaci_out=True,
+            ghg_forcing="Meinshausen",
+            aerosol_forcing="aerocom+ghan2",
+            tropO3_forcing="thorhnill+skeie", 
+            E_pi=emiss[0, :],
+            scaleAerosolAR5=False,
+            scaleHistoricalAR5=False,
+            fixPre1850RCP=False,
+            aviNOx_frac=0,
+            efficacy=np.ones(45),
+            diagnostics="AR6",
+            temperature_function="Geoffroy",
+            **args,
+        )
+
+        return C, F, T, ariaci, lambda_eff, ohc, heatflux
+
+    def _run_co2_only(self, co2, args, other_rf, outputs=None):
+        """
+            Run calibrated CO2-only FaIR for CO2 emissions `co2` and non-CO2 forcing
+            `other_rf`, with the arguments `args` of `_co2_only_args`. Batches of
+            members have a leading member axis with the vectorized engine.
+        """
+        if self.engine == "vectorized":
+            from .vectorized import fair_scm_co2_vectorized
+
+            batched = np.ndim(args["F2x"]) > 0 or co2.ndim == 2
+            if np.ndim(args["F2x"]) == 0:
+                # one member, under one or several scenarios
+                args = _repeat_member(args, co2.shape[0] if co2.ndim == 2 else 1)
+            # CO2 is the first gas of C_pi, which may be shared by all members
+            C_pi = np.asarray(args["C_pi"])[..., 0]
+            ret = fair_scm_co2_vectorized(co2, other_rf, outputs=outputs, **dict(args, C_pi=C_pi))
+            # single run: drop the member axis
+            return ret if batched else tuple(None if x is None else x[0] for x in ret)
+        if co2.ndim == 2:
+            return _stack_outputs([self._run_co2_only(e, args, other_rf) for e in co2])
+
+        # fair_scm has no aerosol forcing to break down in CO2-only mode
+        C, F, T, lambda_eff, ohc, heatflux = fair.forward.fair_scm(
+            emissions=co2,
+            useMultigas=False,
+            other_rf=other_rf,
+            temperature_function="Geoffroy",
+            **args,
+        )
+        return C, F, T, None, lambda_eff, ohc, heatflux
+
+    def _run_vectorized(self, emiss, args, outputs=None, E_pi=None, **kwargs):
+        """
+            Run `scmcoat.vectorized.fair_scm_vectorized` for a batch of fair_scm
+            arguments (see `CompiledParams.batch`). Outputs have a leading member axis.
+            Only the FairModel.run `outputs` are kept. `E_pi` defaults to the first
+            year of `emiss`, which may have a leading member axis; `kwargs` holds
+            `restart_in`/`restart_out` or `concentrations`.
+        """
+        from .vectorized import fair_scm_vectorized
+
+        if E_pi is None:
+            E_pi = emiss[..., 0, :]
+        return fair_scm_vectorized(emissions=emiss, E_pi=E_pi, outputs=outputs, **args, **kwargs)
+
+    def _cached(self, compute, *key):
+        """
+            `compute()`, looked up in and added to `self.cache` under a hash of `key`
+            and the FaIR version.
+        """
+        if self.cache is None:
+            with self._stage("model"):
+                return compute()
+        with self._stage("cache"):
+            digest = self.cache.key(fair.__version__, *key)
+            ret = self.cache.get(digest)
+        if ret is not None:
+            if self.debug:
+                logger.debug("Using cached FaIR outputs %s", digest[:12])
+            return ret
+        with self._stage("model"):
+            ret = compute()
+        with self._stage("cache"):
+            self.cache.put(digest, ret)
+        return ret
+
+    def _stage(self, name):
+        """context timing the stage `name` of a run in `self.stats`, if any"""
+        if self.stats is None:
+            return nullcontext()
+        return self.stats.stage(name)
+
+    def get_args(self, simid, years):
+        """
+            NumPy fair_scm arguments from the ClimateParams for `simid` ("median" or a
+            `simulation` label) and emissions of the consecutive `years`.
+        """
+        compiled = self.params.compile(years)
+        if isinstance(simid, str) and simid == "median":
+            return compiled.bundle("median")
+        return compiled.bundle(compiled.index(simid))
     
-    def run(self, emissda, simid=None, emissions_driven=True, useMultigas=True):#, return_xr=True):
+    @_counts_run
+    def run(self, emissda, simid=None, emissions_driven=True, useMultigas=True, outputs=None, return_xr=True,
+            concentrations=None, other_rf=None):
         """
-            Run installed version of FaIR (so far tested on FaIR v1.*) in emissions-driven mode.
+            Run installed version of FaIR (so far tested on FaIR v1.*) in emissions-driven
+            or concentration-driven mode.
 
             Parameters
             ----------
             emiss : scmwrap.types.Emissions
                 xarray DataArray of emissions with dims [year x gas] where shape is [nt x 40].
+                Runs cover the consecutive years of its `year` coordinate (or of the
+                "year" column of other array-likes), which with ClimateParams must
+                start in 1750 or later; e.g. select years up to 2100 to stop there.
+                Gases are put in the order of `EMISSIONS_COLUMNS` by their labels, if
+                labelled. Emissions [scenario x year x gas] (or a DataFrame with a
+                `scenario` column or index level) run every scenario in one call, with
+                the parameters resolved once, and add a `scenario` dimension to the
+                outputs.
             args : scmwrap.types.ClimateParams, optional
                 Contains climate parameters. If `None`, run with default FaIR settings.
+            emissions_driven : bool, optional
+                if False, prescribe `concentrations` instead of running the carbon and
+                gas cycles. Emissions then only drive aerosols, ozone, black carbon on
+                snow and land use forcing.
             useMultigas : bool, optional
                 specifies whether to run FaIR in CO2-only (False) or multi-gas (True) mode.
+                CO2-only runs use the CO2 columns of the emissions, the carbon cycle,
+                F2x (scaled like CO2 forcing) and ocean parameters of the ClimateParams,
+                and `other_rf` for all other forcing. They return CO2 concentrations and
+                total forcing.
+            outputs : sequence of str, optional
+                response variables to return, some of "concentration", "forcing",
+                "temperature" and "ocean_heat_content". If `None`, return all of them.
+                With the vectorized engine, variables not asked for are never stored.
+            return_xr : bool, optional
+                if False, skip the xarray construction and return a `FairResult` of
+                NumPy arrays.
+            concentrations : xarray.DataArray or pandas.DataFrame, optional
+                concentrations with dims [year x gas] of the `FAIR_CONCENTRATION_GASES`
+                (in that order unless labelled), for the years of the emissions.
+                Required with `emissions_driven=False`.
+            other_rf : xarray.DataArray or np.ndarray, optional
+                non-CO2 forcing (W m-2) of CO2-only runs, with dims [year] or
+                [simulation x year], e.g. from `FairModel.non_co2_forcing`. Zero if `None`.
 
             Returns
             -------
-            xarray.Dataset
+            xarray.Dataset or FairResult
 
         """
-
-        if not emissions_driven:
-            raise NotImplementedError("concentration-driven is not implemented yet")
-            
         if simid is not None:
             self.simid = simid
+        self.simid = self._resolve_simid(self.simid)
+        return self._run_member(emissda, self.simid, emissions_driven=emissions_driven, useMultigas=useMultigas,
+                                outputs=outputs, return_xr=return_xr, concentrations=concentrations,
+                                other_rf=other_rf)
+
+    def _resolve_simid(self, simid):
+        """the member that `simid` runs: "median" for "default" with ClimateParams"""
+        if self.params is not None and isinstance(simid, str) and simid == "default":
+            if self.debug:
+                logger.debug("ClimateParams are not None and simid='default'. Running with median_params.")
+            return "median"
+        return simid
+
+    @_counts_run
+    def _run_member(self, emissda, simid, emissions_driven=True, useMultigas=True, outputs=None, return_xr=True,
+                    concentrations=None, other_rf=None):
+        """
+            `FairModel.run` of the member `simid`, without making it the default
+            member of the model, for batched and shared runs.
+        """
+        _check_driving_mode(emissions_driven, concentrations)
+        simid = self._resolve_simid(simid)
+
+        with self._stage("prepare"):
+            outputs = _check_outputs(outputs)
             
-        ## TODO add validate func to enforce the order of gas dimension of the emissions object
-        emiss = emissda.copy()
+            # FaIR does not modify its emissions input, so there is no need to copy it
+            emissions = _prepare_emissions(emissda)
+            emiss, years = emissions.values, emissions.years
+            conc = None if emissions_driven else _concentrations_array(concentrations, years)
+            other = None if useMultigas else _other_rf_array(other_rf, years, simid)
+            if other is not None and other.ndim != 1:
+                raise ValueError("other_rf of a single run should be [year], or labelled by simulation")
+
+        ret = self._run(emiss=emiss, 
+                        years=years,
+                        simid=simid,
+                        useMultigas=useMultigas,
+                        outputs=outputs,
+                        conc=conc,
+                        other_rf=other)
+
+        with self._stage("output"):
+            result = FairResult(year=years, simulation=simid, scenario=emissions.scenario,
+                                **_select_outputs(ret, outputs))
+            if not return_xr:
+                return result
         
-        # default time dimensions for different versions of FaIR v1.*
-        # TODO check if other time dimensions work
-        if emiss.shape[0] == 736:
-            reference_year = 1765   
-        elif emiss.shape[0] == 751:
-            reference_year = 1750
+            # TODO Add attributes
+
+            return result.to_dataset()
+
+    @_counts_run
+    def _run_batch(self, emissda, simids, emissions_driven=True, useMultigas=True, outputs=None,
+                   concentrations=None, other_rf=None):
+        """
+            Run a batch of ClimateParams members. Returns a FairResult with a
+            `simulation` axis, preceded by `scenario` for emissions with scenarios.
+        """
+        outputs = _check_outputs(outputs)
+        with self._stage("prepare"):
+            emissions = _prepare_emissions(emissda)
+        if self.engine != "vectorized" or not (useMultigas or emissions_driven):
+            results = [self._run_member(emissions, simid, emissions_driven=emissions_driven,
+                                        useMultigas=useMultigas, outputs=outputs, return_xr=False,
+                                        concentrations=concentrations, other_rf=other_rf)
+                       for simid in simids]
+            return FairResult.concat(results)
+
+        _check_driving_mode(emissions_driven, concentrations)
+        n = len(simids)
+        nscen = 1 if emissions.scenario is None else len(emissions.scenario)
+        with self._stage("prepare"):
+            emiss, years = emissions.values, emissions.years
+            conc = None if emissions_driven else _concentrations_array(concentrations, years)
+            if not useMultigas:
+                other = np.broadcast_to(_other_rf_array(other_rf, years, simids), (n, len(years)))
+                other = np.tile(other, (nscen, 1))
+            # scenarios run as further copies of the members, scenario by scenario
+            members_emiss = emiss if emissions.scenario is None else np.repeat(emiss, n, axis=0)
+        if self.debug:
+            logger.debug("Running vectorized FaIR for %d simulations and %d scenarios", n, nscen)
+        with self._stage("params"):
+            compiled = self.params.compile(years)
+            indices = [compiled.index(simid) for simid in simids]
+            args = compiled.batch(np.tile(indices, nscen))
+        if not useMultigas:
+            co2 = _co2_emissions(members_emiss)
+            args = _co2_only_args(args)
+            ret = self._cached(lambda: self._run_co2_only(co2, args, other, outputs),
+                               _co2_emissions(emiss), args, other, self.engine, outputs)
+        elif conc is None:
+            ret = self._cached(lambda: self._run_vectorized(members_emiss, args, outputs=outputs),
+                               emiss, args, self.engine, outputs)
         else:
-            raise NotImplementedError("emissions time dimension is not recognized")
+            ret = self._cached(lambda: self._run_vectorized(members_emiss, args, outputs=outputs,
+                                                            concentrations=conc),
+                               emiss, args, self.engine, outputs, conc)
+        if emissions.scenario is not None:
+            ret = tuple(None if x is None else x.reshape((nscen, n) + x.shape[1:]) for x in ret)
+        return FairResult(year=years, simulation=np.asarray(simids), scenario=emissions.scenario,
+                          **_select_outputs(ret, outputs))
 
-        ret = self._run(emiss=emiss.values, 
-                        useMultigas=useMultigas)
+    def run_ensemble(self, emissda, simids=None, workers=None, batch_size=None, emissions_driven=True,
+                     useMultigas=True, outputs=None, return_xr=True, writer=None, scenario="default",
+                     summary=None, concentrations=None, other_rf=None):
+        """
+            Run FairModel for many ClimateParams members, spread across a process pool.
 
-        # Prep the FaIR outputs into xarray objects
+            Parameters
+            ----------
+            emissda : xarray.DataArray or pandas.DataFrame
+                emissions with dims [year x gas] or [scenario x year x gas], as accepted
+                by `FairModel.run`. They are validated once, and the vectorized engine
+                runs every scenario of a batch at once.
+            simids : list-like, optional
+                `simulation` labels of the ClimateParams to run. If `None`, run all members.
+            workers : int, optional
+                number of worker processes. If `None`, use `os.cpu_count()`. If 1, run
+                serially in this process.
+            batch_size : int, optional
+                number of members handed to a worker at a time. The vectorized engine
+                steps a whole batch at once; defaults to 256 for it.
+            emissions_driven : bool, optional
+                passed on to `FairModel.run`.
+            useMultigas : bool, optional
+                passed on to `FairModel.run`.
+            outputs : sequence of str, optional
+                passed on to `FairModel.run`.
+            return_xr : bool, optional
+                if False, return a `FairResult` of NumPy arrays.
+            writer : scmcoat.writers.EnsembleWriter, optional
+                if given, every batch is appended to it as soon as it finishes instead of
+                being kept in memory, and members it already holds for `scenario` are
+                skipped, so an interrupted ensemble can be resumed.
+            scenario : str, optional
+                label of the emissions scenario in `writer`, unless the emissions have
+                scenarios of their own.
+            summary : scmcoat.summary.EnsembleSummary, optional
+                if given, every batch is reduced to summary statistics in its worker and
+                merged into `summary` as soon as it finishes, instead of keeping the
+                members. `outputs` defaults to the variables of `summary`. Members are
+                weighted by the `weights` of the ClimateParams, if any.
+            concentrations : xarray.DataArray or pandas.DataFrame, optional
+                passed on to `FairModel.run`.
+            other_rf : xarray.DataArray or np.ndarray, optional
+                non-CO2 forcing of CO2-only runs, [year] or [simulation x year] (labelled,
+                or with a row per member of `simids`).
+
+            Returns
+            -------
+            xarray.Dataset or FairResult or EnsembleWriter or EnsembleSummary
+                outputs of `FairModel.run` concatenated along a `simulation` dimension
+                (after `scenario`, if any), with a `weight` coordinate if the
+                ClimateParams are weighted, `writer`
+                if one is given, or the `summary` Dataset (or `summary` itself if
+                `return_xr` is False).
+        """
+        if self.params is None:
+            raise ValueError("run_ensemble requires ClimateParams to be set")
+        with self._stage("prepare"):
+            emissions = _prepare_emissions(emissda)
+        if summary is not None:
+            if writer is not None:
+                raise ValueError("run_ensemble takes either a writer or a summary, not both")
+            if emissions.scenario is not None:
+                raise ValueError("summarize the scenarios of the emissions separately")
+            if outputs is None:
+                outputs = summary.variables
+        # workers only need the configuration of the summary
+        template = None if summary is None else summary.empty()
+        kwargs = dict(emissions_driven=emissions_driven, useMultigas=useMultigas, outputs=outputs,
+                      concentrations=concentrations, other_rf=other_rf)
 
-        # TODO generalize the years
-        years = np.arange(reference_year, 2501)  # gets range of years in desired period
-        gases = (
-            self.get_list_of_concentration_gases()
-        )  # gets list of gases names from this function defined above
+        if simids is None:
+            simids = self.params.params["simulation"].values
+        simids = list(simids)
+        if not simids:
+            raise ValueError("no simulation members to run")
+        if np.ndim(other_rf) == 2 and not isinstance(other_rf, xr.DataArray):
+            # label the rows, so that every batch finds its own
+            kwargs["other_rf"] = xr.DataArray(other_rf, dims=("simulation", "year"), coords={"simulation": simids})
+        if writer is not None:
+            # members are done once written for every scenario
+            labels = [scenario] if emissions.scenario is None else emissions.scenario
+            done = set.intersection(*[writer.written(label) for label in labels])
+            simids = [simid for simid in simids if simid not in done]
 
-        # TODO generalize somehow?
-        if len(ret) == 3:
-            C,F,T = ret
-        elif len(ret) == 7:
-            C, F, T, ariaci, lambda_eff, ohc, heatflux = ret
-        else:
-            raise NotImplementedError(f"FaIR output unrecognized. Expecting length of 3 or 7, got {len(ret)}")
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(simids)))
 
-        if useMultigas:
-                
-            C_xarray = xr.DataArray(
-                C, dims=["year", "gas"], coords=[years, gases], name="concentration"
-            )
-            if F.shape[1] == 13:
-                Fcoord = [
-                    "CO2", "CH4", "N2O",
-                    "Minor GHGs (CFCs, HFCs etc)",
-                    "Tropospheric ozone",
-                    "Stratospheric ozone",
-                    "Stratospheric water vapour from methane oxidation",
-                    "Contrails",
-                    "Aerosols",
-                    "Black carbon on snow",
-                    "Land use",
-                    "Volcanic",
-                    "Solar",
-                ]
+        if batch_size is None:
+            if self.engine == "vectorized":
+                batch_size = 256
             else:
-                Fcoord = np.arange(0, F.shape[1])
-            F_xarray = xr.DataArray(
-                F,
-                dims=["year", "forcing_type"],
-                coords=[years, Fcoord],
-                name="forcing",
-            )
+                batch_size = max(1, len(simids) // (workers * 4))
+        batches = [simids[i:i + batch_size] for i in range(0, len(simids), batch_size)]
+
+        if workers == 1:
+            _init_ensemble_worker(self, emissions, kwargs, template, in_process=True)
+            return self._collect_ensemble(map(_run_ensemble_batch, batches), return_xr, writer, scenario, summary)
+
+        # hand every worker its own model once, then only ship simids back and forth
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_ensemble_worker,
+            initargs=(self, emissions, kwargs, template),
+        ) as executor:
+            return self._collect_ensemble(executor.map(_run_ensemble_batch, batches), return_xr, writer, scenario,
+                                          summary)
+
+    def _collect_ensemble(self, batches, return_xr, writer, scenario, summary):
+        """
+            concatenate the FairResults of run_ensemble batches, stream them to
+            `writer` or merge their summaries into `summary`, and merge the RunStats
+            of worker processes
+        """
+        results = []
+        for result, worker_stats in batches:
+            if worker_stats is not None:
+                self.stats.merge(worker_stats)
+            if summary is not None:
+                with self._stage("output"):
+                    summary.merge(result)
+            elif writer is not None:
+                with self._stage("output"):
+                    writer.write(result, scenario)
+            else:
+                results.append(result)
+        if writer is not None:
+            return writer
+        if summary is not None:
+            if not return_xr:
+                return summary
+            with self._stage("output"):
+                return summary.to_dataset()
+
+        with self._stage("output"):
+            result = FairResult.concat(results)
+            if not return_xr:
+                return result
+            return self._with_weights(result.to_dataset())
+
+    def _with_weights(self, ds):
+        """`ds` with the ClimateParams member weights as a `weight` coordinate, if any"""
+        weights = self.params.member_weights(ds["simulation"].values)
+        if weights is None:
+            return ds
+        return ds.assign_coords(weight=("simulation", weights))
+
+    def lazy_ensemble(self, emissda, simids=None, chunk_size=256, emissions_driven=True, useMultigas=True,
+                      outputs=None, concentrations=None, other_rf=None):
+        """
+            ClimateParams members as a lazy, dask-backed xr.Dataset.
+
+            Outputs are chunked along `simulation` (and `scenario`, one per chunk).
+            Every chunk is a task that runs its slice of `ClimateParams.params` with
+            `FairModel._run_batch` when computed, so selections and reductions of the
+            Dataset only run the members they need, on whichever dask scheduler is
+            active. The first member is run once up front to find the output shapes.
+            Requires dask (`pip install scmcoat[dask]`).
+
+            Parameters
+            ----------
+            emissda : xarray.DataArray or pandas.DataFrame
+                emissions with dims [year x gas], as accepted by `FairModel.run`, or
+                [scenario x year x gas].
+            simids : list-like, optional
+                `simulation` labels of the ClimateParams to run. If `None`, use all members.
+            chunk_size : int, optional
+                number of members per chunk.
+            emissions_driven : bool, optional
+                passed on to `FairModel.run`.
+            useMultigas : bool, optional
+                passed on to `FairModel.run`.
+            outputs : sequence of str, optional
+                passed on to `FairModel.run`.
+            concentrations : xarray.DataArray or pandas.DataFrame, optional
+                passed on to `FairModel.run`.
+            other_rf : xarray.DataArray, optional
+                non-CO2 forcing of CO2-only runs, [year] or [simulation x year].
+
+            Returns
+            -------
+            xarray.Dataset
+                outputs with a `simulation` dimension, preceded by `scenario` if
+                `emissda` has one, backed by dask arrays.
+        """
+        import dask
+        import dask.array as dsa
+
+        if self.params is None:
+            raise ValueError("lazy_ensemble requires ClimateParams to be set")
+        outputs = _check_outputs(outputs)
+        if simids is None:
+            simids = self.params.params["simulation"].values
+        simids = list(simids)
+
+        emissions = _prepare_emissions(emissda)
+        scenarios = emissions.scenario
+        # one chunk per scenario
+        by_scenario = [emissions] if scenarios is None else [_Emissions(e, emissions.years) for e in emissions.values]
+        kwargs = dict(emissions_driven=emissions_driven, useMultigas=useMultigas, outputs=outputs,
+                      concentrations=concentrations, other_rf=other_rf)
+
+        probe = self._run_batch(by_scenario[0], simids[:1], **kwargs)
+        names = [name for name in OUTPUT_VARIABLES if getattr(probe, name) is not None]
+
+        run_chunk = dask.delayed(_run_ensemble_chunk, nout=len(names), pure=True)
+        chunks = [simids[i:i + chunk_size] for i in range(0, len(simids), chunk_size)]
+        arrays = {name: [] for name in names}
+        for emiss in by_scenario:
+            emiss = dask.delayed(emiss)
+            parts = {name: [] for name in names}
+            for chunk in chunks:
+                params = self.params.params.sel(simulation=chunk)
+                tasks = run_chunk(params, emiss, self.engine, self.cache, tuple(names), kwargs)
+                for name, task in zip(names, tasks):
+                    template = getattr(probe, name)
+                    parts[name].append(
+                        dsa.from_delayed(task, shape=(len(chunk),) + template.shape[1:], dtype=template.dtype)
+                    )
+            for name in names:
+                arrays[name].append(dsa.concatenate(parts[name], axis=0))
+
+        if scenarios is None:
+            arrays = {name: parts[0] for name, parts in arrays.items()}
         else:
-            C_xarray = xr.DataArray(
-                C, dims=["year",], coords=[years,], name="concentration"
-            )
-            F_xarray = xr.DataArray(
-                F,
-                dims=["year",],
-                coords=[years,],
-                name="forcing",
+            arrays = {name: dsa.stack(parts, axis=0) for name, parts in arrays.items()}
+        ds = FairResult(year=probe.year, simulation=np.asarray(simids), scenario=scenarios, **arrays).to_dataset()
+        return self._with_weights(ds)
+
+    def run_scenarios(self, emissda, simids=None, branch_year=None, batch_size=256, outputs=None,
+                      return_xr=True):
+        """
+            Run ClimateParams members under several emissions scenarios that share
+            their history.
+
+            With the vectorized engine, the years up to `branch_year` are run once per
+            member, and every scenario continues from the model state at the end of
+            them (carbon pools, concentrations, ocean layer temperatures). Outputs are
+            stitched back to full length. The fair engine cannot restart its Geoffroy
+            temperature model, so it runs every scenario in full.
+
+            Parameters
+            ----------
+            emissda : xarray.DataArray or pandas.DataFrame
+                emissions with dims [scenario x year x gas], e.g. from
+                `scmcoat.utils.rcmip_emissions` with a list of scenarios, as accepted
+                by `FairModel.run`.
+            simids : list-like, optional
+                `simulation` labels of the ClimateParams to run. If `None`, run all members.
+            branch_year : int, optional
+                last year of the shared history. If `None`, the last year up to which
+                the emissions of all scenarios are identical.
+            batch_size : int, optional
+                number of members run at once.
+            outputs : sequence of str, optional
+                passed on to `FairModel.run`.
+            return_xr : bool, optional
+                if False, return a `FairResult` of NumPy arrays.
+
+            Returns
+            -------
+            xarray.Dataset or FairResult
+                outputs with leading `scenario` and `simulation` dimensions.
+        """
+        if self.params is None:
+            raise ValueError("run_scenarios requires ClimateParams to be set")
+        outputs = _check_outputs(outputs)
+
+        emissions = _prepare_emissions(emissda)
+        if emissions.scenario is None:
+            raise ValueError("run_scenarios needs emissions with a scenario dimension")
+        emiss, years, scenarios = emissions.values, emissions.years, emissions.scenario
+
+        nshared = _shared_history_length(emiss)
+        if branch_year is None:
+            nbranch = nshared
+        else:
+            nbranch = branch_year - years[0] + 1
+            if not 0 < nbranch <= nshared:
+                raise ValueError(f"emissions of the scenarios are not identical up to branch_year {branch_year}")
+
+        if simids is None:
+            simids = self.params.params["simulation"].values
+        simids = list(simids)
+        batches = [simids[i:i + batch_size] for i in range(0, len(simids), batch_size)]
+
+        result = FairResult.concat(
+            self._run_branches(emiss, batch, nbranch, scenarios, outputs) for batch in batches
+        )
+        if not return_xr:
+            return result
+        return result.to_dataset()
+
+    @_counts_run
+    def _run_branches(self, emiss, simids, nbranch, scenarios, outputs):
+        """
+            Run a batch of members for emissions `emiss` [scenario x year x gas] whose
+            first `nbranch` years are shared. Returns a FairResult with `scenario` and
+            `simulation` axes.
+        """
+        if self.engine != "vectorized" or nbranch == 0:
+            results = [self._run_batch(e, simids, outputs=outputs) for e in emiss]
+            arrays = {name: None if getattr(results[0], name) is None
+                      else np.stack([getattr(r, name) for r in results])
+                      for name in OUTPUT_VARIABLES}
+            return FairResult(year=results[0].year, simulation=np.asarray(simids), scenario=scenarios, **arrays)
+
+        if self.debug:
+            logger.debug("Running vectorized FaIR for %d simulations, branching %d scenarios after %d years",
+                         len(simids), len(scenarios), nbranch)
+        years = _emissions_years(emiss)
+        with self._stage("params"):
+            compiled = self.params.compile(years)
+            args = compiled.batch([compiled.index(simid) for simid in simids])
+
+        def run():
+            E_pi = emiss[0, 0]
+            *history, state = self._run_vectorized(
+                emiss[0, :nbranch], _time_slice(args, slice(None, nbranch)), outputs=outputs,
+                E_pi=E_pi, restart_out=True)
+            branches = [
+                self._run_vectorized(e[nbranch:], _time_slice(args, slice(nbranch, None)), outputs=outputs,
+                                     E_pi=E_pi, restart_in=state)
+                for e in emiss
+            ]
+            return tuple(
+                None if h is None else np.stack([np.concatenate([h, branch[i]], axis=1) for branch in branches])
+                for i, h in enumerate(history)
             )
 
-        T_xarray = xr.DataArray(
-            T,
-            dims=[
-                "year",
-            ],
-            coords=[years],
+        ret = self._cached(run, emiss, args, self.engine, outputs, nbranch)
+        return FairResult(year=years, simulation=np.asarray(simids), scenario=scenarios,
+                          **_select_outputs(ret, outputs))
+
+    def non_co2_forcing(self, emissda, simids=None, **kwargs):
+        """
+            Non-CO2 forcing of ClimateParams members under the emissions `emissda`,
+            from full multi-gas runs, to pass as `other_rf` to CO2-only runs.
+
+            Parameters
+            ----------
+            emissda : xarray.DataArray or pandas.DataFrame
+                emissions with dims [year x gas], as accepted by `FairModel.run`.
+            simids : list-like, optional
+                `simulation` labels of the ClimateParams to run. If `None`, run all members.
+            kwargs :
+                passed on to `FairModel.run_ensemble`.
+
+            Returns
+            -------
+            xarray.DataArray
+                total forcing less CO2 forcing (W m-2), with dims [simulation x year].
+        """
+        forcing = self.run_ensemble(emissda, simids=simids, outputs=["forcing"], **kwargs).forcing
+        return (forcing.sum("forcing_type") - forcing.isel(forcing_type=0, drop=True)).rename("other_rf")
+
+    @_counts_run
+    def _run_members(self, emiss, simids, outputs=None):
+        """
+            Run every member of `simids` with its own emissions, a row of `emiss`
+            [simulation x year x gas], e.g. for requests coalesced by
+            `scmcoat.server.BatchServer`. Returns a FairResult with a `simulation` axis.
+        """
+        outputs = _check_outputs(outputs)
+        if self.engine != "vectorized":
+            return FairResult.concat([self._run_member(e, simid, outputs=outputs, return_xr=False)
+                                      for e, simid in zip(emiss, simids)])
+
+        years = _emissions_years(emiss)
+        with self._stage("params"):
+            compiled = self.params.compile(years)
+            args = compiled.batch([compiled.index(simid) for simid in simids])
+        ret = self._run_vectorized(emiss, args, outputs=outputs)
+        return FairResult(year=years, simulation=np.asarray(simids), **_select_outputs(ret, outputs))
+
+    def run_pulse(self, emissda, gases=("CO2",), pulse_years=(2020,), size=1.0, simids=None, batch_size=256):
+        """
+            Temperature response to emission pulses, for marginal damage calculations.
+
+            For every member, gas and pulse year, `size` Gt of the gas is added to the
+            emissions of the pulse year and the baseline temperature is subtracted. The
+            baseline is run once per member. With the vectorized engine, pulse runs
+            start from the baseline model state before the pulse year, and all gases
+            pulsed in the same year are run together.
+
+            Parameters
+            ----------
+            emissda : xarray.DataArray or pandas.DataFrame
+                baseline emissions with dims [year x gas], as accepted by `FairModel.run`.
+            gases : sequence of str, optional
+                gases to pulse, some of "CO2" (fossil), "CH4" and "N2O".
+            pulse_years : sequence of int, optional
+                years of the pulses.
+            size : float, optional
+                size of the pulses in Gt of the gas.
+            simids : list-like, optional
+                `simulation` labels of the ClimateParams to run. If `None`, run all members.
+            batch_size : int, optional
+                number of members run at once.
+
+            Returns
+            -------
+            xarray.DataArray
+                temperature response with dims [simulation x gas x pulse_year x year],
+                zero before the pulse year.
+        """
+        if self.params is None:
+            raise ValueError("run_pulse requires ClimateParams to be set")
+        unknown = set(gases) - set(PULSE_GASES)
+        if unknown:
+            raise ValueError(f"can't pulse {sorted(unknown)}, expecting some of {list(PULSE_GASES)}")
+
+        emissions = _prepare_emissions(emissda)
+        if emissions.scenario is not None:
+            raise ValueError("run_pulse runs emissions of one scenario at a time")
+        emiss, years = emissions.values, emissions.years
+        pulse_index = np.searchsorted(years, pulse_years)
+        for year, index in zip(pulse_years, pulse_index):
+            # the first year sets the pre-industrial reference
+            if not 0 < index < len(years) or years[index] != year:
+                raise ValueError(f"pulse year {year} must be within {years[0] + 1}-{years[-1]}")
+        pulses = np.zeros((len(gases), emiss.shape[1]))
+        for g, gas in enumerate(gases):
+            column, factor = PULSE_GASES[gas]
+            pulses[g, column] = size * factor
+
+        if simids is None:
+            simids = self.params.params["simulation"].values
+        simids = list(simids)
+        response = np.concatenate([
+            self._run_pulse_batch(emiss, simids[i:i + batch_size], pulses, pulse_index)
+            for i in range(0, len(simids), batch_size)
+        ])
+
+        return xr.DataArray(
+            response,
+            dims=["simulation", "gas", "pulse_year", "year"],
+            coords={"simulation": simids, "gas": list(gases), "pulse_year": list(pulse_years), "year": years},
             name="temperature",
         )
-        if len(ret) == 7:
-            ohc_xarray = xr.DataArray(
-                ohc,
-                dims=[
-                    "year",
-                ],
-                coords=[years],
-                name="ocean_heat_content",
-            )
-            response_ds = xr.merge(
-                [C_xarray, F_xarray, T_xarray, ohc_xarray]
-            )
+
+    @_counts_run
+    def _run_pulse_batch(self, emiss, simids, pulses, pulse_index):
+        """
+            Temperature response [simulation x gas x pulse_year x year] of a batch of
+            members to adding each row of `pulses` to the emissions at each of `pulse_index`.
+        """
+        n, ngas, nt = len(simids), len(pulses), emiss.shape[0]
+        response = np.zeros((n, ngas, len(pulse_index), nt))
+
+        if self.engine != "vectorized":
+            baseline = self._run_batch(emiss, simids, outputs=["temperature"]).temperature
+            for g, pulse in enumerate(pulses):
+                for k, index in enumerate(pulse_index):
+                    perturbed = emiss.copy()
+                    perturbed[index] += pulse
+                    T = self._run_batch(perturbed, simids, outputs=["temperature"]).temperature
+                    response[:, g, k] = T - baseline
+            return response
+
+        with self._stage("params"):
+            compiled = self.params.compile(_emissions_years(emiss))
+            indices = [compiled.index(simid) for simid in simids]
+            args = compiled.batch(indices)
+            tiled_args = compiled.batch(np.tile(indices, ngas))
+        E_pi = emiss[0]
+
+        # baseline, split at the pulse years to keep the state before each of them
+        baseline = np.empty((n, nt))
+        states = {}
+        state = None
+        starts = sorted(set(pulse_index.tolist()))
+        for start, stop in zip([0] + starts, starts + [nt]):
+            restart = dict(restart_out=True) if state is None else dict(restart_in=state, restart_out=True)
+            ret = self._run_vectorized(emiss[start:stop], _time_slice(args, slice(start, stop)),
+                                       outputs=["temperature"], E_pi=E_pi, **restart)
+            baseline[:, start:stop] = ret[2]
+            state = ret[-1]
+            states[stop] = state
+
+        # every gas pulsed in the same year is one batch of ngas x n members
+        for start in starts:
+            perturbed = np.repeat(emiss[np.newaxis, start:], ngas, axis=0)
+            perturbed[:, 0] += pulses
+            perturbed = np.repeat(perturbed, n, axis=0)
+            tiled_state = {name: np.concatenate([x] * ngas) for name, x in states[start].items()}
+            ret = self._run_vectorized(perturbed, _time_slice(tiled_args, slice(start, None)),
+                                       outputs=["temperature"], E_pi=E_pi, restart_in=tiled_state)
+            T = ret[2].reshape(ngas, n, nt - start).transpose(1, 0, 2)
+            for k in np.flatnonzero(pulse_index == start):
+                response[:, :, k, start:] = T - baseline[:, np.newaxis, start:]
+        return response
+
+    def fit_emulator(self, emissda, gases=("CO2", "CH4", "N2O"), pulse_years=None, size=1.0, simids=None,
+                     validation=None, batch_size=256):
+        """
+            A linear impulse-response emulator of this model around `emissda`, for fast
+            temperatures of small emission changes; see
+            `scmcoat.emulator.LinearEmulator.fit`.
+        """
+        from .emulator import LinearEmulator
+
+        return LinearEmulator.fit(self, emissda, gases=gases, pulse_years=pulse_years, size=size, simids=simids,
+                                  validation=validation, batch_size=batch_size)
+
+    def run_inverse(self, emissda, target, start_year, gases=("CO2_Fossil",), mode="scale", target_year=None,
+                    bracket=None, simids=None, tol=1e-3, maxiter=50, batch_size=256):
+        """
+            Emissions pathways that bring every member to a temperature target.
+
+            From `start_year` on, the emissions of `gases` are scaled by (`mode="scale"`)
+            or offset by (`mode="offset"`) a factor that is solved for per member, so
+            that the peak temperature (or the temperature in `target_year`) is
+            `target`. All members of a batch iterate together with the Illinois
+            variant of regula falsi, which needs far fewer runs than bisection. With
+            the vectorized engine, the years before `start_year` are run once per
+            batch and every iteration restarts from the model state at that point.
+
+            Parameters
+            ----------
+            emissda : xarray.DataArray or pandas.DataFrame
+                baseline emissions with dims [year x gas], as accepted by `FairModel.run`.
+            target : float
+                temperature target (K).
+            start_year : int
+                first year whose emissions are changed.
+            gases : sequence of str, optional
+                emissions columns to change, from `EMISSIONS_COLUMNS`.
+            mode : str, optional
+                "scale" to multiply the emissions by the factor, or "offset" to add it
+                to them (in the units of the gases).
+            target_year : int, optional
+                year whose temperature should hit `target`. If `None`, the peak
+                temperature of the run.
+            bracket : tuple of float, optional
+                factors between which to search; (0, 3) for "scale" and (-20, 20) for
+                "offset" by default. Members whose target is not within the
+                temperatures of the bracket do not converge.
+            simids : list-like, optional
+                `simulation` labels of the ClimateParams to run. If `None`, run all members.
+            tol : float, optional
+                tolerance on the temperature (K).
+            maxiter : int, optional
+                largest number of iterations after the bracket is evaluated.
+            batch_size : int, optional
+                number of members solved together.
+
+            Returns
+            -------
+            xarray.Dataset
+                `factor` and the resulting `emissions` [simulation x year x gas] of
+                every member, the full emissions table of `emissda` with `gases`
+                changed, ready for `FairModel.run`, with the diagnostics `temperature`
+                (of the target year, or the peak), `residual` (temperature less
+                target), `iterations` and `converged`. Members that did not converge
+                have NaN factors and NaN `gases` from `start_year` on; if their target
+                is out of reach, `temperature` is that of the end of the bracket
+                closest to it.
+        """
+        if self.params is None:
+            raise ValueError("run_inverse requires ClimateParams to be set")
+        if mode not in ("scale", "offset"):
+            raise ValueError(f"mode must be 'scale' or 'offset', got {mode!r}")
+        unknown = set(gases) - set(FAIR_EMISSIONS_GASES)
+        if unknown:
+            raise ValueError(f"can't solve for {sorted(unknown)}, expecting some of FAIR_EMISSIONS_GASES")
+        if bracket is None:
+            bracket = (0.0, 3.0) if mode == "scale" else (-20.0, 20.0)
+
+        emissions = _prepare_emissions(emissda)
+        if emissions.scenario is not None:
+            raise ValueError("run_inverse solves emissions of one scenario at a time")
+        emiss, years = emissions.values, emissions.years
+        start = int(np.searchsorted(years, start_year))
+        # the first year sets the pre-industrial reference
+        if not 0 < start < len(years) or years[start] != start_year:
+            raise ValueError(f"start_year {start_year} must be within {years[0] + 1}-{years[-1]}")
+        if target_year is None:
+            target_index = None
+        elif target_year in years[start:]:
+            target_index = int(np.searchsorted(years, target_year))
         else:
-            
-            response_ds = xr.merge(
-                [C_xarray, F_xarray, T_xarray]
-            )
-        response_ds["simulation"] = self.simid
-        
-        # TODO Add attributes
+            raise ValueError(f"target_year {target_year} must be within {start_year}-{years[-1]}")
+        columns = [EMISSIONS_COLUMNS.index(gas) for gas in gases]
 
-        return response_ds
+        if simids is None:
+            simids = self.params.params["simulation"].values
+        simids = list(simids)
+        solved = [
+            self._run_inverse_batch(emiss, simids[i:i + batch_size], target, start, columns, mode, target_index,
+                                    bracket, tol, maxiter)
+            for i in range(0, len(simids), batch_size)
+        ]
+        factor, temperature, iterations, converged = (np.concatenate(x) for x in zip(*solved))
+
+        # the solved emissions of every member
+        changed = np.repeat(emiss[np.newaxis], len(simids), axis=0)
+        if mode == "scale":
+            changed[:, start:, columns] *= factor[:, None, None]
+        else:
+            changed[:, start:, columns] += factor[:, None, None]
+
+        return xr.Dataset(
+            {
+                "factor": ("simulation", factor),
+                "emissions": (("simulation", "year", "gas"), changed),
+                "temperature": ("simulation", temperature),
+                "residual": ("simulation", temperature - target),
+                "iterations": ("simulation", iterations),
+                "converged": ("simulation", converged),
+            },
+            coords={"simulation": simids, "year": years, "gas": EMISSIONS_COLUMNS},
+            attrs={"target": target, "start_year": start_year, "mode": mode,
+                   "target_year": "peak" if target_year is None else target_year},
+        )
+
+    @_counts_run
+    def _run_inverse_batch(self, emiss, simids, target, start, columns, mode, target_index, bracket, tol, maxiter):
+        """
+            factors, target temperatures, iterations and convergence of a batch of
+            members solved in lockstep by `run_inverse`
+        """
+        n = len(simids)
+        with self._stage("params"):
+            compiled = self.params.compile(_emissions_years(emiss))
+            indices = np.array([compiled.index(simid) for simid in simids])
+            args = compiled.batch(indices)
+
+        if self.engine == "vectorized":
+            # the years before `start` are the same in every iteration
+            E_pi = emiss[0]
+            *history, state = self._run_vectorized(emiss[:start], _time_slice(args, slice(None, start)),
+                                                   outputs=["temperature"], E_pi=E_pi, restart_out=True)
+            prefix = history[2]
+            suffix_args = _time_slice(args, slice(start, None))
 
+        def temperatures(factor, members):
+            """target temperature of `members` (positions in the batch) with emissions changed by `factor`"""
+            changed = np.repeat(emiss[np.newaxis, start:], len(members), axis=0)
+            if mode == "scale":
+                changed[..., columns] *= factor[:, None, None]
+            else:
+                changed[..., columns] += factor[:, None, None]
+
+            if self.engine == "vectorized":
+                member_args = {name: x[members] if name in compiled.members else x for name, x in suffix_args.items()}
+                member_state = {name: x[members] for name, x in state.items()}
+                T = self._run_vectorized(changed, member_args, outputs=["temperature"], E_pi=E_pi,
+                                         restart_in=member_state)[2]
+                T = np.concatenate([prefix[members], T], axis=1)
+            else:
+                T = np.stack([
+                    self._run_member(np.concatenate([emiss[:start], e]), simids[m], outputs=["temperature"],
+                                     return_xr=False).temperature
+                    for m, e in zip(members, changed)
+                ])
+            return T.max(axis=1) if target_index is None else T[:, target_index]
+
+        everyone = np.arange(n)
+        a = np.full(n, float(bracket[0]))
+        b = np.full(n, float(bracket[1]))
+        fa = temperatures(a, everyone) - target
+        fb = temperatures(b, everyone) - target
+        converged = np.abs(fb) < tol
+        bracketed = converged | (np.sign(fa) != np.sign(fb))
+        iterations = np.zeros(n, dtype=int)
+
+        for _ in range(maxiter):
+            active = np.flatnonzero(bracketed & ~converged)
+            if len(active) == 0:
+                break
+            with np.errstate(invalid="ignore", divide="ignore"):
+                c = b[active] - fb[active] * (b[active] - a[active]) / (fb[active] - fa[active])
+            # fall back to bisection where the secant is degenerate
+            c = np.where(np.isfinite(c), c, (a[active] + b[active]) / 2)
+            fc = temperatures(c, active) - target
+            iterations[active] += 1
+
+            # Illinois: keep the root bracketed, and halve the value of an end point
+            # that is kept twice in a row
+            crossed = np.sign(fc) != np.sign(fb[active])
+            a[active] = np.where(crossed, b[active], a[active])
+            fa[active] = np.where(crossed, fb[active], fa[active] / 2)
+            b[active], fb[active] = c, fc
+            converged[active] = np.abs(fc) < tol
+
+        # members out of reach report the end of the bracket closest to the target
+        closest = np.where(bracketed | (np.abs(fb) < np.abs(fa)), fb, fa)
+        factor = np.where(converged, b, np.nan)
+        return factor, closest + target, iterations, converged
 
     def get_test_emissions(self):
         from . import utils
@@ -399,4 +1516,269 @@ class FairModel:
         emiss = self.get_test_emissions()
         
         return self.run(emiss)
-    
+
+
+# state for run_ensemble worker processes, set once per process by the pool initializer
+_ensemble_worker = {}
+
+
+def _init_ensemble_worker(model, emissda, kwargs, summary=None, in_process=False):
+    stats = model.stats
+    if stats is not None and not in_process:
+        # statistics of worker processes are sent back with every batch
+        stats = copy.copy(stats)
+        stats.reset()
+    _ensemble_worker["model"] = FairModel(model.params, debug=model.debug, engine=model.engine, cache=model.cache,
+                                          stats=stats)
+    _ensemble_worker["emissions"] = emissda
+    _ensemble_worker["kwargs"] = kwargs
+    _ensemble_worker["summary"] = summary
+    _ensemble_worker["in_process"] = in_process
+
+
+def _run_ensemble_batch(simids):
+    """
+        FairResult (or EnsembleSummary) of a batch of members, and the RunStats to
+        merge into the parent model, if any
+    """
+    model = _ensemble_worker["model"]
+    result = model._run_batch(_ensemble_worker["emissions"], simids, **_ensemble_worker["kwargs"])
+    if _ensemble_worker["summary"] is not None:
+        # only ship the reduced batch back
+        summary = _ensemble_worker["summary"].empty()
+        with model._stage("output"):
+            summary.update(result, weights=model.params.member_weights(simids))
+        result = summary
+    if model.stats is None or _ensemble_worker["in_process"]:
+        return result, None
+    worker_stats = copy.copy(model.stats)
+    model.stats.reset()
+    return result, worker_stats
+
+
+def _run_ensemble_chunk(params, emissda, engine, cache, names, kwargs):
+    """outputs `names` of the members in `params`, a slice of ClimateParams.params, for lazy_ensemble"""
+    model = FairModel(ClimateParams(params), engine=engine, cache=cache)
+    result = model._run_batch(emissda, params["simulation"].values, **kwargs)
+    return tuple(getattr(result, name) for name in names)
+
+
+def _shared_history_length(emiss):
+    """number of leading years in which the emissions [scenario x year x gas] of all scenarios are identical"""
+    same = np.all(emiss == emiss[:1], axis=(0, 2))
+    return len(same) if same.all() else int(np.argmin(same))
+
+
+def _time_slice(args, time):
+    """fair_scm arguments for the timesteps `time` of the emissions"""
+    args = dict(args)
+    for name in ["F_solar", "F_volcanic"]:
+        args[name] = args[name][..., time]
+    args["natural"] = args["natural"][..., time, :]
+    return args
+
+
+@dataclass
+class _Emissions:
+    """
+        emissions validated by `_prepare_emissions`: contiguous float64 `values`
+        [year x gas] or [scenario x year x gas] in the order of EMISSIONS_COLUMNS,
+        their `years` and `scenario` labels
+    """
+    values: np.ndarray
+    years: np.ndarray
+    scenario: np.ndarray = None
+
+
+def _prepare_emissions(emissda):
+    """
+        Validate emissions once: put labelled gases in the order of EMISSIONS_COLUMNS
+        and dims in the order [scenario x year x gas], and convert them to a
+        contiguous float64 array, without copying if they already are one.
+        Unlabelled gases are trusted to be in order.
+    """
+    if isinstance(emissda, _Emissions):
+        return emissda
+    if isinstance(emissda, pd.DataFrame):
+        emissda = _dataframe_emissions(emissda)
+
+    scenario = None
+    if isinstance(emissda, xr.DataArray) and "gas" in emissda.dims:
+        unknown = set(emissda.dims) - {"scenario", "year", "gas"}
+        if unknown:
+            raise ValueError(f"emissions have unknown dims {sorted(unknown)}, expecting [scenario x] year x gas")
+        if "gas" in emissda.coords:
+            labels = [str(label) for label in emissda["gas"].values]
+            if labels != EMISSIONS_COLUMNS and set(labels) & set(FAIR_EMISSIONS_GASES):
+                missing = [name for name in EMISSIONS_COLUMNS if name not in labels]
+                if missing:
+                    raise ValueError(f"emissions are missing {missing}")
+                emissda = emissda.sel(gas=EMISSIONS_COLUMNS)
+        if "scenario" in emissda.dims:
+            scenario = emissda["scenario"].values
+        emissda = emissda.transpose(*[dim for dim in ("scenario", "year", "gas") if dim in emissda.dims])
+
+    values = np.ascontiguousarray(emissda, dtype=float)
+    if values.ndim not in (2, 3) or values.shape[-1] != len(EMISSIONS_COLUMNS):
+        raise ValueError(f"emissions should be [year x gas] or [scenario x year x gas] with "
+                         f"{len(EMISSIONS_COLUMNS)} columns, got shape {values.shape}")
+    if values.ndim == 3 and scenario is None:
+        scenario = np.arange(values.shape[0])
+    years = _emissions_years(emissda if isinstance(emissda, xr.DataArray) else values)
+    return _Emissions(values=values, years=years, scenario=scenario)
+
+
+def _dataframe_emissions(df):
+    """
+        DataArray of emissions in a DataFrame with FaIR's columns, stacked along
+        `scenario` if it has a `scenario` column or index level
+    """
+    for name in ("scenario", "year"):
+        if name in df.index.names:
+            # e.g. FaIR's year column already holds the years of a year index
+            df = df.reset_index(name, drop=name in df.columns)
+    columns = [c for c in df.columns if c != "scenario"]
+    # label gases only if the columns are FaIR's
+    coords = {"gas": columns} if set(columns) & set(FAIR_EMISSIONS_GASES) else {}
+    if "scenario" not in df.columns:
+        return xr.DataArray(df[columns].values, dims=("year", "gas"), coords=coords)
+
+    scenario = pd.unique(df["scenario"])
+    blocks = [df.loc[df["scenario"] == label, columns].values for label in scenario]
+    if len({block.shape for block in blocks}) > 1:
+        raise ValueError("every scenario of the emissions should have the same years")
+    return xr.DataArray(np.stack(blocks), dims=("scenario", "year", "gas"), coords=dict(coords, scenario=scenario))
+
+
+def _repeat_member(args, n):
+    """fair_scm arguments of one member, repeated along a leading member axis of length `n`"""
+    return {name: np.broadcast_to(np.asarray(x), (n,) + np.shape(x)) for name, x in args.items()}
+
+
+def _stack_outputs(rets):
+    """stack fair_scm-like return tuples of several scenarios along a leading axis"""
+    return tuple(None if x is None else np.stack([ret[i] for ret in rets]) for i, x in enumerate(rets[0]))
+
+
+def _emissions_years(emissda):
+    """
+        integer years of emissions [... x year x gas]: the `year` coordinate of a
+        DataArray, or else FaIR's leading "year" column
+    """
+    if isinstance(emissda, xr.DataArray) and "year" in emissda.coords:
+        years = emissda["year"].values
+    else:
+        years = np.asarray(emissda, dtype=float)[..., 0]
+        years = years.reshape(-1, years.shape[-1])[0]
+    years = np.asarray(years).astype(int)
+    if len(years) < 2 or np.any(np.diff(years) != 1):
+        raise ValueError("emissions must be annual, with consecutive years")
+    return years
+
+
+def _check_driving_mode(emissions_driven, concentrations):
+    """concentrations are required by, and only accepted in, concentration-driven runs"""
+    if emissions_driven and concentrations is not None:
+        raise ValueError("concentrations are only used with emissions_driven=False")
+    if not emissions_driven and concentrations is None:
+        raise ValueError("concentration-driven runs need concentrations")
+
+
+def _concentrations_array(concentrations, years):
+    """[year x gas] array of the FAIR_CONCENTRATION_GASES for the emissions `years`"""
+    if isinstance(concentrations, xr.DataArray):
+        if "gas" in concentrations.coords:
+            concentrations = concentrations.sel(gas=FAIR_CONCENTRATION_GASES)
+        if "year" in concentrations.coords:
+            missing = np.setdiff1d(years, concentrations["year"].values)
+            if len(missing):
+                raise ValueError(f"concentrations are missing {len(missing)} years of the emissions, "
+                                 f"e.g. {missing[0]}")
+            concentrations = concentrations.sel(year=years)
+        concentrations = concentrations.transpose("year", ...)
+    elif isinstance(concentrations, pd.DataFrame) and set(FAIR_CONCENTRATION_GASES) <= set(concentrations.columns):
+        concentrations = concentrations[FAIR_CONCENTRATION_GASES]
+    conc = np.asarray(concentrations, dtype=float)
+    if conc.shape != (len(years), len(FAIR_CONCENTRATION_GASES)):
+        raise ValueError(f"concentrations should be [year x gas] of shape {(len(years), len(FAIR_CONCENTRATION_GASES))}, "
+                         f"got {conc.shape}")
+    return conc
+
+
+def _co2_emissions(emiss):
+    """CO2 emissions (GtC/yr) of multi-gas emissions [... x year x gas], fossil plus land use"""
+    emiss = np.asarray(emiss, dtype=float)
+    if emiss.ndim == 1:
+        return emiss
+    return emiss[..., 1:3].sum(axis=-1)
+
+
+def _co2_only_args(args):
+    """
+        fair_scm arguments of a CO2-only run from those of a multi-gas run. The
+        calibrated CO2 forcing scale factor goes into F2x, because fair_scm would
+        scale `other_rf` with it as well.
+    """
+    ret = {name: args[name] for name in CO2_ONLY_ARGS}
+    ret["F2x"] = np.asarray(args["F2x"]) * np.asarray(args["scale"])[..., 0]
+    return ret
+
+
+def _other_rf_array(other_rf, years, simids=None):
+    """
+        non-CO2 forcing for the emissions `years`, [year] or [simulation x year] for
+        the members `simids` (a label or a list of them)
+    """
+    if other_rf is None:
+        return np.zeros(len(years))
+    if isinstance(other_rf, xr.DataArray):
+        if "year" in other_rf.coords:
+            missing = np.setdiff1d(years, other_rf["year"].values)
+            if len(missing):
+                raise ValueError(f"other_rf is missing {len(missing)} years of the emissions, e.g. {missing[0]}")
+            other_rf = other_rf.sel(year=years)
+        if "simulation" in other_rf.dims:
+            if simids is None:
+                raise ValueError("other_rf has a simulation dimension, but no member is run")
+            labels = other_rf["simulation"].values.tolist()
+            missing = [simid for simid in np.atleast_1d(simids).tolist() if simid not in labels]
+            if missing in (["default"], ["median"]):
+                raise ValueError("other_rf has a simulation dimension, pass the simid of the member to run")
+            if missing:
+                raise ValueError(f"other_rf has no members {missing}")
+            other_rf = other_rf.sel(simulation=simids)
+        other_rf = other_rf.transpose(..., "year")
+    other_rf = np.asarray(other_rf, dtype=float)
+    if other_rf.shape[-1] != len(years) or other_rf.ndim > 2:
+        raise ValueError(f"other_rf should be [year] or [simulation x year] with {len(years)} years, "
+                         f"got {other_rf.shape}")
+    return other_rf
+
+
+def _natural_forcing(F_solar, F_volcanic, natural, years):
+    """
+        Put ClimateParams solar and volcanic forcing and natural emissions, which start
+        in 1750, on the time axis of emissions of the consecutive `years`. Arrays may
+        have leading member dimensions; time is the last axis of the forcings and the
+        second to last of `natural`.
+    """
+    F_solar = np.asarray(F_solar)
+    F_volcanic = np.asarray(F_volcanic)
+    natural = np.asarray(natural)
+
+    offset = int(years[0]) - 1750
+    if offset < 0:
+        raise ValueError(f"emissions start in {years[0]}, before the ClimateParams, which start in 1750")
+    nt = len(years)
+    nparams = max(0, min(natural.shape[-2] - offset, nt))
+
+    F_solar_nt = np.zeros(F_solar.shape[:-1] + (nt,))
+    F_volcanic_nt = np.zeros(F_volcanic.shape[:-1] + (nt,))
+    natural_nt = np.zeros(natural.shape[:-2] + (nt, 2))
+    F_solar_nt[..., :nparams] = F_solar[..., offset:offset + nparams]
+    F_volcanic_nt[..., :nparams] = F_volcanic[..., offset:offset + nparams]
+    natural_nt[..., :nparams, :] = natural[..., offset:offset + nparams, :]
+    # hold the last element constant for the rest of the array
+    natural_nt[..., nparams:, :] = natural[..., -1:, :]
+
+    return F_solar_nt, F_volcanic_nt, natural_nt
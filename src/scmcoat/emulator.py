@@ -0,0 +1,284 @@
+"""
+    emulator.py
+    October 16 2026
+
+    Linear impulse-response emulation of FairModel around a baseline run.
+
+    `LinearEmulator` keeps, per member and gas, the temperature response to a
+    pulse of emissions by lag, for a few pulse years. The temperature of the
+    baseline plus small emission changes is the convolution of the changes
+    with these kernels, which is a vectorized FFT product rather than a model
+    integration. FaIR is not linear, so the emulator also reports its error
+    against full runs.
+"""
+import numpy as np
+import xarray as xr
+
+from scmcoat.core import PULSE_GASES, EMISSIONS_COLUMNS, _prepare_emissions
+
+
+class LinearEmulator:
+    """
+        Temperature of FairModel members for emissions that differ slightly from
+        a baseline, from linear impulse-response kernels.
+
+        The kernel of a gas is the response to a pulse of 1 Gt of it by lag. It
+        depends on the state of the model, so kernels are fit in several pulse
+        years and interpolated linearly between them; changes before the first
+        or after the last pulse year use the nearest kernel. Use `fit` (or
+        `FairModel.fit_emulator`) to build one.
+
+        Parameters
+        ----------
+        emissions : xr.DataArray
+            baseline emissions [year x gas], with the `EMISSIONS_COLUMNS` as gases.
+        baseline : xr.DataArray
+            baseline temperature [simulation x year].
+        kernels : xr.DataArray
+            temperature response per Gt [simulation x gas x pulse_year x lag].
+            Lags beyond the end of the baseline of a pulse year are those of the
+            previous pulse year.
+        error : xr.DataArray, optional
+            largest absolute temperature error [simulation] of the emulator for the
+            validation changes of `fit`.
+
+        Examples
+        --------
+        >>> emulator = fm.fit_emulator(emissions, pulse_years=range(2020, 2101, 10))
+        >>> emulator.error.max()
+        >>> delta = xr.DataArray(..., dims=["policy", "year", "gas"])
+        >>> temperature = emulator.predict(delta)
+    """
+
+    def __init__(self, emissions, baseline, kernels, error=None):
+        self.emissions = emissions
+        self.baseline = baseline
+        self.kernels = kernels
+        self.error = error
+        self._transformed = None
+
+    def __repr__(self):
+        return (f"{type(self).__name__}(simulation={self.baseline.sizes['simulation']}, "
+                f"gas={list(self.gases)}, pulse_year={list(self.kernels['pulse_year'].values)})")
+
+    @property
+    def gases(self):
+        """gases that the emulator responds to"""
+        return self.kernels["gas"].values
+
+    @property
+    def years(self):
+        """years of the baseline"""
+        return self.baseline["year"].values
+
+    @classmethod
+    def fit(cls, model, emissda, gases=("CO2", "CH4", "N2O"), pulse_years=None, size=1.0, simids=None,
+            validation=None, batch_size=256):
+        """
+            Fit kernels from pulse runs of `model` around `emissda`.
+
+            Parameters
+            ----------
+            model : FairModel
+                the model to emulate, with ClimateParams.
+            emissda : xarray.DataArray or pandas.DataFrame
+                baseline emissions with dims [year x gas], as accepted by `FairModel.run`.
+            gases : sequence of str, optional
+                gases to fit kernels for, some of "CO2" (fossil), "CH4" and "N2O".
+            pulse_years : sequence of int, optional
+                years of the pulses to fit kernels from. If `None`, every tenth year
+                after the first.
+            size : float, optional
+                size of the pulses in Gt of the gas. Smaller pulses give the local
+                slope, larger ones the average response to changes of that size.
+            simids : list-like, optional
+                `simulation` labels of the ClimateParams to fit. If `None`, all members.
+            validation : xr.DataArray, optional
+                emission changes to report the `error` of the emulator for, as accepted
+                by `predict`, without dimensions other than `year` and `gas`. If
+                `None`, a 10% increase of the emissions of every gas from the first
+                pulse year on.
+            batch_size : int, optional
+                number of members run at once.
+
+            Returns
+            -------
+            LinearEmulator
+        """
+        prepared = _prepare_emissions(emissda)
+        if prepared.scenario is not None:
+            raise ValueError("fit an emulator to one scenario at a time")
+        years = prepared.years
+        emissions = xr.DataArray(prepared.values, dims=["year", "gas"],
+                                 coords={"year": years, "gas": EMISSIONS_COLUMNS})
+        baseline = model.run_ensemble(prepared, simids=simids, workers=1, batch_size=batch_size,
+                                      outputs=["temperature"])
+        if pulse_years is None:
+            pulse_years = years[1::10]
+        pulse_years = sorted(pulse_years)
+        response = model.run_pulse(prepared, gases=gases, pulse_years=pulse_years, size=size,
+                                   simids=baseline["simulation"].values, batch_size=batch_size) / size
+
+        # response by lag, filling lags past the end from the previous pulse year
+        nt = len(years)
+        pulse_index = np.searchsorted(years, pulse_years)
+        kernels = np.zeros(response.shape[:-1] + (nt,))
+        for k, index in enumerate(pulse_index):
+            if k > 0:
+                kernels[:, :, k] = kernels[:, :, k - 1]
+            kernels[:, :, k, :nt - index] = response.values[:, :, k, index:]
+
+        emulator = cls(
+            emissions=emissions,
+            baseline=baseline["temperature"],
+            kernels=xr.DataArray(
+                kernels, dims=["simulation", "gas", "pulse_year", "lag"],
+                coords={"simulation": response["simulation"].values, "gas": list(gases),
+                        "pulse_year": list(pulse_years), "lag": np.arange(nt)},
+                name="kernel", attrs={"units": "K/Gt", "size": size},
+            ),
+        )
+        if validation is None:
+            change = np.stack([prepared.values[:, PULSE_GASES[gas][0]] / PULSE_GASES[gas][1] for gas in gases], axis=1)
+            validation = xr.DataArray(
+                0.1 * change * (years >= pulse_years[0])[:, np.newaxis],
+                dims=["year", "gas"], coords={"year": years, "gas": list(gases)},
+            )
+        emulator.error = emulator.validate(model, validation, batch_size=batch_size)
+        return emulator
+
+    def predict(self, delta):
+        """
+            Temperature of the baseline plus emission changes `delta`.
+
+            Parameters
+            ----------
+            delta : xr.DataArray or np.ndarray
+                changes in Gt of the gas a year. A DataArray has dims `year` and `gas`
+                (from the `gases` of the emulator) and any others, e.g. of many
+                candidate policies; years and gases that are missing are unchanged.
+                An array is [... x year x gas], on the years and gases of the emulator,
+                and skips the labelling overhead for the fastest queries.
+
+            Returns
+            -------
+            xr.DataArray or np.ndarray
+                temperature [simulation x ... x year], with the other dims of `delta`.
+        """
+        values, other_dims = self._delta_values(delta)
+        nt = len(self.years)
+        nfft, weights, kernel_fft = self._transforms()
+
+        # spread every year's change over the pulse years around it, and contract
+        # gases and pulse years at every frequency as one matrix product
+        split = values[..., np.newaxis, :, :] * weights[:, :, np.newaxis]
+        queries = split.reshape((-1,) + split.shape[-3:])
+        split_fft = np.fft.rfft(queries, n=nfft, axis=-2).transpose(2, 0, 1, 3)
+        response = np.matmul(np.ascontiguousarray(split_fft).reshape(nfft // 2 + 1, len(queries), -1), kernel_fft)
+        response = np.ascontiguousarray(response.transpose(2, 1, 0))
+        temperature = np.fft.irfft(response, n=nfft, axis=-1)[..., :nt]
+        temperature = temperature.reshape((len(self.baseline),) + values.shape[:-2] + (nt,))
+        temperature += self.baseline.values.reshape((len(self.baseline),) + (1,) * (values.ndim - 2) + (nt,))
+
+        if not isinstance(delta, xr.DataArray):
+            return temperature
+        return xr.DataArray(
+            temperature,
+            dims=("simulation",) + other_dims + ("year",),
+            coords={"simulation": self.baseline["simulation"].values, "year": self.years,
+                    **{dim: delta.coords[dim] for dim in other_dims if dim in delta.coords}},
+            name="temperature",
+        )
+
+    def validate(self, model, delta, batch_size=256):
+        """
+            Largest absolute difference [simulation x ...] between the emulated and
+            the `model` temperature, over years, for emission changes `delta` as
+            accepted by `predict`. Every combination of the other dims of `delta`
+            is a full ensemble run.
+        """
+        values, other_dims = self._delta_values(delta)
+        predicted = self.predict(delta)
+        columns = [PULSE_GASES[gas][0] for gas in self.gases]
+        factors = np.array([PULSE_GASES[gas][1] for gas in self.gases])
+
+        simids = self.baseline["simulation"].values
+        error = np.empty((len(simids),) + values.shape[:-2])
+        for index in np.ndindex(values.shape[:-2]):
+            emissions = self.emissions.values.copy()
+            np.add.at(emissions, (slice(None), columns), values[index] * factors)
+            actual = model.run_ensemble(emissions, simids=simids, workers=1, batch_size=batch_size,
+                                        outputs=["temperature"])
+            emulated = np.asarray(predicted)[(slice(None),) + index]
+            error[(slice(None),) + index] = np.abs(emulated - actual["temperature"].values).max(axis=-1)
+
+        if other_dims is None:
+            return error
+        return xr.DataArray(
+            error, dims=("simulation",) + other_dims,
+            coords={"simulation": simids, **{dim: delta.coords[dim] for dim in other_dims if dim in delta.coords}},
+            name="error", attrs={"units": "K"},
+        )
+
+    def to_dataset(self):
+        """the emulator as an xr.Dataset, e.g. to save with `to_netcdf`"""
+        # the kernels are of fewer gases than the emissions
+        ds = xr.Dataset({"emissions": self.emissions.rename(gas="column"), "baseline": self.baseline,
+                         "kernel": self.kernels})
+        if self.error is not None:
+            ds["error"] = self.error
+        return ds
+
+    @classmethod
+    def from_dataset(cls, ds):
+        """an emulator saved with `to_dataset`"""
+        return cls(emissions=ds["emissions"].rename(column="gas"), baseline=ds["baseline"], kernels=ds["kernel"],
+                   error=ds["error"] if "error" in ds else None)
+
+    def _delta_values(self, delta):
+        """[... x year x gas] values of `delta` on the years and gases of the emulator, and its other dims"""
+        shape = (len(self.years), len(self.gases))
+        if not isinstance(delta, xr.DataArray):
+            values = np.asarray(delta, dtype=float)
+            if values.shape[-2:] != shape:
+                raise ValueError(f"expected delta of shape [... x {shape[0]} x {shape[1]}], got {values.shape}")
+            return values, None
+        if "year" not in delta.dims or "gas" not in delta.dims:
+            raise ValueError(f"delta needs year and gas dimensions, got {delta.dims}")
+        unknown = set(delta["gas"].values) - set(self.gases)
+        if unknown:
+            raise ValueError(f"no kernels for {sorted(unknown)}, the emulator has {list(self.gases)}")
+        unknown = set(delta["year"].values) - set(self.years)
+        if unknown:
+            raise ValueError(f"delta has years {sorted(unknown)} outside the baseline")
+        delta = delta.reindex(year=self.years, gas=self.gases, fill_value=0.0).transpose(..., "year", "gas")
+        return np.asarray(delta.values, dtype=float), delta.dims[:-2]
+
+    def _transforms(self):
+        """
+            FFT length, [pulse_year x year] interpolation weights and the
+            [frequency x (pulse_year, gas) x simulation] transform of the kernels,
+            computed on first use
+        """
+        if self._transformed is None:
+            nt = len(self.years)
+            nfft = 2 ** int(np.ceil(np.log2(2 * nt)))
+            weights = _interpolation_weights(self.years, self.kernels["pulse_year"].values)
+            kernel_fft = np.fft.rfft(self.kernels.transpose("simulation", "pulse_year", "gas", "lag").values,
+                                     n=nfft, axis=-1)
+            kernel_fft = kernel_fft.reshape(len(kernel_fft), -1, nfft // 2 + 1).transpose(2, 1, 0)
+            self._transformed = (nfft, weights, np.ascontiguousarray(kernel_fft))
+        return self._transformed
+
+
+def _interpolation_weights(years, pulse_years):
+    """[pulse_year x year] weights of the pulse years for every year, linear between them"""
+    weights = np.zeros((len(pulse_years), len(years)))
+    position = np.interp(years, pulse_years, np.arange(len(pulse_years)))
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, len(pulse_years) - 1)
+    fraction = position - lower
+    columns = np.arange(len(years))
+    weights[lower, columns] += 1 - fraction
+    weights[upper, columns] += fraction
+    return weights
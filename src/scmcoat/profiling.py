@@ -0,0 +1,202 @@
+"""
+    profiling.py
+    October 16 2026
+
+    Per-stage timing and allocation statistics of FairModel runs.
+"""
+import sys
+import copy
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from time import perf_counter
+
+import pandas as pd
+
+# stages of a FairModel run, in order
+STAGES = ("prepare", "params", "cache", "model", "output")
+
+
+@dataclass
+class StageStats:
+    """
+        Aggregated statistics of one stage. `allocated` (net bytes still allocated
+        at the end of the stage) and `peak` (largest traced memory above the start
+        of the stage) are only counted with `track_allocations`.
+    """
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    allocated: int = 0
+    peak: int = 0
+
+    def add(self, other):
+        self.calls += other.calls
+        self.seconds += other.seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        self.allocated += other.allocated
+        self.peak = max(self.peak, other.peak)
+
+
+class RunStats:
+    """
+        Wall-clock time and allocations of the stages of FairModel runs, aggregated
+        across runs. `runs` counts members: a batch of members is one run of each.
+
+        Stages are "prepare" (emissions and option checks), "params" (selecting and
+        compiling climate parameters), "cache" (result cache lookups), "model" (FaIR
+        itself) and "output" (FairResult and xarray assembly).
+
+        Parameters
+        ----------
+        callback : callable, optional
+            called as `callback(stage, seconds, allocated)` after every stage that runs
+            in this process.
+        track_allocations : bool, optional
+            if True, count allocations of every stage with tracemalloc, which slows
+            runs down.
+        profile : str, optional
+            "cprofile" or "tracemalloc" to profile one whole run, number `profile_run`
+            (0 is the first), or the whole batch it is part of; the result is kept in
+            `profile_result` as a `pstats.Stats` or a `tracemalloc.Snapshot`.
+        profile_run : int, optional
+            index of the run to profile.
+
+        Examples
+        --------
+        >>> stats = RunStats(profile="cprofile")
+        >>> fm = FairModel(cp, stats=stats)
+        >>> fm.run_ensemble(emissions)
+        >>> stats.summary()
+        >>> stats.profile_result.sort_stats("cumulative").print_stats(10)
+    """
+
+    def __init__(self, callback=None, track_allocations=False, profile=None, profile_run=0):
+        if profile not in (None, "cprofile", "tracemalloc"):
+            raise ValueError(f"profile must be None, 'cprofile' or 'tracemalloc', got {profile!r}")
+        self.callback = callback
+        self.track_allocations = track_allocations
+        self.profile = profile
+        self.profile_run = profile_run
+        self.reset()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(runs={self.runs}, stages={list(self.stages)})"
+
+    def __getstate__(self):
+        # process-pool workers get the configuration and send their statistics back
+        state = self.__dict__.copy()
+        state["callback"] = None
+        if isinstance(self.profile_result, pstats.Stats):
+            # the output stream of pstats.Stats does not pickle
+            state["profile_result"] = copy.copy(self.profile_result)
+            state["profile_result"].stream = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if isinstance(self.profile_result, pstats.Stats):
+            self.profile_result.stream = sys.stdout
+
+    def reset(self):
+        """forget all statistics"""
+        self.runs = 0
+        self.stages = {}
+        self.profile_result = None
+        self._depth = 0
+
+    @contextmanager
+    def run(self, n=1):
+        """
+            count a run, or a batch of `n` member runs; nested runs (e.g. the members
+            of a batch) are part of the outer one
+        """
+        self._depth += 1
+        profiler = None
+        if self._depth == 1 and self.profile is not None and self.runs <= self.profile_run < self.runs + n:
+            profiler = _start_profile(self.profile)
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                if profiler is not None:
+                    self.profile_result = _stop_profile(self.profile, profiler)
+                self.runs += n
+
+    @contextmanager
+    def stage(self, name):
+        """time, and with `track_allocations` trace, the stage `name`"""
+        if self.track_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            seconds = perf_counter() - start
+            allocated = peak = 0
+            if self.track_allocations:
+                current, peak = tracemalloc.get_traced_memory()
+                allocated = current - start_memory
+                peak = peak - start_memory
+            self._record(name, StageStats(1, seconds, seconds, allocated, peak))
+            if self.callback is not None:
+                self.callback(name, seconds, allocated)
+
+    def merge(self, other):
+        """add the statistics of `other`, e.g. from another process"""
+        self.runs += other.runs
+        for name, stats in other.stages.items():
+            self._record(name, stats)
+        if self.profile_result is None:
+            self.profile_result = other.profile_result
+
+    def summary(self):
+        """per-stage statistics as a pandas.DataFrame"""
+        rows = {
+            name: {
+                "calls": stats.calls,
+                "total_s": stats.seconds,
+                "mean_s": stats.seconds / stats.calls,
+                "max_s": stats.max_seconds,
+                "allocated_bytes": stats.allocated,
+                "peak_bytes": stats.peak,
+            }
+            for name, stats in sorted(self.stages.items(), key=lambda item: _stage_order(item[0]))
+        }
+        df = pd.DataFrame.from_dict(rows, orient="index")
+        df.index.name = "stage"
+        return df
+
+    def _record(self, name, stats):
+        self.stages.setdefault(name, StageStats()).add(stats)
+
+
+def _stage_order(name):
+    return STAGES.index(name) if name in STAGES else len(STAGES)
+
+
+def _start_profile(kind):
+    if kind == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    return started
+
+
+def _stop_profile(kind, profiler):
+    if kind == "cprofile":
+        profiler.disable()
+        return pstats.Stats(profiler)
+    snapshot = tracemalloc.take_snapshot()
+    if profiler:
+        tracemalloc.stop()
+    return snapshot
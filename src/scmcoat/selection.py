@@ -0,0 +1,198 @@
+"""
+    selection.py
+    October 16 2026
+
+    Small, weighted subsets of ClimateParams members that stand in for the whole
+    ensemble.
+
+    Without a reference run, members are stratified on the ranks of derived
+    quantities, ECS and TCR, and one member represents every stratum with the
+    weight of its share of the ensemble. With a reference run of the full
+    ensemble, members and weights are fit so that the weighted quantiles of the
+    subset match those of the reference.
+"""
+import numpy as np
+import xarray as xr
+from scipy.optimize import nnls
+
+from scmcoat.core import ClimateParams, DEFAULT_QUANTILES
+
+
+def derived_quantities(params):
+    """
+        Equilibrium (ECS) and transient climate response (TCR) of ClimateParams
+        members, in K, from their two-layer ocean parameters.
+
+        Parameters
+        ----------
+        params : xr.Dataset
+            `ClimateParams.params`.
+
+        Returns
+        -------
+        xr.Dataset
+            `ecs` and `tcr` along `simulation`. TCR uses the fast-response
+            approximation of Held et al. (2010), F2x / (lambda + efficacy * gamma).
+    """
+    F2x = params["F2x"] * params["scale"].isel(forcing_type=0, drop=True)
+    ecs = F2x / params["lambda_global"]
+    tcr = F2x / (params["lambda_global"] + params["deep_ocean_efficacy"] * params["ocean_heat_exchange"])
+    return xr.Dataset({"ecs": ecs, "tcr": tcr})
+
+
+def select_representative(climateparams, n, reference=None, quantiles=DEFAULT_QUANTILES):
+    """
+        A ClimateParams of `n` representative members, weighted.
+
+        Parameters
+        ----------
+        climateparams : ClimateParams
+            the full ensemble.
+        n : int
+            number of members to keep.
+        reference : xr.DataArray, optional
+            an output of the full ensemble with a `simulation` dimension, e.g. the
+            `temperature` of `FairModel.run_ensemble` over the years that matter.
+            If given, members and weights are fit to reproduce its `quantiles`,
+            and fewer than `n` members may be kept. Otherwise, members are
+            stratified on ECS and TCR and weighted by the size of their stratum.
+        quantiles : sequence of float, optional
+            quantiles of `reference` to reproduce.
+
+        Returns
+        -------
+        ClimateParams
+            the selected members, with `weights` that sum to 1. With a `reference`,
+            `weights.attrs["max_quantile_error"]` holds the largest difference
+            between the weighted quantiles of the selected members and the
+            quantiles of `reference`, in its units.
+    """
+    params = climateparams.params
+    size = params.sizes["simulation"]
+    if not 0 < n <= size:
+        raise ValueError(f"n must be within 1-{size}, got {n}")
+
+    attrs = {}
+    if reference is None:
+        derived = derived_quantities(params)
+        features = np.stack([_ranks(derived["ecs"].values), _ranks(derived["tcr"].values)], axis=1)
+        strata = _stratify(features, np.arange(size), n)
+        # the member closest to the middle of its stratum
+        members = np.array([
+            stratum[np.argmin(((features[stratum] - features[stratum].mean(axis=0)) ** 2).sum(axis=1))]
+            for stratum in strata
+        ])
+        weights = np.array([len(stratum) for stratum in strata], dtype=float) / size
+    else:
+        members, weights, attrs["max_quantile_error"] = _calibrate(
+            _reference_values(reference, params), n, np.asarray(quantiles, dtype=float))
+
+    order = np.argsort(members)
+    members, weights = members[order], weights[order]
+    simulation = params["simulation"].values[members]
+    return ClimateParams(
+        params=params.isel(simulation=members),
+        weights=xr.DataArray(weights, dims="simulation", coords={"simulation": simulation}, name="weight",
+                             attrs=attrs),
+    )
+
+
+def weighted_quantiles(values, weights, quantiles):
+    """
+        [quantile x row] quantiles of members `values` [simulation x row] with
+        `weights`, as reported by EnsembleSummary: every member sits at the middle
+        of its weight, and the extremes at either end. Without weights, this is
+        numpy's "hazen" method.
+    """
+    from scmcoat.summary import _centroid_quantiles
+
+    values = np.asarray(values, dtype=float).reshape(len(values), -1)
+    weights = np.broadcast_to(np.asarray(weights, dtype=float), (values.shape[1], values.shape[0]))
+    return _centroid_quantiles(values.T, weights, values.min(axis=0), values.max(axis=0),
+                               np.asarray(quantiles, dtype=float))
+
+
+def _reference_values(reference, params):
+    """[simulation x row] values of `reference` for the members of `params`"""
+    if "simulation" not in reference.dims:
+        raise ValueError("reference needs a simulation dimension")
+    reference = reference.sel(simulation=params["simulation"].values).transpose("simulation", ...)
+    values = np.asarray(reference.values, dtype=float).reshape(reference.sizes["simulation"], -1)
+    # rows without spread say nothing about the ordering of members
+    return values[:, values.std(axis=0) > 0]
+
+
+def _ranks(values):
+    """ranks of `values` along the first axis, scaled to [0, 1]"""
+    ranks = np.argsort(np.argsort(values, axis=0, kind="stable"), axis=0, kind="stable")
+    return ranks / max(len(values) - 1, 1)
+
+
+def _stratify(features, indices, n):
+    """
+        split `indices` into `n` strata of about equal size: equal-count bins of
+        the first of `features` [member x feature], each split on the remaining
+        features in proportion to its size
+    """
+    if n == 1:
+        return [indices]
+    nfeature = features.shape[1]
+    nbin = n if nfeature == 1 else max(1, min(n, int(round(n ** (1 / nfeature)))))
+    order = indices[np.argsort(features[indices, 0], kind="stable")]
+    bins = np.array_split(order, nbin)
+    if nfeature == 1:
+        return bins
+
+    # largest remainder allocation of the strata, at least one per bin
+    shares = np.array([len(b) for b in bins]) * n / len(indices)
+    counts = np.maximum(np.floor(shares).astype(int), 1)
+    for i in np.argsort(counts - shares)[:max(n - counts.sum(), 0)]:
+        counts[i] += 1
+    return [stratum for b, count in zip(bins, counts) for stratum in _stratify(features[:, 1:], b, count)]
+
+
+def _calibrate(values, n, quantiles):
+    """
+        up to `n` members of `values` [simulation x row], their weights and the
+        largest error of their weighted quantiles
+
+        Non-negative least squares on all members picks a sparse set that matches
+        the quantiles on a subset of evenly spaced rows; the `n` heaviest are
+        refit. Fewer rows fit more closely on them but generalize worse to the
+        others, and fitting quantiles just either side of the targets as well
+        keeps members close to them, so a few variants are tried and the best on
+        all rows is kept.
+    """
+    targets = weighted_quantiles(values, np.ones(len(values)), quantiles)
+    best = None
+    for spread in (0.0, 0.02):
+        fit_quantiles = np.unique(np.clip(np.concatenate([quantiles - spread, quantiles, quantiles + spread]), 0, 1))
+        fit_targets = weighted_quantiles(values, np.ones(len(values)), fit_quantiles)
+        nrows = {min(values.shape[1], int(np.ceil(n * k / len(fit_quantiles)))) for k in (1, 2, 5)}
+        for nrow in sorted(nrows):
+            rows = np.unique(np.linspace(0, values.shape[1] - 1, nrow).round().astype(int))
+            weights = _fit_weights(values[:, rows], fit_targets[:, rows], fit_quantiles)
+            members = np.argsort(weights, kind="stable")[::-1][:n]
+            members = members[weights[members] > 0]
+            weights = _fit_weights(values[members][:, rows], fit_targets[:, rows], fit_quantiles)
+            members, weights = members[weights > 0], weights[weights > 0]
+            error = np.abs(weighted_quantiles(values[members], weights, quantiles) - targets).max()
+            if best is None or error < best[2]:
+                best = (members, weights, float(error))
+    return best
+
+
+def _fit_weights(values, targets, quantiles):
+    """
+        non-negative weights, summing to 1, for which the weighted fraction of the
+        members `values` [member x row] below every target quantile [quantile x row]
+        is closest to the quantile
+    """
+    n = len(values)
+    below = (values[:, np.newaxis] < targets[np.newaxis]) + 0.5 * (values[:, np.newaxis] == targets[np.newaxis])
+    A = below.reshape(n, -1).T
+    b = np.repeat(quantiles, targets.shape[1])
+    # weigh the sum of the weights like all quantile rows together
+    scale = np.sqrt(len(b))
+    weights, _ = nnls(np.vstack([A, scale * np.ones((1, n))]), np.concatenate([b, [scale]]))
+    return weights / weights.sum()
@@ -0,0 +1,395 @@
+"""
+    server.py
+    October 16 2026
+
+    A long-lived local service that runs FairModel for many small clients.
+
+    `BatchServer` keeps a FairModel, its compiled ClimateParams and its workers
+    warm, and serves run requests over a Unix socket or localhost TCP. Requests
+    that arrive close together are coalesced into one batch of members, each
+    with its own emissions, so a vectorized engine steps them all at once.
+    `BatchClient` sends requests and receives results as raw arrays.
+
+    Messages are a 4-byte big-endian header length, a JSON header that lists
+    the arrays that follow by name, dtype and shape, and their bytes.
+"""
+import asyncio
+import json
+import socket
+import struct
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import count
+
+import numpy as np
+
+_HEADER = struct.Struct(">I")
+
+DEFAULT_ADDRESS = ("127.0.0.1", 8765)
+
+
+class BatchServer:
+    """
+        Serve FairModel runs to local clients, coalescing concurrent requests.
+
+        A request holds emissions [year x gas], with the `EMISSIONS_COLUMNS` as
+        gases, the `simulation` labels of the members to run with them and the
+        output variables to return. Requests queued within `max_delay` of each
+        other, up to `max_batch` members, are run together; every member keeps its
+        request's emissions.
+
+        Parameters
+        ----------
+        model : FairModel
+            the model to run, with ClimateParams. The vectorized engine runs a
+            coalesced batch at once; the fair engine runs its members in turn.
+        address : str or tuple, optional
+            path of a Unix socket, or (host, port) to listen on. Port 0 picks a
+            free port, available as `address` once started.
+        max_batch : int, optional
+            number of members after which a batch is dispatched without waiting.
+        max_delay : float, optional
+            seconds to wait for more requests after the first of a batch.
+        workers : int, optional
+            number of worker processes, each with its own copy of `model`. If 1,
+            batches run in a thread of this process.
+
+        Examples
+        --------
+        >>> server = BatchServer(FairModel(cp, engine="vectorized"), address="/tmp/scmcoat.sock")
+        >>> server.serve()  # until stop()
+
+        and, in any number of other processes,
+
+        >>> with BatchClient("/tmp/scmcoat.sock") as client:
+        ...     ds = client.run(emissions, simids=range(100))
+    """
+
+    def __init__(self, model, address=DEFAULT_ADDRESS, max_batch=1024, max_delay=0.005, workers=1):
+        if model.params is None:
+            raise ValueError("BatchServer requires a FairModel with ClimateParams")
+        self.model = model
+        self.address = address
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.workers = workers
+        self.requests = 0
+        self.batches = 0
+        self.members = 0
+        self._simids = set(model.params.params["simulation"].values.tolist())
+        self._server = None
+        self._executor = None
+        self._queue = None
+        self._dispatcher = None
+        self._connections = {}
+        self._tasks = set()
+        self._loop = None
+        self._stopped = None
+
+    def __repr__(self):
+        return (f"{type(self).__name__}(address={self.address!r}, requests={self.requests}, "
+                f"batches={self.batches}, members={self.members})")
+
+    async def start(self):
+        """start listening and dispatching, in the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        if self.workers == 1:
+            _init_server_worker(self.model)
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        else:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_server_worker,
+                                                 initargs=(self.model,))
+        if isinstance(self.address, str):
+            self._server = await asyncio.start_unix_server(self._handle, path=self.address)
+        else:
+            host, port = self.address
+            self._server = await asyncio.start_server(self._handle, host=host, port=port)
+            self.address = self._server.sockets[0].getsockname()[:2]
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def close(self):
+        """stop listening, and shut down the workers"""
+        self._server.close()
+        # end open connections at their next message
+        for writer in list(self._connections.values()):
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+        self._dispatcher.cancel()
+        # let batches already handed to the workers resolve their requests
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+
+    def serve(self, ready=None):
+        """
+            Run the server until `stop` is called, e.g. from another thread. `ready`,
+            a threading.Event, is set once the server listens.
+        """
+        async def main():
+            self._stopped = asyncio.Event()
+            await self.start()
+            if ready is not None:
+                ready.set()
+            await self._stopped.wait()
+            await self.close()
+
+        asyncio.run(main())
+
+    def stop(self):
+        """make `serve` return, from any thread"""
+        self._loop.call_soon_threadsafe(self._stopped.set)
+
+    async def _handle(self, reader, writer):
+        """answer the requests of one connection, in the order they finish"""
+        tasks = set()
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    header, arrays = await _read_message(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                task = asyncio.create_task(self._answer(header, arrays, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            del self._connections[asyncio.current_task()]
+            writer.close()
+
+    async def _answer(self, header, arrays, writer):
+        """run one request and write its result, or its error"""
+        try:
+            request = self._request(header, arrays)
+            self.requests += 1
+            await self._queue.put(request)
+            year, outputs = await request.result
+            reply = {"id": header.get("id"), "simulation": request.simids}
+            dtype = np.dtype(header.get("dtype", "float64"))
+            data = {"year": year}
+            data.update({name: values.astype(dtype, copy=False) for name, values in outputs.items()})
+        except Exception as exc:
+            reply, data = {"id": header.get("id"), "error": f"{type(exc).__name__}: {exc}"}, {}
+        writer.write(_encode_message(reply, data))
+        await writer.drain()
+
+    def _request(self, header, arrays):
+        """validate a request before it joins a batch"""
+        from scmcoat.core import OUTPUT_VARIABLES, EMISSIONS_COLUMNS
+
+        emiss = arrays.get("emissions")
+        if emiss is None or emiss.ndim != 2 or emiss.shape[1] != len(EMISSIONS_COLUMNS):
+            raise ValueError(f"expected emissions [year x {len(EMISSIONS_COLUMNS)}]")
+        simids = header.get("simids") or []
+        unknown = set(simids) - self._simids
+        if unknown or not simids:
+            raise KeyError(f"unknown simulation labels {sorted(unknown)}" if unknown else "no simids given")
+        outputs = tuple(header.get("outputs") or ("temperature",))
+        for name in outputs:
+            if name not in OUTPUT_VARIABLES:
+                raise ValueError(f"unknown output variable {name!r}, expected some of {OUTPUT_VARIABLES}")
+        return _Request(np.ascontiguousarray(emiss, dtype=float), simids, outputs, self._loop.create_future())
+
+    async def _dispatch(self):
+        """collect queued requests into batches and hand them to the workers"""
+        while True:
+            batch = [await self._queue.get()]
+            nmembers = len(batch[0].simids)
+            deadline = self._loop.time() + self.max_delay
+            while nmembers < self.max_batch:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(request)
+                nmembers += len(request.simids)
+
+            # only emissions of the same years can be stepped together
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.emiss[:, 0].tobytes(), []).append(request)
+            for requests in groups.values():
+                task = asyncio.create_task(self._run(requests))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, requests):
+        """run a group of requests as one batch and resolve their results"""
+        outputs = tuple(sorted({name for request in requests for name in request.outputs}))
+        emiss = np.concatenate([np.broadcast_to(r.emiss, (len(r.simids),) + r.emiss.shape) for r in requests])
+        simids = [simid for request in requests for simid in request.simids]
+        self.batches += 1
+        self.members += len(simids)
+        try:
+            result = await self._loop.run_in_executor(self._executor, _run_server_batch, emiss, simids, outputs)
+        except Exception as exc:
+            for request in requests:
+                request.result.set_exception(exc)
+            return
+
+        start = 0
+        for request in requests:
+            members = slice(start, start + len(request.simids))
+            start = members.stop
+            request.result.set_result((result.year, {name: getattr(result, name)[members]
+                                                     for name in request.outputs}))
+
+
+class BatchClient:
+    """
+        Send run requests to a BatchServer.
+
+        Parameters
+        ----------
+        address : str or tuple, optional
+            the `address` of the server.
+        timeout : float, optional
+            seconds to wait for a result.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=None):
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self.address = address
+        self._socket = socket.socket(family, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(address if isinstance(address, str) else tuple(address))
+        self._file = self._socket.makefile("rb")
+        self._ids = count()
+        self._results = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(address={self.address!r})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def submit(self, emissions, simids, outputs=("temperature",), dtype="float64"):
+        """
+            Send a request without waiting for its result; returns the id to pass to
+            `result`. Submitting several requests before collecting their results
+            lets the server batch them together.
+
+            Parameters
+            ----------
+            emissions : np.ndarray or xarray.DataArray or pandas.DataFrame
+                emissions with dims [year x gas]. Arrays must have the
+                `EMISSIONS_COLUMNS` as columns, which labelled emissions are put into.
+            simids : list-like
+                `simulation` labels of the members to run.
+            outputs : sequence of str, optional
+                output variables to return.
+            dtype : str, optional
+                dtype of the returned arrays; "float32" halves their size.
+        """
+        if not isinstance(emissions, np.ndarray):
+            from scmcoat.core import _prepare_emissions
+
+            emissions = _prepare_emissions(emissions)
+            if emissions.scenario is not None:
+                raise ValueError("submit the scenarios of emissions separately")
+            emissions = emissions.values
+        request_id = next(self._ids)
+        header = {"id": request_id, "simids": np.asarray(simids).tolist(), "outputs": list(outputs),
+                  "dtype": dtype}
+        self._socket.sendall(_encode_message(header, {"emissions": np.asarray(emissions, dtype=float)}))
+        return request_id
+
+    def result(self, request_id, return_xr=True):
+        """
+            The result of a submitted request: an xr.Dataset like that of
+            `FairModel.run_ensemble`, or with `return_xr=False` a dict of the `year`
+            and output arrays [simulation x year ...], in the order of its simids.
+        """
+        while request_id not in self._results:
+            header, arrays = _read_message_sync(self._file)
+            self._results[header["id"]] = (header, arrays)
+        header, arrays = self._results.pop(request_id)
+        if "error" in header:
+            raise RuntimeError(f"request {request_id} failed: {header['error']}")
+        if not return_xr:
+            return arrays
+        from scmcoat.core import FairResult
+
+        return FairResult(simulation=np.asarray(header["simulation"]), **arrays).to_dataset()
+
+    def run(self, emissions, simids, outputs=("temperature",), dtype="float64", return_xr=True):
+        """submit a request and wait for its result; see `submit` and `result`"""
+        return self.result(self.submit(emissions, simids, outputs=outputs, dtype=dtype), return_xr=return_xr)
+
+
+@dataclass
+class _Request:
+    """a validated request waiting for its batch"""
+    emiss: np.ndarray
+    simids: list
+    outputs: tuple
+    result: asyncio.Future = field(repr=False)
+
+
+# the model of BatchServer worker processes, set once per process by the pool initializer
+_server_worker = {}
+
+
+def _init_server_worker(model):
+    _server_worker["model"] = model
+
+
+def _run_server_batch(emiss, simids, outputs):
+    """FairResult of members with their own emissions"""
+    return _server_worker["model"]._run_members(emiss, simids, outputs=outputs)
+
+
+def _encode_message(header, arrays):
+    """bytes of a message with the JSON `header` and the `arrays`, a dict of name to ndarray"""
+    arrays = {name: np.ascontiguousarray(x) for name, x in arrays.items()}
+    header = dict(header, arrays=[[name, x.dtype.str, list(x.shape)] for name, x in arrays.items()])
+    encoded = json.dumps(header).encode()
+    return b"".join([_HEADER.pack(len(encoded)), encoded] + [x.tobytes() for x in arrays.values()])
+
+
+def _payload_size(header):
+    """number of bytes of the arrays listed in a message `header`"""
+    return sum(np.dtype(dtype).itemsize * int(np.prod(shape)) for _, dtype, shape in header["arrays"])
+
+
+def _decode_arrays(header, payload):
+    """the arrays listed in a message `header`, without copying them out of `payload`"""
+    arrays = {}
+    offset = 0
+    for name, dtype, shape in header.pop("arrays"):
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape))
+        arrays[name] = np.frombuffer(payload, dtype=dtype, count=size, offset=offset).reshape(shape)
+        offset += dtype.itemsize * size
+    return arrays
+
+
+async def _read_message(reader):
+    """header and arrays of the next message of an asyncio stream"""
+    (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    header = json.loads(await reader.readexactly(length))
+    return header, _decode_arrays(header, await reader.readexactly(_payload_size(header)))
+
+
+def _read_message_sync(file):
+    """header and arrays of the next message of a socket file"""
+    def read(nbytes):
+        data = file.read(nbytes)
+        if len(data) < nbytes:
+            raise ConnectionError("the server closed the connection")
+        return data
+
+    (length,) = _HEADER.unpack(read(_HEADER.size))
+    header = json.loads(read(length))
+    return header, _decode_arrays(header, read(_payload_size(header)))
@@ -0,0 +1,268 @@
+"""
+    summary.py
+    October 16 2026
+
+    Streaming summary statistics of FairModel ensembles.
+
+    `EnsembleSummary` folds in batches of members as they finish and keeps only
+    O(years) state per variable: exact moments, extremes and exceedance counts,
+    and a mergeable quantile sketch (a merging t-digest, vectorized over years).
+"""
+import numpy as np
+import xarray as xr
+
+from scmcoat.core import FairResult, OUTPUT_VARIABLES, DEFAULT_QUANTILES
+
+
+class EnsembleSummary:
+    """
+        Mean, standard deviation, extremes, quantiles and exceedance probabilities
+        of ensemble outputs, updated a batch of members at a time.
+
+        Moments, extremes and exceedance probabilities are exact. Quantiles are
+        exact (numpy's "hazen" method) for up to `2 * compression` members, and
+        estimated from a t-digest of `compression` centroids per year beyond that,
+        which is most accurate in the tails. Summaries of disjoint sets of members
+        can be merged, in any order. Members can be weighted, e.g. by the
+        `weights` of a representative ClimateParams subset.
+
+        Parameters
+        ----------
+        variables : sequence of str, optional
+            output variables to summarize, "temperature" by default.
+        quantiles : sequence of float, optional
+            quantiles to report, in [0, 1].
+        thresholds : sequence of float or dict, optional
+            report the fraction of members above these temperature thresholds, or
+            thresholds per variable as `{variable: thresholds}`.
+        compression : int, optional
+            number of quantile sketch centroids kept per year.
+
+        Examples
+        --------
+        >>> summary = EnsembleSummary(thresholds=[1.5, 2.0])
+        >>> fm.run_ensemble(emissions, summary=summary)
+        >>> summary.to_dataset().temperature.plot.line(x="year")
+    """
+
+    def __init__(self, variables=("temperature",), quantiles=DEFAULT_QUANTILES, thresholds=None, compression=200):
+        variables = tuple(variables)
+        for name in variables:
+            if name not in OUTPUT_VARIABLES:
+                raise ValueError(f"unknown output variable {name!r}, expected some of {OUTPUT_VARIABLES}")
+        if thresholds is None:
+            thresholds = {}
+        elif not isinstance(thresholds, dict):
+            thresholds = {"temperature": thresholds}
+        for name in thresholds:
+            if name not in variables:
+                raise ValueError(f"thresholds given for {name!r}, which is not summarized")
+        quantiles = np.asarray(quantiles, dtype=float)
+        if np.any((quantiles < 0) | (quantiles > 1)):
+            raise ValueError("quantiles must be in [0, 1]")
+
+        self.variables = variables
+        self.quantiles = quantiles
+        self.thresholds = {name: np.asarray(values, dtype=float) for name, values in thresholds.items()}
+        self.compression = compression
+        self.reset()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(variables={self.variables}, count={self.count})"
+
+    def reset(self):
+        """forget all members"""
+        self.count = 0
+        self.weight = 0.0
+        self.year = None
+        self._trailing = {}
+        self._state = {}
+
+    def empty(self):
+        """a summary with the same configuration and no members"""
+        other = type(self).__new__(type(self))
+        other.variables = self.variables
+        other.quantiles = self.quantiles
+        other.thresholds = self.thresholds
+        other.compression = self.compression
+        other.reset()
+        return other
+
+    def update(self, result, weights=None):
+        """
+            Fold in the members of `result`.
+
+            Parameters
+            ----------
+            result : FairResult
+                output of `FairModel.run` or `FairModel.run_ensemble` with
+                `return_xr=False`, holding every variable in `variables`.
+            weights : array-like, optional
+                weight of every member of `result`, 1 by default.
+        """
+        if result.scenario is not None:
+            raise ValueError("summarize the scenarios of a FairResult separately")
+        if np.ndim(result.simulation) == 0:
+            result = result._with_simulation_axis()
+
+        batch = self.empty()
+        batch.count = len(result.simulation)
+        weights = np.ones(batch.count) if weights is None else np.asarray(weights, dtype=float).reshape(-1)
+        if weights.shape != (batch.count,) or np.any(weights < 0):
+            raise ValueError(f"expected {batch.count} non-negative weights, got {weights.shape}")
+        batch.weight = weights.sum()
+        batch.year = np.asarray(result.year)
+        for name in self.variables:
+            values = getattr(result, name)
+            if values is None:
+                raise ValueError(f"{name!r} is not in the result, run with it in `outputs`")
+            batch._trailing[name] = values.shape[1:]
+            batch._state[name] = _batch_state(values.reshape(batch.count, -1), weights, self.thresholds.get(name))
+        self.merge(batch)
+
+    def merge(self, other):
+        """add the members of `other`, e.g. summarized by another process"""
+        if other.count == 0:
+            return
+        if (other.variables, other.compression) != (self.variables, self.compression):
+            raise ValueError("cannot merge summaries of different variables or compression")
+        if self.count == 0:
+            self.count = other.count
+            self.weight = other.weight
+            self.year = other.year
+            self._trailing = dict(other._trailing)
+            self._state = {name: dict(state) for name, state in other._state.items()}
+            return
+        if not np.array_equal(self.year, other.year):
+            raise ValueError("cannot merge summaries of different years")
+
+        # moments are merged by total weight, which is the count of unweighted members
+        na, nb = self.weight, other.weight
+        n = na + nb
+        for name in self.variables:
+            a, b = self._state[name], other._state[name]
+            delta = b["mean"] - a["mean"]
+            means, weights = _merge_centroids(a["means"], a["weights"], b["means"], b["weights"], self.compression)
+            self._state[name] = {
+                "mean": a["mean"] + delta * nb / n,
+                "m2": a["m2"] + b["m2"] + delta**2 * na * nb / n,
+                "min": np.minimum(a["min"], b["min"]),
+                "max": np.maximum(a["max"], b["max"]),
+                "exceed": None if a["exceed"] is None else a["exceed"] + b["exceed"],
+                "means": means,
+                "weights": weights,
+            }
+        self.count += other.count
+        self.weight = n
+
+    def to_dataset(self):
+        """
+            The summary as an xr.Dataset: every variable holds its quantiles along
+            a `quantile` dimension, with `<variable>_mean`, `_std` (ddof=0), `_min`
+            and `_max`, `<variable>_exceedance` along `<variable>_threshold` if
+            thresholds were given, and the number of members in `count`.
+        """
+        if self.count == 0:
+            raise ValueError("no members have been summarized yet")
+
+        def as_dataarray(name, values, dim=None, labels=None):
+            # FairResult knows the dims and coords of every variable
+            if dim is None:
+                ds = FairResult(year=self.year, simulation="", **{name: values}).to_dataset()
+                return ds[name]
+            ds = FairResult(year=self.year, simulation=labels, **{name: values}).to_dataset()
+            return ds[name].rename(simulation=dim)
+
+        data_vars = {}
+        for name in self.variables:
+            state = self._state[name]
+            shape = (-1,) + self._trailing[name]
+            quantiles = _centroid_quantiles(state["means"], state["weights"], state["min"], state["max"],
+                                            self.quantiles)
+            data_vars[name] = as_dataarray(name, quantiles.reshape(shape), "quantile", self.quantiles)
+            for stat, values in [("mean", state["mean"]),
+                                 ("std", np.sqrt(state["m2"] / self.weight)),
+                                 ("min", state["min"]),
+                                 ("max", state["max"])]:
+                data_vars[f"{name}_{stat}"] = as_dataarray(name, values.reshape(shape[1:]))
+            if state["exceed"] is not None:
+                exceedance = (state["exceed"] / self.weight).reshape(shape)
+                data_vars[f"{name}_exceedance"] = as_dataarray(name, exceedance, f"{name}_threshold",
+                                                               self.thresholds[name])
+        data_vars["count"] = self.count
+        return xr.Dataset(data_vars)
+
+
+def _batch_state(values, weights, thresholds):
+    """summary state of the members `values` [simulation x row] with `weights`"""
+    w = weights[:, np.newaxis]
+    # a batch of weightless members adds nothing
+    mean = (w * values).sum(axis=0) / (weights.sum() or 1.0)
+    return {
+        "mean": mean,
+        "m2": (w * (values - mean) ** 2).sum(axis=0),
+        "min": values.min(axis=0),
+        "max": values.max(axis=0),
+        "exceed": None if thresholds is None else (w * (values[np.newaxis] > thresholds[:, None, None])).sum(axis=1),
+        # every member is a centroid of its weight; sketches are [row x centroid]
+        "means": np.ascontiguousarray(values.T),
+        "weights": np.ascontiguousarray(np.broadcast_to(weights, values.shape[::-1])),
+    }
+
+
+def _merge_centroids(means_a, weights_a, means_b, weights_b, compression):
+    """
+        merge two [row x centroid] sketches and, if they have more than
+        `2 * compression` centroids, compress them to at most `compression + 1`
+        centroids per row
+    """
+    means = np.concatenate([means_a, means_b], axis=1)
+    weights = np.concatenate([weights_a, weights_b], axis=1)
+    if means.shape[1] <= 2 * compression:
+        return means, weights
+
+    order = np.argsort(means, axis=1, kind="stable")
+    means = np.take_along_axis(means, order, axis=1)
+    weights = np.take_along_axis(weights, order, axis=1)
+
+    # group centroids by the k1 scale function of their quantile, which keeps
+    # centroids small in the tails
+    cumulative = np.cumsum(weights, axis=1)
+    q = (cumulative - weights / 2) / cumulative[:, -1:]
+    nbucket = compression + 1
+    bucket = np.floor(compression * (np.arcsin(2 * q - 1) / np.pi + 0.5)).astype(int)
+    bucket = np.minimum(bucket, compression) + nbucket * np.arange(means.shape[0])[:, None]
+
+    merged_weights = np.bincount(bucket.ravel(), weights=weights.ravel(), minlength=nbucket * means.shape[0])
+    merged_sums = np.bincount(bucket.ravel(), weights=(weights * means).ravel(), minlength=merged_weights.size)
+    merged_weights = merged_weights.reshape(-1, nbucket)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        merged_means = merged_sums.reshape(-1, nbucket) / merged_weights
+
+    # move empty buckets to the end of every row
+    order = np.argsort(merged_weights == 0, axis=1, kind="stable")
+    merged_means = np.take_along_axis(merged_means, order, axis=1)
+    merged_weights = np.take_along_axis(merged_weights, order, axis=1)
+    merged_means[merged_weights == 0] = np.nan
+    return merged_means, merged_weights
+
+
+def _centroid_quantiles(means, weights, vmin, vmax, quantiles):
+    """[quantile x row] quantiles of [row x centroid] sketches, exact for centroids of weight 1"""
+    order = np.argsort(np.where(weights > 0, means, np.inf), axis=1, kind="stable")
+    means = np.take_along_axis(means, order, axis=1)
+    weights = np.take_along_axis(weights, order, axis=1)
+    # a centroid sits at the middle of its weight, the extremes at either end
+    cumulative = np.cumsum(weights, axis=1)
+    positions = cumulative - weights / 2
+
+    ret = np.empty((len(quantiles), means.shape[0]))
+    for row in range(means.shape[0]):
+        valid = weights[row] > 0
+        total = cumulative[row, -1]
+        ret[:, row] = np.interp(
+            quantiles * total,
+            np.concatenate([[0.0], positions[row, valid], [total]]),
+            np.concatenate([[vmin[row]], means[row, valid], [vmax[row]]]),
+        )
+    return ret
@@ -27,4 +27,7 @@
 #         A ClimateModel can project change in global mean surface temp given GHG emissions
 #         """
 
-#     # TODO add inverse run
\ No newline at end of file
+#     def run_inverse(self, emissions, target, start_year, **kwargs):
+#         """
+#         A ClimateModel can solve for the emissions that meet a temperature target
+#         """
\ No newline at end of file
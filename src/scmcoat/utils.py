@@ -4,8 +4,10 @@
     
     functions to prepare emissions and other helpers
 """
+import os
+import hashlib
 from functools import cache
-from json import loads as json_loads
+from json import loads as json_loads, dumps as json_dumps
 from importlib.resources import files
 
 import pandas as pd
@@ -13,87 +15,108 @@ import numpy as np
 import xarray as xr
 
 from fair.constants import molwt
-from fair.constants.general import ppm_gtc
-from fair.constants.general import EARTH_RADIUS, SECONDS_PER_YEAR
 
-from scmcoat import ClimateParams
-from scmcoat.core import FAIR_EMISSIONS_GASES
+from scmcoat.core import ClimateParams, FAIR_EMISSIONS_GASES, FAIR_CONCENTRATION_GASES
 
 # TODO: Use something more stable like a DOI link? 
+RCMIP_EMISSIONS_URL = "https://rcmip-protocols-au.s3-ap-southeast-2.amazonaws.com/v5.1.0/rcmip-emissions-annual-means-v5-1-0.csv"
+
+# endings of the RCMIP `Variable` names of the FAIR_EMISSIONS_GASES, in order
+_RCMIP_SPECIES = ['CO2|MAGICC Fossil and Industrial','CO2|MAGICC AFOLU','CH4','N2O','Sulfur','CO','VOC','NOx','BC','|OC','NH3',
+                  'CF4','C2F6','C6F14','HFC23','HFC32','HFC4310mee','HFC125','HFC134a','HFC143a',
+                  'HFC227ea','HFC245fa','SF6','CFC11','CFC12','CFC113','CFC114','CFC115','CCl4','CH3CCl3','HCFC22',
+                  'HCFC141b','HCFC142b','Halon1211','Halon1202','Halon1301','Halon2402','CH3Br','|CH3Cl']
+
+_RCMIP_UNITS = ['Gt C/year',
+                'Gt C/year',
+                'Mt CH4/yr',
+                'Mt N2/year',
+                'Mt S/year',
+                'Mt CO/yr',
+                'Mt VOC/yr',
+                'Mt N/year',
+                'Mt BC/yr',
+                'Mt OC/yr',
+                'Mt NH3/yr',
+                'kt CF4/yr',
+                'kt C2F6/yr',
+                'kt C6F14/yr',
+                'kt HFC23/yr',
+                'kt HFC32/yr',
+                'kt HFC4310mee/yr',
+                'kt HFC125/yr',
+                'kt HFC134a/yr',
+                'kt HFC143a/yr',
+                'kt HFC227ea/yr',
+                'kt HFC245fa/yr',
+                'kt SF6/yr',
+                'kt CFC11/yr',
+                'kt CFC12/yr',
+                'kt CFC113/yr',
+                'kt CFC114/yr',
+                'kt CFC115/yr',
+                'kt CCl4/yr',
+                'kt CH3CCl3/yr',
+                'kt HCFC22/yr',
+                'kt HCFC141b/yr',
+                'kt HCFC142b/yr',
+                'kt Halon1211/yr',
+                'kt Halon1202/yr',
+                'kt Halon1301/yr',
+                'kt Halon2402/yr',
+                'kt CH3Br/yr',
+                'kt CH3Cl/yr']
+
+
 @cache
-def download_emissions_csv(url="https://rcmip-protocols-au.s3-ap-southeast-2.amazonaws.com/v5.1.0/rcmip-emissions-annual-means-v5-1-0.csv"):
+def download_emissions_csv(url=RCMIP_EMISSIONS_URL):
     return pd.read_csv(url)
 
+
+def rcmip_emissions_store_path() -> str:
+    """
+    Path of the RCMIP emissions store: `SCMCOAT_RCMIP_EMISSIONS` if set, else a file
+    in the scmcoat cache directory (see `_climateparams_cache_dir`)
+    """
+    path = os.environ.get("SCMCOAT_RCMIP_EMISSIONS")
+    if path is None:
+        path = os.path.join(_climateparams_cache_dir(), "rcmip-emissions-annual-means-v5-1-0.npz")
+    return path
+
+
 # This code credited to Chris Smith AR6 repo
 # From https://github.com/chrisroadmap/ar6/blob/main/notebooks/190_WG3_run-constrained-fair-ensemble-concentration-driven.ipynb
 #   from the SSP245 cell
-def rcmip_emissions(scenario):
-    
-    units = ['Gt C/year',
-             'Gt C/year',
-             'Mt CH4/yr',
-             'Mt N2/year',
-             'Mt S/year',
-             'Mt CO/yr',
-             'Mt VOC/yr',
-             'Mt N/year',
-             'Mt BC/yr',
-             'Mt OC/yr',
-             'Mt NH3/yr',
-             'kt CF4/yr',
-             'kt C2F6/yr',
-             'kt C6F14/yr',
-             'kt HFC23/yr',
-             'kt HFC32/yr',
-             'kt HFC4310mee/yr',
-             'kt HFC125/yr',
-             'kt HFC134a/yr',
-             'kt HFC143a/yr',
-             'kt HFC227ea/yr',
-             'kt HFC245fa/yr',
-             'kt SF6/yr',
-             'kt CFC11/yr',
-             'kt CFC12/yr',
-             'kt CFC113/yr',
-             'kt CFC114/yr',
-             'kt CFC115/yr',
-             'kt CCl4/yr',
-             'kt CH3CCl3/yr',
-             'kt HCFC22/yr',
-             'kt HCFC141b/yr',
-             'kt HCFC142b/yr',
-             'kt Halon1211/yr',
-             'kt Halon1202/yr',
-             'kt Halon1301/yr',
-             'kt Halon2402/yr',
-             'kt CH3Br/yr',
-             'kt CH3Cl/yr']
-    
-    NTOA_ZJ = 4 * np.pi * EARTH_RADIUS**2 * SECONDS_PER_YEAR * 1e-21 
-    
-    emis_all = download_emissions_csv()
-    expt = scenario
-    # emis_all = pd.read_csv('../data_input_large/rcmip-emissions-annual-means-v5-1-0.csv')
-    emis_subset = emis_all[(emis_all['Scenario']==expt)&(emis_all['Region']=='World')]
-
-    species=['CO2|MAGICC Fossil and Industrial','CO2|MAGICC AFOLU','CH4','N2O','Sulfur','CO','VOC','NOx','BC','|OC','NH3',
-             'CF4','C2F6','C6F14','HFC23','HFC32','HFC4310mee','HFC125','HFC134a','HFC143a',
-             'HFC227ea','HFC245fa','SF6','CFC11','CFC12','CFC113','CFC114','CFC115','CCl4','CH3CCl3','HCFC22',
-             'HCFC141b','HCFC142b','Halon1211','Halon1202','Halon1301','Halon2402','CH3Br','|CH3Cl']
-    # print(len(species))
-    emis = np.zeros((751,40))
-    emis[:,0] = np.arange(1750,2501)
-    for ie, specie in enumerate(species):
-        try:
-            tmp = emis_subset[emis_subset.Variable.str.endswith(specie)].loc[:,'1750':'2500'].values.squeeze()
-            emis[:,ie+1] = pd.Series(tmp).interpolate().values
-        except:
-            emis[:,ie+1] = 0
-    if expt not in ("rcp26", "rcp45", "rcp60", "rcp85"): # is aviNOx ever used????
-        tmp = emis_subset[emis_subset['Variable']=='Emissions|NOx|MAGICC Fossil and Industrial|Aircraft'].loc[:,'1750':'2500'].values.squeeze()    
-        aviNOx = pd.Series(tmp).interpolate().values
-        aviNOx_frac = aviNOx/emis[:,8]
-    #
+def build_rcmip_emissions_store(source: str = RCMIP_EMISSIONS_URL, path: str = None) -> str:
+    """
+    Build the indexed RCMIP emissions store from the RCMIP emissions CSV
+
+    The global emissions of the FaIR species for every scenario in `source` (a URL
+    or a local copy of the CSV) are extracted, interpolated over missing years and
+    converted to FaIR units once, and written as a [scenario x year x gas] array to
+    `path` (default `rcmip_emissions_store_path()`). Copy that file to machines
+    without internet access and point `SCMCOAT_RCMIP_EMISSIONS` to it.
+
+    Returns the path of the store.
+    """
+    if path is None:
+        path = rcmip_emissions_store_path()
+
+    emis_all = download_emissions_csv(source)
+    world = emis_all[emis_all['Region']=='World']
+    scenarios = pd.unique(world['Scenario'])
+    scenario_index = pd.Index(scenarios).get_indexer(world['Scenario'])
+    values = world.loc[:,'1750':'2500'].astype(float).interpolate(axis=1).to_numpy()
+
+    emis = np.zeros((len(scenarios),751,40))
+    emis[:,:,0] = np.arange(1750,2501)
+    for ie, specie in enumerate(_RCMIP_SPECIES):
+        rows = np.flatnonzero(world['Variable'].str.endswith(specie).to_numpy())
+        # species missing from a scenario, or matching several of its variables, stay 0
+        nmatches = np.bincount(scenario_index[rows], minlength=len(scenarios))
+        rows = rows[nmatches[scenario_index[rows]]==1]
+        emis[scenario_index[rows],:,ie+1] = values[rows]
+
     unit_convert = np.ones(40)
     unit_convert[1]=0.001 * molwt.C/molwt.CO2
     unit_convert[2]=0.001 * molwt.C/molwt.CO2
@@ -103,27 +126,63 @@ def rcmip_emissions(scenario):
 
     emis = emis * unit_convert
 
-    # conc_all = pd.read_csv("~/ClimateImpactLab/Climate/FAIR/raw_data_large/rcmip-concentrations-annual-means-v5-1-0.csv")
-    # conc_subset = conc_all[(conc_all['Scenario']==expt)&(conc_all['Region']=='World')]
-    # gases=['CO2','CH4','N2O','CF4','C2F6','C6F14','HFC23','HFC32','HFC4310mee','HFC125','HFC134a','HFC143a',
-    #        'HFC227ea','HFC245fa','SF6','CFC11','CFC12','CFC113','CFC114','CFC115','CCl4','CH3CCl3','HCFC22',
-    #        'HCFC141b','HCFC142b','Halon1211','Halon1202','Halon1301','Halon2402','CH3Br','CH3Cl']
-    # conc = np.zeros((751,31))
-    # for ig, gas in enumerate(gases):
-    #     try:
-    #         tmp = conc_subset[conc_subset.Variable.str.endswith(gas)].loc[:,'1750':'2500'].values.squeeze()
-    #         conc[:,ig] = pd.Series(tmp).interpolate().values
-    #     except:
-    #         conc[:,ig] = 0
-
-    # emisds = emis.to_xarray().to_array().rename({"variable":"gas",
-    #                                     "index":"year"})
-    # emisds = emisds.assign_coords(year=emisds.isel(gas=0).values)
-    emisds = xr.DataArray(emis, coords={"year":emis[:,0],
-                               "gas":["year"]+FAIR_EMISSIONS_GASES})
-    emisds["units"] = xr.DataArray(units, coords = {"gas": emisds.gas[1:]})
-    return emisds #, conc
+    ds = xr.Dataset(
+        {
+            "emissions": (("scenario", "year", "gas"), emis),
+            "units": (("species",), _RCMIP_UNITS),
+        },
+        coords={
+            "scenario": np.asarray(scenarios, dtype=str),
+            "year": emis[0,:,0],
+            "gas": ["year"]+FAIR_EMISSIONS_GASES,
+            "species": FAIR_EMISSIONS_GASES,
+        },
+    )
+    _save_ds_npz(ds, path)
+    return path
+
+
+@cache
+def _read_rcmip_emissions_store(path: str, mtime: float) -> xr.Dataset:
+    return _load_ds_npz(path)
+
+
+def rcmip_emissions(scenario, store: str = None) -> xr.DataArray:
+    """
+    RCMIP emissions of one or several scenarios, in FaIR units
+
+    Emissions are read from the store at `store` (default
+    `rcmip_emissions_store_path()`), which is built from the RCMIP CSV online
+    the first time it is missing (see `build_rcmip_emissions_store`).
+
+    Parameters
+    ----------
+    scenario : str or list of str
+        RCMIP scenario name(s), e.g. "ssp245".
+    store : str, optional
+        path of the RCMIP emissions store.
+
+    Returns
+    -------
+    xarray.DataArray
+        emissions with dims [year x gas] of shape [751 x 40] for one scenario, or
+        [scenario x year x gas] for a list of scenarios, with `units` for each gas.
+    """
+    if store is None:
+        store = rcmip_emissions_store_path()
+    if not os.path.exists(store):
+        build_rcmip_emissions_store(path=store)
+    ds = _read_rcmip_emissions_store(store, os.path.getmtime(store))
+
+    missing = set(np.atleast_1d(scenario)) - set(ds["scenario"].values)
+    if missing:
+        raise KeyError(f"scenarios {sorted(missing)} not in RCMIP emissions store {store}")
 
+    emisds = ds["emissions"].sel(scenario=scenario).rename(None)
+    if np.ndim(scenario) == 0:
+        emisds = emisds.drop_vars("scenario")
+    emisds["units"] = ds["units"].rename(species="gas")
+    return emisds
 
 def _get_climateparamsdata(filename: str) -> bytes:
     return files(f"{__package__}.climateparams_data").joinpath(filename).read_bytes()
@@ -142,16 +201,176 @@ def _inflate_climateparamsdata(
     return [d | common for d in slim]
 
 
+CLIMATEPARAMS_SLIM_FILE = "fair-1.6.2-wg3-params-slim.json"
+CLIMATEPARAMS_COMMON_FILE = "fair-1.6.2-wg3-params-common.json"
+
+# per-member scalars copied as-is from the slim configs
+_SLIM_SCALARS = [
+    "F2x",
+    "r0",
+    "rt",
+    "rc",
+    "lambda_global",
+    "ocean_heat_exchange",
+    "deep_ocean_efficacy",
+    "ozone_feedback",
+]
+# scalars shared by all members, from the common config
+_COMMON_SCALARS = ["aCO2land", "stwv_from_ch4", "F_ref_BC", "E_ref_BC"]
+
+
+def _climateparamsdata2ds(slim: list[dict], common: dict) -> xr.Dataset:
+    """
+    Build the `simulation`-indexed ClimateParams Dataset column by column from the
+    WG3 slim configs and the config common to all members.
+
+    This expands the slim configs the same way as the AR6 WG3 climate-assessment
+    workflow (`climate_assessment.climate.fair.get_fair_configurations`). Arguments
+    common to all members are stored once, without a `simulation` dimension.
+    """
+    nsim = len(slim)
+
+    def column(key):
+        return np.array([d[key] for d in slim], dtype=float)
+
+    scale_slim = column("scale")
+    scale = np.ones((nsim, 45))
+    scale[:, 1] = scale_slim[:, 0]  # CH4
+    scale[:, 2] = scale_slim[:, 1]  # N2O
+    scale[:, 3:31] = scale_slim[:, 2:3]  # minor GHGs
+    scale[:, 15] *= common["cfc11_adj"]
+    scale[:, 16] *= common["cfc12_adj"]
+    scale[:, 33] = scale_slim[:, 3]  # stratospheric water vapour
+    scale[:, 34] = scale_slim[:, 4]  # contrails
+    scale[:, 41] = scale_slim[:, 5]  # BC on snow
+    scale[:, 42] = scale_slim[:, 6]  # land use
+    scale[:, 43] = scale_slim[:, 7]  # volcanic
+
+    C_pi = np.zeros((nsim, 31))
+    C_pi[:, 0] = column("C_pi_CO2")
+    C_pi[:, common["C_pi_ind"]] = common["C_pi"]
+
+    E_pi = np.zeros(40)
+    E_pi[5:12] = common["E_pi"]
+
+    # solar forcing: linear trend to 2019, then constant, plus scaled solar cycle
+    default_solar = np.asarray(common["default_solar"])
+    trend_solar = column("trend_solar")[:, np.newaxis]
+    solar_amplitude = scale_slim[:, 8:9]
+    F_solar = np.empty((nsim, len(default_solar)))
+    F_solar[:, :270] = np.linspace(0, 1, 270) * trend_solar + default_solar[:270] * solar_amplitude
+    F_solar[:, 270:351] = trend_solar + default_solar[270:351] * solar_amplitude
+    F_solar[:, 351:] = default_solar[351:]
+
+    b_aero_slim = column("b_aero")
+    b_aero = np.zeros((nsim, 7))
+    b_aero[:, 0] = b_aero_slim[:, 0]  # SOx
+    b_aero[:, 4:7] = b_aero_slim[:, 1:4]  # BC, OC, NH3
+
+    data_vars = {key: ("simulation", column(key)) for key in _SLIM_SCALARS}
+    data_vars.update(
+        C_pi=(("simulation", "gas"), C_pi),
+        scale=(("simulation", "forcing_type"), scale),
+        F_solar=(("simulation", "year"), F_solar),
+        b_aero=(("simulation", "aerosol_species"), b_aero),
+        ghan_params=(("simulation", "ghan_param"), column("ghan_params")),
+        b_tro3=(("simulation", "ozone_precursor"), column("b_tro3")),
+        ocean_heat_capacity=(("simulation", "ocean_layer"), column("ocean_heat_capacity")),
+        F_volcanic=("year", np.asarray(common["default_volcanic"], dtype=float)),
+        natural=(("year", "natural_gas"), np.asarray(common["natural"], dtype=float)),
+        E_pi=("emissions_gas", E_pi),
+    )
+    data_vars.update({key: ((), float(common[key])) for key in _COMMON_SCALARS})
+    data_vars.update(ghg_forcing=((), common["ghg_forcing"]), tropO3_forcing=((), common["tropO3_forcing"]))
+
+    coords = {
+        "simulation": np.arange(nsim),
+        "year": np.arange(1750, 1750 + len(default_solar)),
+        "gas": FAIR_CONCENTRATION_GASES,
+        "forcing_type": np.arange(45),
+        "aerosol_species": ["SOx", "CO", "NMVOC", "NOx", "BC", "OC", "NH3"],
+        "ghan_param": ["beta", "n_so2", "n_pom"],
+        "ozone_precursor": ["CH4", "N2O", "ODS", "CO", "NMVOC", "NOx"],
+        "ocean_layer": ["mixed", "deep"],
+        "natural_gas": ["CH4", "N2O"],
+        "emissions_gas": ["year"] + FAIR_EMISSIONS_GASES,
+    }
+    return xr.Dataset(data_vars, coords=coords)
+
+
 def _climateparamslist2ds(config_list: list[dict]) -> xr.Dataset:
-    pass
+    """
+    ClimateParams Dataset from inflated configs (see `_inflate_climateparamsdata`).
+    Common arguments are taken from the first config.
+    """
+    return _climateparamsdata2ds(config_list, config_list[0])
+
+
+def _climateparams_cache_dir() -> str:
+    """`SCMCOAT_CACHE_DIR`, else `$XDG_CACHE_HOME/scmcoat` or `~/.cache/scmcoat`"""
+    cache_dir = os.environ.get("SCMCOAT_CACHE_DIR")
+    if cache_dir is None:
+        xdg = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+        cache_dir = os.path.join(xdg, "scmcoat")
+    return cache_dir
+
+
+def _save_ds_npz(ds: xr.Dataset, path: str) -> None:
+    """write `ds` to an uncompressed .npz, atomically"""
+    arrays = {name: np.asarray(var.values) for name, var in ds.variables.items()}
+    # object arrays (e.g. pandas strings) need pickle to load, store fixed-width unicode instead
+    arrays = {name: a.astype(str) if a.dtype.kind in "OT" else a for name, a in arrays.items()}
+    layout = {
+        "dims": {name: list(var.dims) for name, var in ds.variables.items()},
+        "coords": list(ds.coords),
+    }
+    arrays["__layout__"] = np.array(json_dumps(layout))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
 
+def _load_ds_npz(path: str) -> xr.Dataset:
+    with np.load(path, allow_pickle=False) as npz:
+        layout = json_loads(npz["__layout__"].item())
+        variables = {name: (dims, npz[name]) for name, dims in layout["dims"].items()}
+    coords = {name: variables.pop(name) for name in layout["coords"]}
+    return xr.Dataset(variables, coords=coords)
 
-def get_fairv1_climateparams() -> ClimateParams:
+
+def get_fairv1_climateparams(cache: bool = True) -> ClimateParams:
     """
     Get ClimateParams instance from FaIR v1.6.2 WG3 calibrated and constrained parameter set
 
     This data is stored within the package and does not require internet
     access. The original data is available online at
     https://doi.org/10.5281/zenodo.6601980
+
+    The Dataset is built once and kept in a binary cache (see
+    `_climateparams_cache_dir`), keyed on a hash of the package data, so later
+    calls only read the cache. Set `cache=False` to skip the cache.
     """
-    return ClimateParams(params=_climateparamslist2ds(_inflate_climateparamsdata()))
+    slim_fl = _get_climateparamsdata(CLIMATEPARAMS_SLIM_FILE)
+    common_fl = _get_climateparamsdata(CLIMATEPARAMS_COMMON_FILE)
+
+    cache_path = None
+    if cache:
+        digest = hashlib.sha256(slim_fl + common_fl).hexdigest()[:16]
+        cache_path = os.path.join(_climateparams_cache_dir(), f"fair-1.6.2-wg3-params-{digest}.npz")
+        if os.path.exists(cache_path):
+            try:
+                return ClimateParams(params=_load_ds_npz(cache_path))
+            except (OSError, ValueError, KeyError):
+                pass  # unreadable cache: rebuild it below
+
+    ds = _climateparamsdata2ds(json_loads(slim_fl), json_loads(common_fl))
+
+    if cache_path is not None:
+        try:
+            _save_ds_npz(ds, cache_path)
+        except OSError:
+            pass  # read-only or missing cache directory: run without the cache
+
+    return ClimateParams(params=ds)
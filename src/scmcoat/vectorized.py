@@ -0,0 +1,569 @@
+"""
+    vectorized.py
+    October 16 2026
+
+    FaIR v1 forward model stepped for many parameter sets at once.
+
+    This reproduces the configuration that `FairModel._run` passes to
+    `fair.forward.fair_scm` (Meinshausen GHG forcing, aerocom+ghan2 aerosols,
+    Thornhill-Skeie ozone, AR6 diagnostics, Geoffroy two-layer temperature and
+    the FaIR v1 carbon cycle), but every timestep is a handful of array
+    operations over a leading member axis instead of one Python time loop per
+    member.
+"""
+
+import numpy as np
+
+from fair.constants import molwt, lifetime, radeff, cl_atoms, br_atoms, fracrel
+from fair.constants.general import M_ATMOS, ppm_gtc, EARTH_RADIUS, SECONDS_PER_YEAR
+from fair.defaults import carbon
+
+
+# indices of the 45 AR6 diagnostic forcing components in `fair_scm`
+iF_tro3 = 31
+iF_ch4h = 33
+iF_adso = 35
+iF_advo = 36
+iF_adni = 37
+iF_adbc = 38
+iF_adoc = 39
+iF_aeri = 40
+iF_bcsn = 41
+iF_luch = 42
+iF_volc = 43
+iF_solr = 44
+NF = 45
+NGAS = 31
+
+# outputs of `fair_scm_vectorized`, in order
+ENGINE_OUTPUTS = (
+    "concentration",
+    "forcing",
+    "temperature",
+    "ariaci",
+    "lambda_eff",
+    "ocean_heat_content",
+    "heatflux",
+)
+
+# model state carried from one timestep to the next, see `restart_out`
+STATE_VARIABLES = (
+    "R_i",
+    "C",
+    "C_acc",
+    "T_j",
+    "F_total",
+    "ohc",
+    "time_scale_sf",
+    "cumulative_land",
+    "emissions",
+)
+
+# emissions to concentrations conversion, as in `fair_scm`
+_emis2conc = M_ATMOS / 1e18 * np.asarray(molwt.aslist) / molwt.AIR
+_emis2conc[2] = _emis2conc[2] / (molwt.N2O / molwt.N2)
+_lifetimes = np.asarray(lifetime.aslist)
+_decay = 1.0 - np.exp(-1.0 / _lifetimes[1:])
+_vm = 1.0 / _emis2conc[1:]
+
+# minor GHG radiative efficiencies, W m-2 ppt-1
+_minor_radeff = np.asarray(radeff.aslist[3:]) * 0.001
+
+# EESC weights of the ozone depleting substances (concentration index 15 on)
+_fc = np.asarray(fracrel.aslist)
+_eesc_weights = (np.asarray(cl_atoms.aslist) + 45 * np.asarray(br_atoms.aslist)) * _fc
+
+# Meinshausen et al. (2020) coefficients, from `fair.forcing.ghg.meinshausen`
+_a1, _b1, _c1, _d1 = -2.4785e-07, 0.00075906, -0.0021492, 5.2488
+_a2, _b2, _c2, _d2 = -0.00034197, 0.00025455, -0.00024357, 0.12173
+_a3, _b3, _d3 = -8.9603e-05, -0.00012462, 0.045194
+
+_ntoa_joule = 4 * np.pi * EARTH_RADIUS**2 * SECONDS_PER_YEAR
+
+
+def _members(x, n, trailing_ndim=0):
+    """broadcast `x` to have a leading member axis of length `n`"""
+    x = np.asarray(x, dtype=float)
+    if x.ndim == trailing_ndim:
+        x = x[np.newaxis]
+    return np.broadcast_to(x, (n,) + x.shape[1:])
+
+
+def _meinshausen(C, C_pi, scaleCO2):
+    """vectorized `fair.forcing.ghg.meinshausen` for C of shape (n, 3)"""
+    c_co2, c_ch4, c_n2o = C[:, 0], C[:, 1], C[:, 2]
+    cpi_co2, cpi_ch4, cpi_n2o = C_pi[:, 0], C_pi[:, 1], C_pi[:, 2]
+
+    Camax = cpi_co2 - _b1 / (2 * _a1)
+    alphap = np.where(
+        c_co2 <= cpi_co2,
+        _d1,
+        np.where(
+            c_co2 <= Camax,
+            _d1 + _a1 * (c_co2 - cpi_co2)**2 + _b1 * (c_co2 - cpi_co2),
+            _d1 - _b1**2 / (4 * _a1),
+        ),
+    )
+    alphaN2O = _c1 * np.sqrt(c_n2o)
+
+    F = np.empty_like(C)
+    F[:, 0] = (alphap + alphaN2O) * np.log(c_co2 / cpi_co2) * scaleCO2
+    F[:, 1] = (_a3 * np.sqrt(c_ch4) + _b3 * np.sqrt(c_n2o) + _d3) * (np.sqrt(c_ch4) - np.sqrt(cpi_ch4))
+    F[:, 2] = (_a2 * np.sqrt(c_co2) + _b2 * np.sqrt(c_n2o) + _c2 * np.sqrt(c_ch4) + _d2) * (
+        np.sqrt(c_n2o) - np.sqrt(cpi_n2o)
+    )
+    return F
+
+
+def _time_scale_sf(iirf, guess, a=carbon.a, tau=carbon.tau, iirf_h=carbon.iirf_h, tol=1e-12, maxiter=100):
+    """
+        Solve for the CO2 decay time constant scale factor, alpha, of every member.
+
+        Vectorized stand-in for the `scipy.optimize.root` call in
+        `fair.gas_cycle.fair1.carbon_cycle`. The iIRF is monotonic in alpha, so
+        Newton iterations in log(alpha) are safeguarded by bisection on a bracket
+        that always holds the unique root.
+    """
+    a = a[np.newaxis, :]
+    tau = tau[np.newaxis, :]
+    lo = np.full(iirf.shape, np.log(1e-12))
+    hi = np.full(iirf.shape, np.log(1e12))
+    u = np.log(guess)
+    for _ in range(maxiter):
+        alpha = np.exp(u)[:, np.newaxis]
+        expx = np.exp(-iirf_h / (tau * alpha))
+        f = alpha[:, 0] * np.sum(a * tau * (1.0 - expx), axis=1) - iirf
+        # d f / d log(alpha)
+        dfdu = np.sum(alpha * a * tau * (1.0 - expx) - a * iirf_h * expx, axis=1)
+
+        above = f > 0
+        hi = np.where(above, u, hi)
+        lo = np.where(above, lo, u)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u_new = u - f / dfdu
+        bisect = ~((u_new > lo) & (u_new < hi))
+        u_new = np.where(bisect, 0.5 * (lo + hi), u_new)
+
+        converged = np.all(np.abs(u_new - u) < tol)
+        u = u_new
+        if converged:
+            break
+    return np.exp(u)
+
+
+def _geoffroy_coefficients(lambda_global, ocean_heat_capacity, ocean_heat_exchange, deep_ocean_efficacy):
+    """per-member constants of `fair.temperature.geoffroy.forcing_to_temperature`"""
+    c_mix = ocean_heat_capacity[:, 0]
+    c_deep = ocean_heat_capacity[:, 1]
+    cdeep_p = c_deep * deep_ocean_efficacy
+    gamma_p = ocean_heat_exchange * deep_ocean_efficacy
+    g1 = (lambda_global + gamma_p) / c_mix
+    g2 = gamma_p / cdeep_p
+    g = g1 + g2
+    gstar = g1 - g2
+    delsqrt = np.sqrt(g * g - 4 * g2 * lambda_global / c_mix)
+    afast = (g + delsqrt) / 2
+    aslow = (g - delsqrt) / 2
+    cc = 0.5 / (c_mix * delsqrt)
+    amix = np.stack([cc * (gstar + delsqrt), -cc * (gstar - delsqrt)], axis=1)
+    adeep_f = -gamma_p / (c_mix * cdeep_p * delsqrt)
+    adeep = np.stack([adeep_f, -adeep_f], axis=1)
+    rate = np.stack([afast, aslow], axis=1)
+    return dict(
+        rate=rate,
+        decay=np.exp(-rate),
+        adt=1 / rate,
+        amix=amix,
+        adeep=adeep,
+        c_mix=c_mix,
+        c_deep=c_deep,
+        lambda_global=lambda_global,
+        factor_lambda_eff=(deep_ocean_efficacy - 1.0) * ocean_heat_exchange,
+    )
+
+
+def _geoffroy_step(T_j, f0, f1, k):
+    """
+        One timestep (dt=1) of the Geoffroy two-layer model for all members.
+
+        T_j has shape (n, 2, 2): (member, layer=[mixed, deep], component=[fast, slow]).
+    """
+    f0 = f0[:, np.newaxis]
+    f1 = f1[:, np.newaxis]
+    adt = k["adt"]
+    integral = (f0 * adt + f1 * (1 - adt) - k["decay"] * (f0 * (1 + adt) - f1 * adt)) / k["rate"]
+    mix1 = k["decay"] * T_j[:, 0, :] + k["amix"] * integral
+    deep1 = k["decay"] * T_j[:, 1, :] + k["adeep"] * integral
+
+    mix1_sum = mix1.sum(axis=1)
+    deep1_sum = deep1.sum(axis=1)
+    c_dtemp = k["c_mix"] * (mix1_sum - T_j[:, 0, :].sum(axis=1)) + k["c_deep"] * (
+        deep1_sum - T_j[:, 1, :].sum(axis=1)
+    )
+    heatflux = c_dtemp
+    del_ohc = _ntoa_joule * c_dtemp
+
+    big = np.abs(mix1_sum) > 1e-6
+    ratio = np.where(big, (mix1_sum - deep1_sum) / np.where(big, mix1_sum, 1.0), 1.0)
+    lambda_eff = k["lambda_global"] + k["factor_lambda_eff"] * ratio
+
+    return np.stack([mix1, deep1], axis=1), heatflux, del_ohc, lambda_eff
+
+
+def fair_scm_vectorized(
+    emissions,
+    C_pi,
+    natural,
+    F_volcanic,
+    F_solar,
+    F2x,
+    r0,
+    rt,
+    rc,
+    scale,
+    b_aero,
+    ghan_params,
+    ozone_feedback,
+    b_tro3,
+    E_pi,
+    aCO2land,
+    stwv_from_ch4,
+    F_ref_BC,
+    E_ref_BC,
+    lambda_global,
+    deep_ocean_efficacy,
+    ocean_heat_capacity,
+    ocean_heat_exchange,
+    outputs=None,
+    restart_in=None,
+    restart_out=False,
+    concentrations=None,
+):
+    """
+        Run emissions- or concentration-driven, multi-gas FaIR v1 for a batch of
+        parameter sets.
+
+        Arguments have the meaning of the `fair.forward.fair_scm` arguments of the
+        same name, with an extra leading member axis of length n. Arguments without
+        the member axis are shared by all members.
+
+        Parameters
+        ----------
+        emissions : np.ndarray
+            (nt, 40) or (n, nt, 40) emissions array in FaIR units, first column is year.
+        C_pi : np.ndarray
+            (n, 31) pre-industrial concentrations.
+        natural : np.ndarray
+            (nt, 2) or (n, nt, 2) natural CH4 and N2O emissions.
+        F_volcanic, F_solar : np.ndarray
+            (nt,) or (n, nt) volcanic and solar forcing.
+        F2x, r0, rt, rc, ozone_feedback, aCO2land, stwv_from_ch4, F_ref_BC, E_ref_BC,
+        lambda_global, deep_ocean_efficacy, ocean_heat_exchange : np.ndarray
+            (n,) per-member scalars.
+        scale : np.ndarray
+            (n, 45) forcing scale factors.
+        b_aero, ghan_params, b_tro3 : np.ndarray
+            (n, 7), (n, 3) and (n, 6) aerosol and ozone coefficients.
+        E_pi : np.ndarray
+            (40,) or (n, 40) pre-industrial emissions.
+        ocean_heat_capacity : np.ndarray
+            (n, 2) mixed layer and deep ocean heat capacities.
+        outputs : sequence of str, optional
+            names from `ENGINE_OUTPUTS` to keep the time history of. If `None`, keep all.
+        restart_in : dict, optional
+            model state returned with `restart_out=True` by a run over the preceding
+            years. The run then continues from it: `emissions`, `natural`, `F_volcanic`
+            and `F_solar` only cover the following years, while `E_pi` is still the
+            pre-industrial emissions of the whole run.
+        restart_out : bool, optional
+            if True, also return the model state after the last timestep.
+        concentrations : np.ndarray, optional
+            (nt, 31) or (n, nt, 31) prescribed concentrations. If given, the run is
+            concentration-driven as with `fair_scm(emissions_driven=False)`: the
+            carbon and gas cycles are skipped, `natural` is unused, and `emissions`
+            only drive the short-lived forcers and land use forcing.
+
+        Returns
+        -------
+        tuple of np.ndarray
+            C (n, nt, 31), F (n, nt, 45), T (n, nt), ariaci (n, nt, 2),
+            lambda_eff (n, nt), ohc (n, nt), heatflux (n, nt), in the order
+            `fair_scm` returns them with `ariaci_out=True` and Geoffroy temperatures.
+            Outputs that were not requested are `None`. With `restart_out=True`, the
+            model state follows as a dict of `STATE_VARIABLES` with a leading
+            member axis.
+    """
+    emissions = np.asarray(emissions, dtype=float)
+    if emissions.shape[-1] != 40:
+        raise ValueError("emissions timeseries should be a nt x 40 or n x nt x 40 numpy array")
+    nt = emissions.shape[-2]
+
+    keep = ENGINE_OUTPUTS if outputs is None else tuple(outputs)
+    unknown = set(keep) - set(ENGINE_OUTPUTS)
+    if unknown:
+        raise ValueError(f"unknown outputs {sorted(unknown)}, expecting some of {ENGINE_OUTPUTS}")
+
+    n = np.atleast_1d(np.asarray(F2x)).shape[0]
+    F2x = _members(F2x, n)
+    r0 = _members(r0, n)
+    rt = _members(rt, n)
+    rc = _members(rc, n)
+    ozone_feedback = _members(ozone_feedback, n)
+    aCO2land = _members(aCO2land, n)
+    stwv_from_ch4 = _members(stwv_from_ch4, n)
+    F_ref_BC = _members(F_ref_BC, n)
+    E_ref_BC = _members(E_ref_BC, n)
+    C_pi = _members(C_pi, n, 1)
+    scale = _members(scale, n, 1)
+    b_aero = _members(b_aero, n, 1)
+    ghan_params = _members(ghan_params, n, 1)
+    b_tro3 = _members(b_tro3, n, 1)
+    E_pi = _members(E_pi, n, 1)
+    k = _geoffroy_coefficients(
+        _members(lambda_global, n),
+        _members(ocean_heat_capacity, n, 1),
+        _members(ocean_heat_exchange, n),
+        _members(deep_ocean_efficacy, n),
+    )
+    # time-first (nt, n, ...) views so each timestep is one slab
+    E = np.moveaxis(_members(emissions, n, 2), 1, 0)
+    nat = np.moveaxis(_members(natural, n, 2), 1, 0)
+    F_volcanic = _members(F_volcanic, n, 1).T
+    F_solar = _members(F_solar, n, 1).T
+    if concentrations is not None:
+        concentrations = np.moveaxis(_members(concentrations, n, 2), 1, 0)
+
+    # only the requested outputs keep their history
+    shapes = dict(concentration=(NGAS,), forcing=(NF,), ariaci=(2,))
+    history = {name: np.zeros((nt, n) + shapes.get(name, ())) for name in keep}
+
+    def record(name, t, value):
+        if name in history:
+            history[name][t] = value
+
+    # per-member constants of the forcing relationships
+    beta, n_so2, n_pom = ghan_params.T
+    pi_re = -beta * np.log(1 + E_pi[:, 5] / n_so2 + E_pi[:, 9:11].sum(axis=-1) / n_pom)
+    eesc_pi = C_pi[:, 15:] @ _eesc_weights
+    # CO2 forcing scaling to F2x, as with `scale_F2x=True`
+    F2x_etminan = (-2.4e-7 * C_pi[:, 0]**2 + 7.2e-4 * C_pi[:, 0] - 2.1e-4 * C_pi[:, 2] + 5.36) * np.log(2)
+    scaleCO2 = F2x / F2x_etminan
+
+    F_t = np.zeros((n, NF))
+    ariaci_t = np.zeros((n, 2))
+
+    def forcing(t, C_t, T_prev, cumulative_land):
+        """all forcing components of timestep t, scaled"""
+        dE = E[t] - E_pi
+
+        F_t[:, 0:3] = _meinshausen(C_t[:, 0:3], C_pi, scaleCO2)
+        F_t[:, 3:31] = (C_t[:, 3:] - C_pi[:, 3:]) * _minor_radeff
+        F_t[:, iF_tro3] = (
+            b_tro3[:, 0] * (C_t[:, 1] - C_pi[:, 1])
+            + b_tro3[:, 1] * (C_t[:, 2] - C_pi[:, 2])
+            + b_tro3[:, 2] * (C_t[:, 15:] @ _eesc_weights - eesc_pi)
+            + np.sum(b_tro3[:, 3:6] * dE[:, 6:9], axis=-1)
+            + ozone_feedback * T_prev
+        )
+        F_t[:, iF_ch4h] = stwv_from_ch4 * F_t[:, 1]
+
+        aerosol_direct = b_aero * dE[:, 5:12]
+        F_t[:, iF_adso] = aerosol_direct[:, 0]
+        F_t[:, iF_advo] = aerosol_direct[:, 1] + aerosol_direct[:, 2]
+        F_t[:, iF_adni] = aerosol_direct[:, 3] + aerosol_direct[:, 6]
+        F_t[:, iF_adbc] = aerosol_direct[:, 4]
+        F_t[:, iF_adoc] = aerosol_direct[:, 5]
+        ariaci_t[:, 0] = np.sum(aerosol_direct, axis=-1)
+        ariaci_t[:, 1] = -beta * np.log(1 + E[t, :, 5] / n_so2 + E[t, :, 9:11].sum(axis=-1) / n_pom) - pi_re
+        F_t[:, iF_aeri] = ariaci_t[:, 1]
+
+        F_t[:, iF_bcsn] = dE[:, 9] * F_ref_BC / E_ref_BC
+        F_t[:, iF_luch] = cumulative_land * aCO2land
+        F_t[:, iF_volc] = F_volcanic[t]
+        F_t[:, iF_solr] = F_solar[t]
+
+        F_t[:] *= scale
+        record("forcing", t, F_t)
+        record("ariaci", t, ariaci_t)
+        return F_t.sum(axis=-1)
+
+    if restart_in is None:
+        # first timestep
+        E_co2 = E[0, :, 1:3].sum(axis=-1)
+        R_i = carbon.a[np.newaxis, :] * E_co2[:, np.newaxis] / ppm_gtc
+        if concentrations is None:
+            C_t = np.empty((n, NGAS))
+            C_t[:, 1:] = C_pi[:, 1:]
+            C_t[:, 0] = np.sum(R_i, axis=-1) + C_pi[:, 0]
+        else:
+            C_t = concentrations[0]
+        record("concentration", 0, C_t)
+        C_acc = np.zeros(n)
+        cumulative_land = E[0, :, 2] - E_pi[:, 2]
+
+        F_total = forcing(0, C_t, 0.0, cumulative_land)
+        T_j, heatflux, ohc, lambda_eff = _geoffroy_step(np.zeros((n, 2, 2)), F_total, F_total, k)
+        T = T_j[:, 0, :].sum(axis=-1)
+        record("temperature", 0, T)
+        record("lambda_eff", 0, lambda_eff)
+        record("heatflux", 0, heatflux)
+        record("ocean_heat_content", 0, ohc)
+
+        time_scale_sf = np.full(n, 0.16)
+        E_prev = E[0]
+        start = 1
+    else:
+        R_i, C_t, C_acc, T_j, F_total, ohc, time_scale_sf, cumulative_land, E_prev = (
+            np.asarray(restart_in[name], dtype=float) for name in STATE_VARIABLES
+        )
+        T = T_j[:, 0, :].sum(axis=-1)
+        start = 0
+
+    for t in range(start, nt):
+        if concentrations is None:
+            C_prev = C_t
+            E_co2_prev = E_prev[:, 1:3].sum(axis=-1)
+            E_co2 = E[t, :, 1:3].sum(axis=-1)
+
+            # carbon cycle; oxidised fossil methane is zero with fossilCH4_frac=0
+            iirf = np.minimum(r0 + rc * C_acc + rt * T, carbon.iirf_max)
+            time_scale_sf = _time_scale_sf(iirf, time_scale_sf)
+            R_i = R_i * np.exp(-1.0 / (carbon.tau[np.newaxis, :] * time_scale_sf[:, np.newaxis])) + (
+                carbon.a[np.newaxis, :] * E_co2[:, np.newaxis] / ppm_gtc
+            )
+            C_t = np.empty((n, NGAS))
+            C_t[:, 0] = np.sum(R_i, axis=-1) + C_pi[:, 0]
+            C_acc = C_acc + 0.5 * (E_co2 + E_co2_prev) - (C_t[:, 0] - C_prev[:, 0]) * ppm_gtc
+
+            # methane, nitrous oxide and other well-mixed GHGs
+            e0 = np.concatenate([E_prev[:, 3:5] + nat[t], E_prev[:, 12:]], axis=-1)
+            e1 = np.concatenate([E[t, :, 3:5] + nat[t], E[t, :, 12:]], axis=-1)
+            C_t[:, 1:] = C_prev[:, 1:] - C_prev[:, 1:] * _decay + 0.5 * (e1 + e0) * _vm
+        else:
+            C_t = concentrations[t]
+        record("concentration", t, C_t)
+
+        cumulative_land = cumulative_land + (E[t, :, 2] - E_pi[:, 2])
+        F_total_prev = F_total
+        F_total = forcing(t, C_t, T, cumulative_land)
+
+        T_j, heatflux, del_ohc, lambda_eff = _geoffroy_step(T_j, F_total_prev, F_total, k)
+        T = T_j[:, 0, :].sum(axis=-1)
+        ohc = ohc + del_ohc
+        record("temperature", t, T)
+        record("lambda_eff", t, lambda_eff)
+        record("heatflux", t, heatflux)
+        record("ocean_heat_content", t, ohc)
+        E_prev = E[t]
+
+    ret = tuple(
+        np.moveaxis(history[name], 0, 1) if name in history else None for name in ENGINE_OUTPUTS
+    )
+    if restart_out:
+        state = (R_i, C_t, C_acc, T_j, F_total, ohc, time_scale_sf, cumulative_land, E_prev)
+        ret = ret + ({name: np.array(x, dtype=float) for name, x in zip(STATE_VARIABLES, state)},)
+    return ret
+
+
+def fair_scm_co2_vectorized(
+    emissions,
+    other_rf,
+    C_pi,
+    F2x,
+    r0,
+    rt,
+    rc,
+    lambda_global,
+    deep_ocean_efficacy,
+    ocean_heat_capacity,
+    ocean_heat_exchange,
+    outputs=None,
+):
+    """
+        Run emissions-driven, CO2-only FaIR v1 for a batch of parameter sets.
+
+        Reproduces `fair.forward.fair_scm(useMultigas=False)` with Geoffroy
+        temperatures: the FaIR v1 carbon cycle, logarithmic CO2 forcing and
+        prescribed non-CO2 forcing `other_rf`.
+
+        Parameters
+        ----------
+        emissions : np.ndarray
+            (nt,) or (n, nt) CO2 emissions in GtC/yr.
+        other_rf : np.ndarray
+            (nt,) or (n, nt) non-CO2 forcing in W m-2.
+        C_pi : np.ndarray
+            (n,) pre-industrial CO2 concentrations.
+        F2x, r0, rt, rc, lambda_global, deep_ocean_efficacy, ocean_heat_exchange : np.ndarray
+            (n,) per-member scalars.
+        ocean_heat_capacity : np.ndarray
+            (n, 2) mixed layer and deep ocean heat capacities.
+        outputs : sequence of str, optional
+            names from `ENGINE_OUTPUTS` to keep the time history of. If `None`, keep all.
+
+        Returns
+        -------
+        tuple of np.ndarray
+            C (n, nt), F (n, nt), T (n, nt), ariaci (None), lambda_eff (n, nt),
+            ohc (n, nt), heatflux (n, nt). Outputs that were not requested are `None`.
+    """
+    keep = ENGINE_OUTPUTS if outputs is None else tuple(outputs)
+    unknown = set(keep) - set(ENGINE_OUTPUTS)
+    if unknown:
+        raise ValueError(f"unknown outputs {sorted(unknown)}, expecting some of {ENGINE_OUTPUTS}")
+
+    n = np.atleast_1d(np.asarray(F2x)).shape[0]
+    F2x = _members(F2x, n)
+    r0 = _members(r0, n)
+    rt = _members(rt, n)
+    rc = _members(rc, n)
+    C_pi = _members(C_pi, n)
+    k = _geoffroy_coefficients(
+        _members(lambda_global, n),
+        _members(ocean_heat_capacity, n, 1),
+        _members(ocean_heat_exchange, n),
+        _members(deep_ocean_efficacy, n),
+    )
+    # time-first (nt, n) views
+    E = _members(emissions, n, 1).T
+    other_rf = _members(other_rf, n, 1).T
+    nt = E.shape[0]
+
+    history = {name: np.zeros((nt, n)) for name in keep if name != "ariaci"}
+
+    def record(name, t, value):
+        if name in history:
+            history[name][t] = value
+
+    # first timestep
+    R_i = carbon.a[np.newaxis, :] * E[0][:, np.newaxis] / ppm_gtc
+    C = np.sum(R_i, axis=-1) + C_pi
+    C_acc = np.zeros(n)
+    F_total = F2x / np.log(2) * np.log(C / C_pi) + other_rf[0]
+    T_j, heatflux, ohc, lambda_eff = _geoffroy_step(np.zeros((n, 2, 2)), F_total, F_total, k)
+    T = T_j[:, 0, :].sum(axis=-1)
+    for name, value in [("concentration", C), ("forcing", F_total), ("temperature", T),
+                        ("lambda_eff", lambda_eff), ("heatflux", heatflux), ("ocean_heat_content", ohc)]:
+        record(name, 0, value)
+
+    time_scale_sf = np.full(n, 0.16)
+    for t in range(1, nt):
+        C_prev = C
+        iirf = np.minimum(r0 + rc * C_acc + rt * T, carbon.iirf_max)
+        time_scale_sf = _time_scale_sf(iirf, time_scale_sf)
+        R_i = R_i * np.exp(-1.0 / (carbon.tau[np.newaxis, :] * time_scale_sf[:, np.newaxis])) + (
+            carbon.a[np.newaxis, :] * E[t][:, np.newaxis] / ppm_gtc
+        )
+        C = np.sum(R_i, axis=-1) + C_pi
+        C_acc = C_acc + 0.5 * (E[t] + E[t - 1]) - (C - C_prev) * ppm_gtc
+
+        F_total_prev = F_total
+        F_total = F2x / np.log(2) * np.log(C / C_pi) + other_rf[t]
+        T_j, heatflux, del_ohc, lambda_eff = _geoffroy_step(T_j, F_total_prev, F_total, k)
+        T = T_j[:, 0, :].sum(axis=-1)
+        ohc = ohc + del_ohc
+        for name, value in [("concentration", C), ("forcing", F_total), ("temperature", T),
+                            ("lambda_eff", lambda_eff), ("heatflux", heatflux), ("ocean_heat_content", ohc)]:
+            record(name, t, value)
+
+    return tuple(history[name].T if name in history else None for name in ENGINE_OUTPUTS)
@@ -0,0 +1,196 @@
+"""
+    writers.py
+    October 16 2026
+
+    Streaming sinks for FairModel ensemble results.
+
+    `EnsembleWriter` appends results a run or a batch of runs at a time, so that
+    memory stays bounded by the batch size rather than by the whole
+    scenario x simulation ensemble. Zarr and netCDF backends are optional
+    dependencies of xarray and are only needed for the format in use.
+"""
+import os
+
+import numpy as np
+import xarray as xr
+
+from scmcoat.core import FairResult
+
+DEFAULT_SCENARIO = "default"
+
+# zarr v2 and v3 group metadata files
+_ZARR_GROUP_FILES = (".zgroup", "zarr.json")
+
+
+class EnsembleWriter:
+    """
+        Append FairModel results to a chunked Zarr store or a directory of netCDF files
+        along `scenario`/`simulation`/`year`, and resume by skipping members that are
+        already written.
+
+        Every scenario is stored separately: as a group of the Zarr store, appended
+        along `simulation`, or as a directory with one netCDF file per batch.
+        `EnsembleWriter.open` stacks them along a `scenario` dimension.
+
+        Parameters
+        ----------
+        path : str
+            Zarr store, or directory of netCDF files for `format="netcdf"`.
+        format : str, optional
+            "zarr" (default) or "netcdf".
+        dtype : str or numpy.dtype, optional
+            if given, floating point data variables are cast to it before writing,
+            e.g. "float32".
+        compression : dict, optional
+            encoding applied to every data variable, e.g. `{"zlib": True, "complevel": 4}`
+            for netCDF4. Zarr stores use the zarr default compressor otherwise.
+
+        Examples
+        --------
+        >>> writer = EnsembleWriter("ensemble.zarr", dtype="float32")
+        >>> fm.run_ensemble(emissions, writer=writer, scenario="ssp245")
+        >>> writer.open()
+    """
+
+    def __init__(self, path, format="zarr", dtype=None, compression=None):
+        if format not in ("zarr", "netcdf"):
+            raise ValueError(f"format must be 'zarr' or 'netcdf', got {format!r}")
+        self.path = os.fspath(path)
+        self.format = format
+        self.dtype = None if dtype is None else np.dtype(dtype)
+        self.compression = compression
+        # simulation labels written so far, per scenario
+        self._written = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(path={self.path!r}, format={self.format!r}, dtype={self.dtype})"
+
+    def scenarios(self):
+        """labels of the scenarios in the store"""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name for name in os.listdir(self.path) if self._exists(name))
+
+    def written(self, scenario=DEFAULT_SCENARIO):
+        """set of `simulation` labels already written for `scenario`"""
+        scenario = str(scenario)
+        if scenario not in self._written:
+            done = set()
+            if self._exists(scenario):
+                if self.format == "zarr":
+                    done.update(xr.open_zarr(self.path, group=scenario)["simulation"].values.tolist())
+                else:
+                    for fname in self._netcdf_files(scenario):
+                        with xr.open_dataset(fname) as ds:
+                            done.update(ds["simulation"].values.tolist())
+            self._written[scenario] = done
+        return self._written[scenario]
+
+    def write(self, result, scenario=DEFAULT_SCENARIO):
+        """
+            Append `result` to the store, skipping members that are already written.
+
+            Parameters
+            ----------
+            result : xarray.Dataset or FairResult
+                output of `FairModel.run` or `FairModel.run_ensemble`.
+            scenario : str, optional
+                label of the emissions scenario `result` was run with. Results with a
+                `scenario` dimension are written to each of their own scenarios.
+
+            Returns
+            -------
+            int
+                number of members written.
+        """
+        ds = result.to_dataset() if isinstance(result, FairResult) else result
+        if "scenario" in ds.dims:
+            return sum(self.write(ds.sel(scenario=label, drop=True), label) for label in ds["scenario"].values)
+        scenario = str(scenario)
+        if "simulation" not in ds.dims:
+            ds = ds.set_coords("simulation").expand_dims("simulation")
+
+        done = self.written(scenario)
+        if done:
+            ds = ds.isel(simulation=~np.isin(ds["simulation"].values, list(done)))
+        nsim = ds.sizes["simulation"]
+        if nsim == 0:
+            return 0
+
+        if self.dtype is not None:
+            ds = ds.map(lambda da: da.astype(self.dtype) if np.issubdtype(da.dtype, np.floating) else da)
+
+        if self.format == "zarr":
+            self._write_zarr(ds, scenario)
+        else:
+            self._write_netcdf(ds, scenario)
+        done.update(ds["simulation"].values.tolist())
+        return nsim
+
+    def open(self, scenario=None):
+        """
+            Open the written results.
+
+            If `scenario` is None, all scenarios are stacked along a `scenario`
+            dimension; members missing from a scenario are NaN. Zarr stores open
+            lazily, netCDF files are concatenated in memory.
+        """
+        if scenario is not None:
+            return self._open_scenario(str(scenario))
+        scenarios = self.scenarios()
+        if not scenarios:
+            raise FileNotFoundError(f"no results written to {self.path}")
+        return xr.concat(
+            [self._open_scenario(s) for s in scenarios],
+            dim=xr.DataArray(np.asarray(scenarios, dtype=str), dims="scenario"),
+            join="outer",
+        )
+
+    def _exists(self, scenario):
+        group = os.path.join(self.path, scenario)
+        if self.format == "zarr":
+            return any(os.path.exists(os.path.join(group, fname)) for fname in _ZARR_GROUP_FILES)
+        return os.path.isdir(group)
+
+    def _encoding(self, ds):
+        encoding = {}
+        for name, da in ds.data_vars.items():
+            encoding[name] = dict(self.compression or {})
+            if self.format == "zarr":
+                # one chunk per batch of members
+                encoding[name]["chunks"] = da.shape
+        return encoding
+
+    def _write_zarr(self, ds, scenario):
+        if self._exists(scenario):
+            ds.to_zarr(self.path, group=scenario, mode="a", append_dim="simulation")
+        else:
+            ds.to_zarr(self.path, group=scenario, mode="a", encoding=self._encoding(ds))
+
+    def _netcdf_files(self, scenario):
+        group = os.path.join(self.path, scenario)
+        return [os.path.join(group, fname) for fname in sorted(os.listdir(group)) if fname.endswith(".nc")]
+
+    def _write_netcdf(self, ds, scenario):
+        group = os.path.join(self.path, scenario)
+        os.makedirs(group, exist_ok=True)
+        fname = os.path.join(group, f"{len(self._netcdf_files(scenario)):06d}.nc")
+        # write to a temporary file first so an interrupted run never leaves a partial batch
+        tmpname = f"{fname}.tmp{os.getpid()}"
+        try:
+            ds.to_netcdf(tmpname, encoding=self._encoding(ds))
+            os.replace(tmpname, fname)
+        finally:
+            if os.path.exists(tmpname):
+                os.remove(tmpname)
+
+    def _open_scenario(self, scenario):
+        if not self._exists(scenario):
+            raise FileNotFoundError(f"no results written for scenario {scenario!r} in {self.path}")
+        if self.format == "zarr":
+            return xr.open_zarr(self.path, group=scenario)
+        parts = []
+        for fname in self._netcdf_files(scenario):
+            with xr.open_dataset(fname) as ds:
+                parts.append(ds.load())
+        return xr.concat(parts, dim="simulation")
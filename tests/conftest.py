@@ -0,0 +1,47 @@
+from importlib.resources import files
+
+import pandas as pd
+import pytest
+import xarray as xr
+
+import scmcoat as sc
+
+
+@pytest.fixture(scope="session")
+def rcp45_emissions():
+    """Bundled RCP4.5 emissions as a [year x gas] DataArray, no internet access needed
+    """
+    with (files("scmcoat") / "testdata" / "rcp45emissions.csv").open() as fl:
+        df = pd.read_csv(fl)
+    return xr.DataArray(
+        df.values, dims=["year", "gas"], coords={"year": df["year"].values, "gas": list(df.columns)}
+    )
+
+
+@pytest.fixture(scope="session")
+def climateparams():
+    """First few members of the bundled WG3 ClimateParams
+    """
+    cp = sc.utils.get_fairv1_climateparams(cache=False)
+    return sc.ClimateParams(params=cp.params.isel(simulation=slice(0, 4)))
+
+
+@pytest.fixture(scope="session")
+def calibrated_emissions(rcp45_emissions, climateparams):
+    """RCP4.5 emissions with the WG3 pre-industrial aerosol and ozone precursors in
+    the first year, which FairModel uses as the pre-industrial reference.
+    """
+    emissions = rcp45_emissions.copy()
+    emissions[0, 5:12] = climateparams.params["E_pi"][5:12].values
+    return emissions
+
+
+@pytest.fixture(scope="session")
+def zarr_backend(tmp_path_factory):
+    """Skip tests of Zarr stores unless zarr is installed and works with the installed xarray
+    """
+    pytest.importorskip("zarr")
+    try:
+        xr.Dataset({"x": ("y", [0.0])}).to_zarr(tmp_path_factory.mktemp("zarr") / "probe.zarr")
+    except Exception as exc:  # e.g. zarr 2 with an xarray that needs zarr 3
+        pytest.skip(f"zarr does not work with this xarray: {exc}")
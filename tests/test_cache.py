@@ -0,0 +1,48 @@
+import numpy as np
+import xarray as xr
+
+import scmcoat as sc
+from scmcoat.cache import ResultCache
+
+
+def test_fairmodel_cache(tmp_path, climateparams, calibrated_emissions):
+    """Test repeated runs are served from the memory and disk tiers
+    """
+    cache = ResultCache(path=tmp_path)
+    fv = sc.FairModel(climateparams, engine="vectorized", cache=cache)
+
+    first = fv.run(calibrated_emissions, simid=1)
+    second = fv.run(calibrated_emissions, simid=1)
+    xr.testing.assert_identical(first, second)
+    assert cache.cache_info()[:3] == (1, 0, 1)
+
+    # other members, emissions and outputs are different entries
+    higher = calibrated_emissions.copy()
+    higher[:, 1:] *= 1.01
+    fv.run(calibrated_emissions, simid=2)
+    fv.run(higher, simid=1)
+    fv.run(calibrated_emissions, simid=1, outputs=["temperature"])
+    assert cache.misses == 4
+    assert len(list(tmp_path.glob("*.npz"))) == 4
+
+    # a new process only has the disk tier
+    fresh = sc.FairModel(climateparams, engine="vectorized", cache=ResultCache(path=tmp_path))
+    xr.testing.assert_identical(fresh.run(calibrated_emissions, simid=1), first)
+    assert fresh.cache.cache_info()[:3] == (1, 1, 0)
+
+    # hits are copies, so callers can't corrupt the cache
+    first.temperature[:] = np.nan
+    xr.testing.assert_identical(fv.run(calibrated_emissions, simid=1), second)
+
+
+def test_result_cache_lru():
+    """Test the memory tier evicts the least recently used entries beyond max_bytes
+    """
+    cache = ResultCache(max_bytes=2 * 800)
+    for key in ["a", "b", "c"]:
+        cache.put(key, (np.zeros(100), None))
+        cache.get("a")
+
+    assert cache.get("b") is None
+    assert cache.get("a")[1] is None
+    assert cache.cache_info().currsize == 2
@@ -0,0 +1,52 @@
+import sys
+
+import pandas as pd
+import pytest
+import xarray as xr
+
+import scmcoat as sc
+from scmcoat.cli import main
+
+
+def test_cli_run(climateparams, calibrated_emissions, tmp_path, capsys):
+    """Test `scmcoat run` sweeps scenarios to a store and resumes interrupted sweeps
+    """
+    params = tmp_path / "params.nc"
+    climateparams.params.to_netcdf(params)
+    low = calibrated_emissions.copy()
+    low.loc[{"year": slice(2030, None), "gas": "CO2_Fossil"}] *= 0.5
+    for name, emissions in [("base", calibrated_emissions), ("low", low)]:
+        pd.DataFrame(emissions.values, columns=emissions["gas"].values).to_csv(tmp_path / f"{name}.csv", index=False)
+    scenarios = [str(tmp_path / "base.csv"), str(tmp_path / "low.csv")]
+    store = str(tmp_path / "sweep")
+    options = ["-o", store, "--format", "netcdf", "--params", str(params), "-j", "1", "--batch-size", "2",
+               "--end-year", "2100"]
+
+    assert main(["run", *scenarios, *options, "--simids", "0-1,3"]) == 0
+    out = capsys.readouterr().out
+    assert "base, low: 3 members, 0 already written, 6 runs" in out
+    assert "runs/s" in out and "model" in out
+
+    # an existing store is only added to on request
+    with pytest.raises(SystemExit):
+        main(["run", *scenarios, *options])
+    assert main(["run", *scenarios, *options, "--resume"]) == 0
+    assert "4 members, 3 already written, 2 runs" in capsys.readouterr().out
+    # resuming a finished sweep has nothing left to run
+    assert main(["run", *scenarios, *options, "--resume"]) == 0
+    assert "4 members, 4 already written, 0 runs" in capsys.readouterr().out
+
+    fv = sc.FairModel(climateparams, engine="vectorized")
+    ds = sc.EnsembleWriter(store, format="netcdf").open().sortby("simulation")
+    expected = fv.run_ensemble(low.sel(year=slice(None, 2100)), workers=1)
+    xr.testing.assert_allclose(ds.temperature.sel(scenario="low", drop=True), expected.temperature)
+
+
+def test_cli_run_without_zarr(tmp_path, monkeypatch, capsys):
+    """Test `scmcoat run` explains how to get Zarr stores when zarr is missing
+    """
+    monkeypatch.setitem(sys.modules, "zarr", None)
+    with pytest.raises(SystemExit):
+        main(["run", "ssp245", "-o", str(tmp_path / "sweep.zarr")])
+    assert "--format netcdf" in capsys.readouterr().err
+    assert not (tmp_path / "sweep.zarr").exists()
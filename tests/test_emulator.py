@@ -0,0 +1,41 @@
+import numpy as np
+import xarray as xr
+
+import scmcoat as sc
+
+
+def test_linear_emulator(climateparams, calibrated_emissions):
+    """Test the emulator reproduces pulses exactly and small changes closely
+    """
+    fv = sc.FairModel(climateparams, engine="vectorized")
+    emulator = fv.fit_emulator(calibrated_emissions, gases=["CO2", "CH4"], pulse_years=[2020, 2050, 2100])
+    assert emulator.kernels.dims == ("simulation", "gas", "pulse_year", "lag")
+    assert emulator.error.dims == ("simulation",)
+    assert (emulator.error < 0.05).all()
+
+    years = calibrated_emissions["year"].values
+    zero = xr.DataArray(np.zeros((1, 1)), dims=["year", "gas"], coords={"year": [2000], "gas": ["CO2"]})
+    xr.testing.assert_allclose(emulator.predict(zero), emulator.baseline, atol=1e-12)
+
+    # a pulse in a pulse year is the response it was fit from
+    pulse = xr.DataArray([[1.0]], dims=["year", "gas"], coords={"year": [2050], "gas": ["CH4"]})
+    response = fv.run_pulse(calibrated_emissions, gases=["CH4"], pulse_years=[2050])
+    np.testing.assert_allclose(emulator.predict(pulse) - emulator.baseline,
+                               response.isel(gas=0, pulse_year=0), atol=1e-9)
+
+    # many candidate changes at once, as labelled or plain arrays
+    ramps = xr.DataArray(
+        np.linspace(-3, 3, 4)[:, None] * np.clip((years - 2025) / 50, 0, 1)[None],
+        dims=["policy", "year"], coords={"year": years},
+    ).expand_dims(gas=["CO2"], axis=-1)
+    temperature = emulator.predict(ramps)
+    assert temperature.dims == ("simulation", "policy", "year")
+    plain = np.concatenate([ramps.values, np.zeros_like(ramps.values)], axis=-1)
+    np.testing.assert_allclose(emulator.predict(plain), temperature.values, atol=1e-12)
+
+    error = emulator.validate(fv, ramps)
+    assert error.dims == ("simulation", "policy")
+    assert (error < 0.05).all()
+
+    restored = sc.LinearEmulator.from_dataset(emulator.to_dataset())
+    xr.testing.assert_allclose(restored.predict(ramps), temperature)
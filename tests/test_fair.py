@@ -1,3 +1,8 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
 import scmcoat as sc
 
 def test_fairmodel_run():
@@ -11,3 +16,339 @@ def test_fairmodel_run():
 
     # run FaIR with these emissions under its default settings
     response = fm.run(emissions)
+
+
+def test_fairmodel_vectorized_matches_fair(climateparams, calibrated_emissions):
+    """Test the vectorized engine reproduces fair_scm for median and indexed members
+    """
+    fm = sc.FairModel(climateparams)
+    fv = sc.FairModel(climateparams, engine="vectorized")
+
+    for simid in ["median", 2]:
+        expected = fm.run(calibrated_emissions, simid=simid)
+        actual = fv.run(calibrated_emissions, simid=simid)
+        xr.testing.assert_allclose(actual, expected, rtol=1e-6)
+
+
+def test_fairmodel_run_ensemble(climateparams, calibrated_emissions):
+    """Test run_ensemble stacks members along a simulation dimension
+    """
+    fv = sc.FairModel(climateparams, engine="vectorized")
+    ens = fv.run_ensemble(calibrated_emissions, workers=1, batch_size=3)
+
+    assert ens.temperature.dims == ("simulation", "year")
+    np.testing.assert_array_equal(ens.simulation, climateparams.params.simulation)
+
+    fm = sc.FairModel(climateparams)
+    member = fm.run(calibrated_emissions, simid=1)
+    np.testing.assert_allclose(ens.temperature.sel(simulation=1), member.temperature, rtol=1e-6)
+
+
+def test_fairmodel_run_ensemble_matches_run(climateparams, calibrated_emissions):
+    """Test run_ensemble matches per-member runs and leaves the default member alone
+    """
+    fm = sc.FairModel(climateparams)
+    ens = fm.run_ensemble(calibrated_emissions, simids=[0, 2], workers=1)
+    assert fm.simid == "default"
+
+    for simid in [0, 2]:
+        member = sc.FairModel(climateparams).run(calibrated_emissions, simid=simid)
+        np.testing.assert_allclose(ens.temperature.sel(simulation=simid), member.temperature)
+
+    with pytest.raises(ValueError, match="no simulation members"):
+        fm.run_ensemble(calibrated_emissions, simids=[], workers=1)
+
+
+def test_fairmodel_batches_keep_default_member(climateparams, calibrated_emissions):
+    """Test batched runs of the fair engine don't change the member that run uses by default
+    """
+    fm = sc.FairModel(climateparams)
+    median = fm.run(calibrated_emissions)
+    assert fm.simid == "median"
+
+    fm.run_ensemble(calibrated_emissions, simids=[1, 3], workers=1)
+    fm._run_batch(calibrated_emissions, [1, 3])
+    assert fm.simid == "median"
+    xr.testing.assert_identical(fm.run(calibrated_emissions), median)
+
+
+def test_climateparams_compile(climateparams):
+    """Test compiled argument bundles match the ClimateParams Dataset
+    """
+    compiled = climateparams.compile(np.arange(1750, 2501))
+
+    assert climateparams.compile(np.arange(1750, 2501)) is compiled
+    assert compiled.members["F_solar"].shape == (4, 751)
+    assert climateparams.compile(np.arange(1765, 2101)).members["F_solar"].shape == (4, 336)
+
+    args = compiled.bundle(compiled.index(2))
+    np.testing.assert_array_equal(args["scale"], climateparams.params["scale"].sel(simulation=2))
+    np.testing.assert_array_equal(args["F_solar"][:361], climateparams.params["F_solar"].sel(simulation=2))
+
+    median = compiled.bundle("median")
+    np.testing.assert_allclose(median["F2x"], climateparams.median_params["F2x"])
+
+
+def test_fairmodel_run_outputs(climateparams, calibrated_emissions):
+    """Test variable-selective runs and raw FairResult outputs
+    """
+    fv = sc.FairModel(climateparams, engine="vectorized")
+    full = fv.run(calibrated_emissions, simid=1)
+
+    ds = fv.run(calibrated_emissions, simid=1, outputs=["temperature"])
+    assert list(ds.data_vars) == ["temperature", "simulation"]
+    xr.testing.assert_identical(ds.temperature, full.temperature)
+
+    res = fv.run_ensemble(calibrated_emissions, workers=1, outputs=["temperature"], return_xr=False)
+    assert isinstance(res, sc.core.FairResult)
+    assert res.concentration is None
+    assert res.temperature.shape == (4, calibrated_emissions.shape[0])
+    np.testing.assert_allclose(res.temperature[1], full.temperature, rtol=1e-9)
+
+    with pytest.raises(ValueError):
+        fv.run(calibrated_emissions, outputs=["heatflux"])
+
+
+def test_fairmodel_run_scenarios(climateparams, calibrated_emissions):
+    """Test scenarios branched from a shared history match separate full runs
+    """
+    high = calibrated_emissions.copy()
+    high.loc[{"year": slice(2021, None), "gas": sc.core.FAIR_EMISSIONS_GASES}] *= 1.5
+    emissions = xr.concat([calibrated_emissions, high], dim="scenario").assign_coords(scenario=["rcp45", "high"])
+
+    fv = sc.FairModel(climateparams, engine="vectorized")
+    ds = fv.run_scenarios(emissions, simids=[1, 3], batch_size=1)
+    assert ds.temperature.dims == ("scenario", "simulation", "year")
+
+    for scenario in ["rcp45", "high"]:
+        expected = fv.run_ensemble(emissions.sel(scenario=scenario), simids=[1, 3], workers=1)
+        np.testing.assert_allclose(ds.temperature.sel(scenario=scenario), expected.temperature, rtol=1e-9)
+        np.testing.assert_allclose(ds.concentration.sel(scenario=scenario), expected.concentration, rtol=1e-9)
+
+    # the fair engine runs every scenario in full, leaving the default member alone
+    fm = sc.FairModel(climateparams)
+    np.testing.assert_allclose(fm.run_scenarios(emissions, simids=[1, 3]).temperature, ds.temperature, rtol=1e-6)
+    assert fm.simid == "default"
+
+    with pytest.raises(ValueError):
+        fv.run_scenarios(emissions, branch_year=2030)
+
+
+def test_fairmodel_run_pulse(climateparams, calibrated_emissions):
+    """Test pulse responses restarted from the baseline state match full perturbed runs
+    """
+    fv = sc.FairModel(climateparams, engine="vectorized")
+    response = fv.run_pulse(calibrated_emissions, gases=["CO2", "CH4"], pulse_years=[2030, 2020], simids=[0, 2])
+    assert response.dims == ("simulation", "gas", "pulse_year", "year")
+    assert response.shape == (2, 2, 2, calibrated_emissions.shape[0])
+    assert (response.sel(pulse_year=2030, year=slice(None, 2029)) == 0).all()
+    assert (response.sel(gas="CO2", year=2100) > 0).all()
+
+    baseline = fv.run_ensemble(calibrated_emissions, simids=[0, 2], workers=1).temperature
+    perturbed = calibrated_emissions.copy()
+    perturbed.loc[{"year": 2020, "gas": "CH4"}] += 1000.0
+    expected = fv.run_ensemble(perturbed, simids=[0, 2], workers=1).temperature - baseline
+    np.testing.assert_allclose(response.sel(gas="CH4", pulse_year=2020), expected, rtol=1e-6, atol=1e-12)
+
+    # the fair engine reruns the perturbed emissions in full, leaving the default member alone
+    fm = sc.FairModel(climateparams)
+    actual = fm.run_pulse(calibrated_emissions, gases=["CH4"], pulse_years=[2020], simids=[0, 2])
+    np.testing.assert_allclose(actual.isel(gas=0, pulse_year=0), expected, rtol=1e-6, atol=1e-12)
+    assert fm.simid == "default"
+
+
+def test_fairmodel_run_inverse(climateparams, calibrated_emissions):
+    """Test batched inverse runs hit the target and agree with the fair engine
+    """
+    fm = sc.FairModel(climateparams)
+    fv = sc.FairModel(climateparams, engine="vectorized")
+    ds = fv.run_inverse(calibrated_emissions, 1.8, 2030, simids=[0, 1, 2], tol=1e-6, batch_size=2)
+    assert ds.emissions.dims == ("simulation", "year", "gas")
+    assert ds.converged.all()
+    assert (abs(ds.residual) < 1e-6).all()
+
+    # the solved emissions reach the target in a full run, only the solved gas changed
+    changed = (ds.emissions != calibrated_emissions).any(["simulation", "year"])
+    assert changed["gas"][changed].values.tolist() == ["CO2_Fossil"]
+    for simid in ds.simulation.values:
+        temperature = fv.run(ds.emissions.sel(simulation=simid), simid=simid, outputs=["temperature"]).temperature
+        np.testing.assert_allclose(temperature.max(), 1.8, atol=1e-5)
+
+    expected = fm.run_inverse(calibrated_emissions, 1.5, 2030, mode="offset", target_year=2100, simids=[0, 2])
+    actual = fv.run_inverse(calibrated_emissions, 1.5, 2030, mode="offset", target_year=2100, simids=[0, 2])
+    np.testing.assert_allclose(actual.factor, expected.factor, rtol=1e-6)
+    assert fm.simid == "default"
+
+    # a target out of reach of the bracket
+    unreachable = fv.run_inverse(calibrated_emissions, 10.0, 2030, simids=[0])
+    assert not unreachable.converged.any()
+    assert unreachable.factor.isnull().all()
+    assert (unreachable.residual < 0).all()
+
+    with pytest.raises(ValueError):
+        fv.run_inverse(calibrated_emissions, 1.8, 1000)
+
+
+def test_fairmodel_run_ensemble_summary(climateparams, calibrated_emissions):
+    """Test streaming summary statistics of an ensemble match those of the full ensemble
+    """
+    fv = sc.FairModel(climateparams, engine="vectorized")
+    ens = fv.run_ensemble(calibrated_emissions, workers=1)
+
+    summary = sc.EnsembleSummary(quantiles=[0.05, 0.5, 0.95], thresholds=[1.5, 2.0])
+    ds = fv.run_ensemble(calibrated_emissions, workers=2, batch_size=2, summary=summary)
+
+    assert summary.count == 4
+    assert ds["temperature"].dims == ("quantile", "year")
+    np.testing.assert_allclose(ds["temperature"],
+                               ens.temperature.quantile([0.05, 0.5, 0.95], dim="simulation", method="hazen"))
+    np.testing.assert_allclose(ds["temperature_mean"], ens.temperature.mean("simulation"))
+    np.testing.assert_allclose(ds["temperature_std"], ens.temperature.std("simulation"))
+    np.testing.assert_allclose(ds["temperature_exceedance"].sel(temperature_threshold=2.0),
+                               (ens.temperature > 2.0).mean("simulation"))
+
+
+def test_fairmodel_lazy_ensemble(climateparams, calibrated_emissions):
+    """Test a dask-backed lazy ensemble computes the same members as run_ensemble
+    """
+    pytest.importorskip("dask")
+    fv = sc.FairModel(climateparams, engine="vectorized")
+
+    lazy = fv.lazy_ensemble(calibrated_emissions, chunk_size=3, outputs=["temperature"])
+    assert lazy.temperature.chunks == ((3, 1), (calibrated_emissions.shape[0],))
+
+    ens = fv.run_ensemble(calibrated_emissions, workers=1, outputs=["temperature"])
+    xr.testing.assert_allclose(lazy.isel(simulation=[3]).compute(), ens.isel(simulation=[3]), rtol=1e-9)
+    xr.testing.assert_allclose(lazy.compute(), ens, rtol=1e-9)
+
+    # finding the output shapes doesn't change the default member of the fair engine
+    fm = sc.FairModel(climateparams)
+    lazy = fm.lazy_ensemble(calibrated_emissions, simids=[1, 3], outputs=["temperature"])
+    assert fm.simid == "default"
+    xr.testing.assert_allclose(lazy.compute(), ens.sel(simulation=[1, 3]), rtol=1e-6)
+
+
+def test_fairmodel_run_horizon(climateparams, calibrated_emissions):
+    """Test runs cover the years of the emissions and stopping early doesn't change results
+    """
+    for engine in ["fair", "vectorized"]:
+        fm = sc.FairModel(climateparams, engine=engine)
+        full = fm.run(calibrated_emissions, simid=1)
+        short = fm.run(calibrated_emissions.sel(year=slice(None, 2100)), simid=1)
+
+        assert short["year"].values[-1] == 2100
+        xr.testing.assert_allclose(short, full.sel(year=slice(None, 2100)), rtol=1e-9)
+
+    ens = fm.run_ensemble(calibrated_emissions.sel(year=slice(None, 2300)), workers=1)
+    assert ens.temperature.shape == (4, 2300 - 1765 + 1)
+
+    with pytest.raises(ValueError):
+        fm.run(calibrated_emissions.assign_coords(year=calibrated_emissions["year"] - 100), simid=1)
+
+
+def test_fairmodel_run_concentration_driven(climateparams, calibrated_emissions):
+    """Test prescribing the concentrations of an emissions-driven run reproduces it
+    """
+    for engine in ["fair", "vectorized"]:
+        fm = sc.FairModel(climateparams, engine=engine)
+        expected = fm.run_ensemble(calibrated_emissions, simids=[0, 2], workers=1)
+        concentrations = expected.concentration.sel(simulation=2)
+
+        actual = fm.run_ensemble(calibrated_emissions, simids=[0, 2], workers=1, emissions_driven=False,
+                                 concentrations=concentrations)
+        xr.testing.assert_allclose(actual.sel(simulation=2), expected.sel(simulation=2), rtol=1e-9)
+        assert (actual.concentration.sel(simulation=0) == concentrations).all()
+
+    with pytest.raises(ValueError):
+        fm.run(calibrated_emissions, emissions_driven=False)
+    with pytest.raises(ValueError):
+        fm.run(calibrated_emissions, emissions_driven=False, concentrations=concentrations[:100])
+
+
+def test_fairmodel_run_co2_only(climateparams, calibrated_emissions):
+    """Test calibrated CO2-only runs agree across engines, batches and single members
+    """
+    fm = sc.FairModel(climateparams)
+    fv = sc.FairModel(climateparams, engine="vectorized")
+    other_rf = fv.non_co2_forcing(calibrated_emissions, workers=1)
+    assert other_rf.dims == ("simulation", "year")
+
+    expected = fm.run_ensemble(calibrated_emissions, workers=1, useMultigas=False, other_rf=other_rf)
+    actual = fv.run_ensemble(calibrated_emissions, workers=1, batch_size=3, useMultigas=False, other_rf=other_rf)
+    assert actual.temperature.dims == ("simulation", "year")
+    xr.testing.assert_allclose(actual, expected, rtol=1e-6)
+
+    member = fv.run(calibrated_emissions, simid=2, useMultigas=False, other_rf=other_rf)
+    np.testing.assert_allclose(member.temperature, actual.temperature.sel(simulation=2), rtol=1e-9)
+
+    # close to the full multi-gas run, whose CO2 forcing isn't logarithmic
+    full = fv.run_ensemble(calibrated_emissions, workers=1, outputs=["temperature"])
+    np.testing.assert_allclose(actual.temperature, full.temperature, atol=0.2)
+
+    with pytest.raises(ValueError):
+        fv.run(calibrated_emissions, simid=2, useMultigas=False, other_rf=other_rf.values)
+    # the median run has no forcing of its own in a per-member other_rf
+    for engine in ["fair", "vectorized"]:
+        with pytest.raises(ValueError, match="simid"):
+            sc.FairModel(climateparams, engine=engine).run(calibrated_emissions, useMultigas=False, other_rf=other_rf)
+    with pytest.raises(ValueError, match="no members"):
+        fv.run(calibrated_emissions, simid=2, useMultigas=False, other_rf=other_rf.sel(simulation=[0, 1]))
+
+
+def test_fairmodel_run_co2_only_shared_params(climateparams, calibrated_emissions):
+    """Test vectorized CO2-only ensembles with a C_pi shared by all members
+    """
+    params = climateparams.params.assign(C_pi=climateparams.params["C_pi"].isel(simulation=0, drop=True))
+    shared = sc.ClimateParams(params=params)
+    other_rf = sc.FairModel(shared, engine="vectorized").non_co2_forcing(calibrated_emissions, workers=1)
+
+    expected = sc.FairModel(shared).run_ensemble(calibrated_emissions, workers=1, useMultigas=False,
+                                                 other_rf=other_rf)
+    actual = sc.FairModel(shared, engine="vectorized").run_ensemble(
+        calibrated_emissions, workers=1, batch_size=3, useMultigas=False, other_rf=other_rf)
+    xr.testing.assert_allclose(actual, expected, rtol=1e-6)
+
+
+def test_fairmodel_run_ensemble_weights(climateparams, calibrated_emissions):
+    """Test ensembles of weighted ClimateParams carry and summarize with the weights
+    """
+    weights = xr.DataArray([0.1, 0.2, 0.3, 0.4], dims="simulation",
+                           coords={"simulation": climateparams.params["simulation"].values})
+    weighted = sc.ClimateParams(params=climateparams.params, weights=weights)
+    fv = sc.FairModel(weighted, engine="vectorized")
+
+    ens = fv.run_ensemble(calibrated_emissions, workers=1, outputs=["temperature"])
+    np.testing.assert_array_equal(ens.weight, weights)
+
+    ds = fv.run_ensemble(calibrated_emissions, workers=1, batch_size=3, summary=sc.EnsembleSummary())
+    np.testing.assert_allclose(ds["temperature_mean"], ens.temperature.weighted(ens.weight).mean("simulation"))
+
+
+def test_fairmodel_run_stacked_scenarios(climateparams, calibrated_emissions):
+    """Test [scenario x year x gas] emissions run every scenario in one call, whatever their layout
+    """
+    high = calibrated_emissions.copy()
+    high.loc[{"year": slice(2021, None), "gas": "CO2_Fossil"}] *= 1.5
+    emissions = xr.concat([calibrated_emissions, high], dim="scenario").assign_coords(scenario=["rcp45", "high"])
+
+    for engine in ["fair", "vectorized"]:
+        fm = sc.FairModel(climateparams, engine=engine)
+        ds = fm.run(emissions, simid=1)
+        assert ds.temperature.dims == ("scenario", "year")
+        ens = fm.run_ensemble(emissions, simids=[0, 2], workers=1, outputs=["temperature"])
+        assert ens.temperature.dims == ("scenario", "simulation", "year")
+        for scenario in ["rcp45", "high"]:
+            expected = fm.run(emissions.sel(scenario=scenario, drop=True), simid=1)
+            np.testing.assert_allclose(ds.temperature.sel(scenario=scenario), expected.temperature, rtol=1e-9)
+            expected = fm.run_ensemble(emissions.sel(scenario=scenario, drop=True), simids=[0, 2], workers=1)
+            np.testing.assert_allclose(ens.temperature.sel(scenario=scenario), expected.temperature, rtol=1e-9)
+
+    # gases are matched by label, whatever the order of gases and dims
+    shuffled = emissions.isel(gas=np.random.default_rng(0).permutation(40)).transpose("gas", "year", "scenario")
+    xr.testing.assert_identical(fm.run(shuffled, simid=1), ds)
+
+    df = pd.concat([emissions.sel(scenario=s).to_pandas().assign(scenario=s) for s in ["rcp45", "high"]])
+    np.testing.assert_allclose(fm.run(df, simid=1).temperature, ds.temperature, rtol=1e-9)
+
+    with pytest.raises(ValueError):
+        fm.run(emissions.drop_sel(gas="CH4"), simid=1)
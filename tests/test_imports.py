@@ -0,0 +1,35 @@
+import subprocess
+import sys
+
+import pytest
+
+import scmcoat as sc
+
+HEAVY_MODULES = ["numpy", "pandas", "xarray", "fair", "scipy"]
+
+
+def loaded_modules(code):
+    """heavy modules that `code` imports, in a fresh interpreter"""
+    check = f"import sys\n{code}\nsys.stderr.write(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    return subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True).stderr.split()
+
+
+def test_import_is_lazy():
+    """Test importing scmcoat, or running its command line help, defers the heavy dependencies
+    """
+    assert loaded_modules("import scmcoat") == []
+    assert loaded_modules("from scmcoat.cli import main\ntry:\n    main(['run', '--help'])\nexcept SystemExit:\n    pass") == []
+    assert set(loaded_modules("import scmcoat\nscmcoat.FairModel")) >= {"numpy", "xarray", "fair"}
+
+
+def test_lazy_attributes():
+    """Test the public names resolve on first use and unknown names still raise
+    """
+    from scmcoat.core import FairModel
+
+    assert sc.FairModel is FairModel
+    assert sc.utils.get_fairv1_climateparams is not None
+    assert {"ClimateParams", "EnsembleSummary", "utils"} <= set(dir(sc))
+    assert "TYPE_CHECKING" not in dir(sc)
+    with pytest.raises(AttributeError):
+        sc.NotAThing
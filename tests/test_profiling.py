@@ -0,0 +1,61 @@
+import logging
+import pstats
+
+import scmcoat as sc
+from scmcoat.profiling import RunStats
+
+
+def test_runstats_stages(climateparams, calibrated_emissions):
+    """Test per-stage statistics, callbacks and a sampled cProfile run
+    """
+    calls = []
+    stats = RunStats(callback=lambda stage, seconds, allocated: calls.append(stage), profile="cprofile")
+    fm = sc.FairModel(climateparams, stats=stats)
+
+    fm.run(calibrated_emissions, simid=1)
+    fm.run(calibrated_emissions, simid=2)
+
+    assert stats.runs == 2
+    summary = stats.summary()
+    assert list(summary.index) == ["prepare", "params", "model", "output"]
+    assert (summary["calls"] == 2).all()
+    assert summary.loc["model", "total_s"] > summary.loc["params", "total_s"]
+    assert calls[:4] == ["prepare", "params", "model", "output"]
+    assert isinstance(stats.profile_result, pstats.Stats)
+
+    # the batch that holds the member to profile
+    stats = RunStats(profile="cprofile", profile_run=3)
+    sc.FairModel(climateparams, engine="vectorized", stats=stats).run_ensemble(calibrated_emissions, workers=1,
+                                                                               batch_size=2)
+    assert stats.runs == 4
+    assert isinstance(stats.profile_result, pstats.Stats)
+
+
+def test_runstats_allocations_and_workers(climateparams, calibrated_emissions):
+    """Test tracemalloc counters and that stats of worker processes are merged
+    """
+    stats = RunStats(track_allocations=True)
+    fv = sc.FairModel(climateparams, engine="vectorized", stats=stats)
+
+    fv.run_ensemble(calibrated_emissions, workers=2, batch_size=2)
+
+    # 4 members in 2 batches
+    assert stats.runs == 4
+    summary = stats.summary()
+    assert summary.loc["model", "calls"] == 2
+    assert summary.loc["model", "peak_bytes"] > 0
+    assert summary.loc["output", "calls"] == 1
+
+
+def test_fairmodel_debug_logs(climateparams, calibrated_emissions, caplog, capsys):
+    """Test debug messages go to the scmcoat.core logger instead of stdout
+    """
+    fv = sc.FairModel(climateparams, engine="vectorized", debug=True)
+    with caplog.at_level(logging.DEBUG, logger="scmcoat.core"):
+        fv.run(calibrated_emissions)
+        fv.run_ensemble(calibrated_emissions, workers=1)
+
+    assert capsys.readouterr().out == ""
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("median_params" in message for message in messages)
+    assert "Running vectorized FaIR for 4 simulations and 1 scenarios" in messages
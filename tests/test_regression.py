@@ -0,0 +1,33 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import scmcoat as sc
+
+# temperatures of FairModel runs on the bundled RCP4.5 emissions, written with fair 1.6.4.
+# Speedups must reproduce them; regenerate this file only for intended changes to the model.
+REFERENCE = Path(__file__).parent / "data" / "reference_temperatures.csv"
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return pd.read_csv(REFERENCE, index_col="year")
+
+
+def test_default_temperature_unchanged(reference, rcp45_emissions):
+    """Test FairModel.run under default FaIR settings reproduces the reference temperatures
+    """
+    response = sc.FairModel().run(rcp45_emissions)
+    np.testing.assert_allclose(response.temperature, reference["default"], rtol=1e-6, atol=1e-9)
+
+
+@pytest.mark.parametrize("engine", ["fair", "vectorized"])
+@pytest.mark.parametrize("simid, column", [("median", "median"), (2, "simulation_2")])
+def test_climateparams_temperature_unchanged(reference, climateparams, calibrated_emissions, engine, simid,
+                                             column):
+    """Test FairModel.run with ClimateParams reproduces the reference temperatures with every engine
+    """
+    response = sc.FairModel(climateparams, engine=engine).run(calibrated_emissions, simid=simid)
+    np.testing.assert_allclose(response.temperature, reference[column], rtol=1e-6, atol=1e-9)
@@ -0,0 +1,44 @@
+import numpy as np
+import xarray as xr
+
+import scmcoat as sc
+from scmcoat.selection import derived_quantities, weighted_quantiles
+
+
+def test_select_representative_stratified():
+    """Test stratifying on ECS and TCR keeps their distribution with far fewer members
+    """
+    cp = sc.utils.get_fairv1_climateparams(cache=False)
+    sub = cp.select_representative(50)
+
+    assert sub.params.sizes["simulation"] == 50
+    assert len(np.unique(sub.params["simulation"])) == 50
+    np.testing.assert_array_equal(sub.weights["simulation"], sub.params["simulation"])
+    np.testing.assert_allclose(sub.weights.sum(), 1.0)
+
+    derived = derived_quantities(cp.params)
+    for name in ["ecs", "tcr"]:
+        full = weighted_quantiles(derived[name].values, np.ones(2237), [0.05, 0.5, 0.95])
+        subset = weighted_quantiles(derived[name].sel(simulation=sub.weights["simulation"]).values,
+                                    sub.weights.values, [0.05, 0.5, 0.95])
+        np.testing.assert_allclose(subset, full, rtol=0.05)
+
+
+def test_select_representative_reference():
+    """Test members calibrated against a reference reproduce its quantiles
+    """
+    cp = sc.utils.get_fairv1_climateparams(cache=False)
+    ecs = derived_quantities(cp.params)["ecs"]
+    rng = np.random.default_rng(0)
+    reference = ecs * xr.DataArray(np.linspace(0, 1, 30), dims="year") + rng.normal(scale=0.1, size=(2237, 30))
+
+    quantiles = [0.1, 0.5, 0.9]
+    sub = cp.select_representative(60, reference=reference, quantiles=quantiles)
+    assert sub.params.sizes["simulation"] <= 60
+    np.testing.assert_allclose(sub.weights.sum(), 1.0)
+
+    expected = reference.quantile(quantiles, dim="simulation", method="hazen").values
+    actual = weighted_quantiles(reference.sel(simulation=sub.weights["simulation"]).values, sub.weights.values,
+                                quantiles)
+    np.testing.assert_allclose(np.abs(actual - expected).max(), sub.weights.attrs["max_quantile_error"])
+    assert sub.weights.attrs["max_quantile_error"] < 0.15
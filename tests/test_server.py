@@ -0,0 +1,73 @@
+import threading
+
+import numpy as np
+import pytest
+import xarray as xr
+
+import scmcoat as sc
+from scmcoat.server import BatchServer, BatchClient
+
+
+@pytest.fixture
+def server(climateparams, tmp_path):
+    """BatchServer of the vectorized engine on a Unix socket, served from a thread
+    """
+    server = BatchServer(sc.FairModel(climateparams, engine="vectorized"), address=str(tmp_path / "scmcoat.sock"),
+                         max_delay=0.1)
+    ready = threading.Event()
+    thread = threading.Thread(target=server.serve, kwargs={"ready": ready}, daemon=True)
+    thread.start()
+    ready.wait()
+    yield server
+    server.stop()
+    thread.join()
+
+
+def test_batch_server(server, climateparams, calibrated_emissions):
+    """Test concurrent requests are coalesced and answered like direct runs
+    """
+    fv = sc.FairModel(climateparams, engine="vectorized")
+    scaled = calibrated_emissions.copy()
+    scaled.loc[{"year": slice(2030, None), "gas": "CO2_Fossil"}] *= 0.5
+
+    with BatchClient(server.address) as client:
+        first = client.submit(calibrated_emissions, simids=[0, 2])
+        second = client.submit(scaled.values, simids=[1, 2, 3], outputs=["temperature", "forcing"])
+        third = client.submit(scaled, simids=[3], dtype="float32")
+        xr.testing.assert_allclose(client.result(second),
+                                   fv.run_ensemble(scaled, simids=[1, 2, 3], workers=1,
+                                                   outputs=["temperature", "forcing"]))
+        xr.testing.assert_allclose(client.result(first),
+                                   fv.run_ensemble(calibrated_emissions, simids=[0, 2], workers=1,
+                                                   outputs=["temperature"]))
+        compact = client.result(third, return_xr=False)
+        assert compact["temperature"].dtype == np.float32
+        assert compact["temperature"].shape == (1, calibrated_emissions.sizes["year"])
+
+        with pytest.raises(RuntimeError):
+            client.run(calibrated_emissions, simids=[12345])
+
+    assert server.requests == 3
+    assert server.batches == 1
+    assert server.members == 6
+
+
+def test_batch_server_fair_engine(climateparams, calibrated_emissions, tmp_path):
+    """Test a server of the fair engine runs requests on its model without changing its default member
+    """
+    model = sc.FairModel(climateparams)
+    server = BatchServer(model, address=str(tmp_path / "fair.sock"), max_delay=0.1)
+    ready = threading.Event()
+    thread = threading.Thread(target=server.serve, kwargs={"ready": ready}, daemon=True)
+    thread.start()
+    ready.wait()
+
+    with BatchClient(server.address) as client:
+        ds = client.run(calibrated_emissions, simids=[1, 3])
+    server.stop()
+    thread.join()
+
+    xr.testing.assert_allclose(ds, model.run_ensemble(calibrated_emissions, simids=[1, 3], workers=1,
+                                                      outputs=["temperature"]))
+    assert model.simid == "default"
+    assert not server._tasks
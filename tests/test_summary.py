@@ -0,0 +1,52 @@
+import numpy as np
+
+from scmcoat.core import FairResult
+from scmcoat.selection import weighted_quantiles
+from scmcoat.summary import EnsembleSummary
+
+
+def test_ensemble_summary_merge():
+    """Test summaries of batches merge into accurate statistics of the whole ensemble
+    """
+    rng = np.random.default_rng(0)
+    temperature = rng.lognormal(size=(2237, 20)).cumsum(axis=1)
+    year = np.arange(2000, 2020)
+
+    summary = EnsembleSummary(thresholds=[10.0], compression=100)
+    for start in range(0, len(temperature), 256):
+        members = temperature[start:start + 256]
+        batch = summary.empty()
+        batch.update(FairResult(year=year, simulation=np.arange(start, start + len(members)), temperature=members))
+        summary.merge(batch)
+    ds = summary.to_dataset()
+
+    assert ds["count"] == 2237
+    np.testing.assert_allclose(ds["temperature_mean"], temperature.mean(axis=0))
+    np.testing.assert_allclose(ds["temperature_std"], temperature.std(axis=0))
+    np.testing.assert_array_equal(ds["temperature_max"], temperature.max(axis=0))
+    np.testing.assert_array_equal(ds["temperature_exceedance"].squeeze(), (temperature > 10.0).mean(axis=0))
+    # quantiles of the sketch are within a small rank error
+    for q, estimate in zip(summary.quantiles, ds["temperature"].values):
+        assert np.abs((temperature < estimate).mean(axis=0) - q).max() < 0.01
+
+
+def test_ensemble_summary_weights():
+    """Test integer member weights count like repeated members in moments and exceedances
+    """
+    rng = np.random.default_rng(1)
+    temperature = rng.normal(size=(50, 10))
+    weights = rng.integers(0, 4, size=50)
+    year = np.arange(2000, 2010)
+
+    summary = EnsembleSummary(thresholds=[0.5])
+    for start in range(0, 50, 16):
+        summary.update(FairResult(year=year, simulation=np.arange(start, min(start + 16, 50)),
+                                  temperature=temperature[start:start + 16]), weights=weights[start:start + 16])
+    ds = summary.to_dataset()
+
+    repeated = np.repeat(temperature, weights, axis=0)
+    assert ds["count"] == 50
+    np.testing.assert_allclose(ds["temperature_mean"], repeated.mean(axis=0))
+    np.testing.assert_allclose(ds["temperature_std"], repeated.std(axis=0))
+    np.testing.assert_allclose(ds["temperature_exceedance"].squeeze(), (repeated > 0.5).mean(axis=0))
+    np.testing.assert_allclose(ds["temperature"], weighted_quantiles(temperature, weights, summary.quantiles))
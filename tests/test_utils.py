@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+import scmcoat as sc
+
+
+def test_get_fairv1_climateparams():
+    """Test the bundled WG3 parameters are inflated into a simulation-indexed Dataset
+    """
+    cp = sc.utils.get_fairv1_climateparams(cache=False)
+
+    assert cp.params.sizes["simulation"] == 2237
+    assert cp.params["scale"].dims == ("simulation", "forcing_type")
+    assert cp.params["F_solar"].dims == ("simulation", "year")
+    assert "simulation" not in cp.params["natural"].dims
+    np.testing.assert_allclose(cp.params["C_pi"].sel(gas="ch4"), 731.406)
+    np.testing.assert_allclose(cp.params["scale"].sel(forcing_type=16), 1.12 * cp.params["scale"].sel(forcing_type=4))
+
+
+def test_get_fairv1_climateparams_cache(tmp_path, monkeypatch):
+    """Test the binary cache round-trips the ClimateParams Dataset
+    """
+    monkeypatch.setenv("SCMCOAT_CACHE_DIR", str(tmp_path))
+
+    built = sc.utils.get_fairv1_climateparams()
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+
+    cached = sc.utils.get_fairv1_climateparams()
+    xr.testing.assert_identical(built.params, cached.params)
+
+
+def test_rcmip_emissions_store(tmp_path, monkeypatch):
+    """Test the RCMIP emissions store is built from the CSV and read offline
+    """
+    years = [str(y) for y in range(1750, 2501)]
+    rows = []
+    for scenario, scale in [("ssp245", 1.0), ("ssp585", 2.0)]:
+        for variable in ["Emissions|CH4", "Emissions|Sulfur", "Emissions|F-Gases|SF6"]:
+            values = scale * np.arange(751.0)
+            values[1:10] = np.nan
+            rows.append(dict(Scenario=scenario, Region="World", Variable=variable, **dict(zip(years, values))))
+    rows.append(dict(Scenario="ssp245", Region="R5ASIA", Variable="Emissions|CH4", **dict(zip(years, np.ones(751)))))
+    csv = tmp_path / "rcmip.csv"
+    pd.DataFrame(rows).to_csv(csv, index=False)
+
+    store = tmp_path / "rcmip.npz"
+    monkeypatch.setenv("SCMCOAT_RCMIP_EMISSIONS", str(store))
+    sc.utils.build_rcmip_emissions_store(str(csv))
+
+    emissions = sc.utils.rcmip_emissions("ssp245")
+    assert emissions.shape == (751, 40)
+    np.testing.assert_array_equal(emissions.sel(gas="CH4"), np.arange(751.0))
+    np.testing.assert_allclose(emissions.sel(gas="SOx"), np.arange(751.0) * 32.065 / 64.064, rtol=1e-4)
+    np.testing.assert_array_equal(emissions.sel(gas="N2O"), 0)
+    assert emissions.units.sel(gas="CH4") == "Mt CH4/yr"
+
+    both = sc.utils.rcmip_emissions(["ssp245", "ssp585"])
+    assert both.dims == ("scenario", "year", "gas")
+    xr.testing.assert_identical(both.sel(scenario="ssp245", drop=True), emissions)
+
+    with pytest.raises(KeyError):
+        sc.utils.rcmip_emissions("ssp119")
+
+
+def test_save_ds_npz_pandas_strings(tmp_path):
+    """Test labels from a pandas string column are stored as unicode, readable without pickle
+    """
+    scenarios = pd.unique(pd.Series(["ssp245", "ssp585", "ssp245"], dtype="string"))
+    ds = xr.Dataset(
+        {
+            "emissions": (("scenario", "year"), np.ones((2, 3))),
+            "label": ("scenario", np.asarray(scenarios, dtype=object)),
+        },
+        coords={"scenario": np.asarray(scenarios, dtype=str), "year": [2020, 2021, 2022]},
+    )
+    path = str(tmp_path / "store.npz")
+    sc.utils._save_ds_npz(ds, path)
+
+    loaded = sc.utils._load_ds_npz(path)
+    assert loaded["label"].dtype.kind == "U"
+    np.testing.assert_array_equal(loaded["scenario"], ["ssp245", "ssp585"])
+    xr.testing.assert_equal(loaded, ds)
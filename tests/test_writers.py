@@ -0,0 +1,62 @@
+import numpy as np
+import xarray as xr
+
+import scmcoat as sc
+
+
+def test_ensemble_writer_netcdf_resume(tmp_path, climateparams, calibrated_emissions):
+    """Test streaming an ensemble to netCDF, resuming and reading it back
+    """
+    fv = sc.FairModel(climateparams, engine="vectorized")
+    expected = fv.run_ensemble(calibrated_emissions, workers=1, outputs=["temperature"])
+
+    writer = sc.EnsembleWriter(tmp_path / "ens", format="netcdf", dtype="float32")
+    # an interrupted run that only got through the first members
+    writer.write(fv.run(calibrated_emissions, simid=0, outputs=["temperature"]), scenario="rcp45")
+    assert writer.written("rcp45") == {0}
+
+    # a fresh writer picks up what is on disk and only runs the rest
+    writer = sc.EnsembleWriter(tmp_path / "ens", format="netcdf", dtype="float32")
+    fv.run_ensemble(calibrated_emissions, workers=1, batch_size=2, outputs=["temperature"],
+                    writer=writer, scenario="rcp45")
+    assert len(list((tmp_path / "ens" / "rcp45").glob("*.nc"))) == 3
+    assert writer.write(expected, scenario="rcp45") == 0
+
+    ds = writer.open()
+    assert ds.temperature.dims == ("scenario", "simulation", "year")
+    assert ds.temperature.dtype == np.float32
+    np.testing.assert_array_equal(ds.simulation, expected.simulation)
+    np.testing.assert_allclose(ds.temperature.sel(scenario="rcp45"), expected.temperature, rtol=1e-6)
+
+
+def test_ensemble_writer_zarr(tmp_path, climateparams, calibrated_emissions, zarr_backend):
+    """Test appending batches of an ensemble to a Zarr store
+    """
+    fv = sc.FairModel(climateparams, engine="vectorized")
+    expected = fv.run_ensemble(calibrated_emissions, workers=1)
+
+    writer = sc.EnsembleWriter(tmp_path / "ens.zarr")
+    fv.run_ensemble(calibrated_emissions, workers=1, batch_size=3, writer=writer, scenario="rcp45")
+    xr.testing.assert_allclose(writer.open("rcp45").load(), expected)
+
+    fv.run_ensemble(calibrated_emissions, workers=1, writer=writer, scenario="copy")
+    ds = writer.open()
+    assert ds["scenario"].dtype.kind == "U"
+    np.testing.assert_array_equal(ds["scenario"], ["copy", "rcp45"])
+    xr.testing.assert_allclose(ds.sel(scenario="copy", drop=True).load(), expected)
+
+
+def test_ensemble_writer_stacked_scenarios(tmp_path, climateparams, calibrated_emissions):
+    """Test ensembles of [scenario x year x gas] emissions are written to each of their scenarios
+    """
+    high = calibrated_emissions.copy()
+    high.loc[{"year": slice(2021, None), "gas": "CO2_Fossil"}] *= 1.5
+    emissions = xr.concat([calibrated_emissions, high], dim="scenario").assign_coords(scenario=["rcp45", "high"])
+    fv = sc.FairModel(climateparams, engine="vectorized")
+
+    writer = sc.EnsembleWriter(tmp_path / "ens", format="netcdf")
+    fv.run_ensemble(emissions, workers=1, batch_size=3, outputs=["temperature"], writer=writer)
+    assert writer.written("rcp45") == writer.written("high") == {0, 1, 2, 3}
+
+    expected = fv.run_ensemble(emissions, workers=1, outputs=["temperature"])
+    xr.testing.assert_allclose(writer.open().sel(scenario=["rcp45", "high"]), expected)